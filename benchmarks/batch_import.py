@@ -0,0 +1,75 @@
+"""
+    Time of a bulk import (synsets with literals, then relations between them) done with one add_synset /
+    add_relation call per item, compared with the same calls inside a wn.batch() transaction.
+
+    Usage:
+        python benchmarks/batch_import.py                                   # 50000 synsets, 100000 relations
+        python benchmarks/batch_import.py --synsets 100000 --relations 300000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rowordnet import RoWordNet, Synset
+from synthetic import RELATION_TYPES
+
+
+def make_import(num_synsets, num_relations, seed=0):
+    rng = random.Random(seed)
+    synsets = [("ENG30-{:08d}-n".format(i + 1), ["w{}".format(i), "w{}_x".format(i % 1000)])
+               for i in range(num_synsets)]
+    synsets_id = [synset_id for synset_id, _ in synsets]
+
+    pairs = set()
+    while len(pairs) < num_relations:
+        pairs.add(tuple(rng.sample(synsets_id, 2)))
+    relations = [(synset_id1, synset_id2, rng.choice(RELATION_TYPES)) for synset_id1, synset_id2 in sorted(pairs)]
+
+    return synsets, relations
+
+
+def run(synsets, relations, batch):
+    wn = RoWordNet(empty=True)
+    for relation_type in RELATION_TYPES:
+        wn.add_relation_type(relation_type)
+    new_synsets = [Synset(synset_id, pos=Synset.Pos.NOUN, literals=literals, literals_senses=["1"] * len(literals))
+                   for synset_id, literals in synsets]
+
+    def body():
+        for synset in new_synsets:
+            wn.add_synset(synset)
+        for synset_id1, synset_id2, relation in relations:
+            wn.add_relation(synset_id1, synset_id2, relation)
+
+    start = time.perf_counter()
+    if batch:
+        with wn.batch():
+            body()
+    else:
+        body()
+
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synsets", type=int, default=50000, help="number of synsets to import")
+    parser.add_argument("--relations", type=int, default=100000, help="number of relations to import")
+    args = parser.parse_args()
+
+    synsets, relations = make_import(args.synsets, args.relations)
+    single = run(synsets, relations, batch=False)
+    batch = run(synsets, relations, batch=True)
+
+    print("{} synsets, {} relations".format(len(synsets), len(relations)))
+    print("\tone call at a time: {:6.2f}s".format(single))
+    print("\tbatch             : {:6.2f}s (x{:.1f})".format(batch, single / batch))
+
+
+if __name__ == '__main__':
+    main()
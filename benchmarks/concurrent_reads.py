@@ -0,0 +1,105 @@
+"""
+    Read throughput of reader threads (similarities, literal lookups and walks) while a writer thread keeps adding and
+    removing relations, for an increasing number of readers. The readers either share the wordnet the writer changes
+    in place, or read the snapshots of a VersionedRoWordNet; the errors the readers run into are counted.
+
+    Usage:
+        python benchmarks/concurrent_reads.py                               # 50000 synsets, 1 to 8 readers, 2s each
+        python benchmarks/concurrent_reads.py --synsets 100000 --threads 1 2 4 --seconds 5
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rowordnet import VersionedRoWordNet
+from synthetic import synthetic_wordnet
+
+
+def read(wn, rng, synsets_id):
+    synset_id1, synset_id2 = rng.choice(synsets_id), rng.choice(synsets_id)
+    wn.wup_similarity(synset_id1, synset_id2)
+    for literal in wn.synset(synset_id1).literals:
+        wn.synsets(literal)
+    for i, _ in enumerate(wn.bfwalk(synset_id2)):
+        if i == 50:
+            break
+
+
+def write(wn, rng, synsets_id, added):
+    if added and rng.random() < 0.5:
+        wn.remove_relation(*added.pop())
+    else:
+        synset_id1, synset_id2 = rng.choice(synsets_id), rng.choice(synsets_id)
+        if synset_id1 != synset_id2 and not wn.relation_exists(synset_id1, synset_id2, 'similar_to') and \
+                synset_id2 not in dict(wn.outbound_relations(synset_id1)):
+            wn.add_relation(synset_id1, synset_id2, 'similar_to')
+            added.append((synset_id1, synset_id2))
+
+
+def run(wn, num_threads, seconds, versioned):
+    synsets_id = wn.synsets()
+    shared = VersionedRoWordNet(wn) if versioned else None
+    stop = threading.Event()
+    reads, errors, writes = [0] * num_threads, [0] * num_threads, [0]
+
+    def reader(i):
+        rng = random.Random(i)
+        while not stop.is_set():
+            try:
+                read(shared.snapshot() if versioned else wn, rng, synsets_id)
+                reads[i] += 1
+            except Exception:
+                errors[i] += 1
+
+    def writer():
+        rng, added = random.Random(-1), []
+        while not stop.is_set():
+            if versioned:
+                with shared.write() as draft:
+                    write(draft, rng, synsets_id, added)
+            else:
+                write(wn, rng, synsets_id, added)
+            writes[0] += 1
+            time.sleep(0.001)
+        if not versioned:
+            # leave the wordnet as it was, for the next run
+            for synset_id1, synset_id2 in added:
+                wn.remove_relation(synset_id1, synset_id2)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(num_threads)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return sum(reads) / seconds, sum(errors), writes[0] / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synsets", type=int, default=50000, help="number of synsets of the synthetic wordnet")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8], help="numbers of reader threads")
+    parser.add_argument("--seconds", type=float, default=2, help="duration of each run")
+    args = parser.parse_args()
+
+    wn = synthetic_wordnet(args.synsets)
+    print("{} synsets".format(args.synsets))
+    for versioned in (False, True):
+        print("snapshots (VersionedRoWordNet)" if versioned else "in place (plain RoWordNet)")
+        for num_threads in args.threads:
+            reads, errors, writes = run(wn, num_threads, args.seconds, versioned)
+            print("\t{:2d} readers: {:8.0f} reads/s, {:6d} reader errors, {:6.0f} writes/s"
+                  .format(num_threads, reads, errors, writes))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+    Load test of the JSON query server (python -m rowordnet.serve): many concurrent connections send a mix of
+    lookups, relations, walks, paths and similarities, each waiting for its response before sending the next request.
+    Reports the throughput and the p50/p99 latency, overall and by method.
+    A local server is started for the test, unless the port of a running one is given.
+
+    Usage:
+        python benchmarks/serve_load.py                                     # 32 connections, 10s
+        python benchmarks/serve_load.py --connections 64 --seconds 30 --workers 4
+        python benchmarks/serve_load.py --port 8765                         # against a running server
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else float('nan')
+
+
+class Client(object):
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+        self.next_id = 0
+
+    async def call(self, method, **params):
+        self.next_id += 1
+        self.writer.write((json.dumps({"id": self.next_id, "method": method, "params": params}) + "\n").encode())
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        if 'error' in response:
+            raise RuntimeError("{}: {}".format(response['error']['type'], response['error']['message']))
+        return response['result']
+
+
+def make_request(rng, nouns, literals):
+    kind = rng.random()
+    if kind < 0.3:
+        return "synsets", {"literal": rng.choice(literals)}
+    if kind < 0.45:
+        return "synset", {"synset_id": rng.choice(nouns)}
+    if kind < 0.6:
+        return "outbound_relations", {"synset_id": rng.choice(nouns)}
+    if kind < 0.8:
+        return "wup_similarity", {"synset_id1": rng.choice(nouns), "synset_id2": rng.choice(nouns)}
+    if kind < 0.9:
+        return "shortest_path", {"synset_id1": rng.choice(nouns), "synset_id2": rng.choice(nouns),
+                                 "relations": ["hypernym", "hyponym"]}
+    return "bfwalk", {"synset_id": rng.choice(nouns), "limit": 20}
+
+
+async def connection(host, port, seed, nouns, literals, deadline, latencies, errors):
+    client = Client(*await asyncio.open_connection(host, port, limit=2 ** 24))
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        method, params = make_request(rng, nouns, literals)
+        start = time.perf_counter()
+        try:
+            await client.call(method, **params)
+        except RuntimeError:
+            errors[method] = errors.get(method, 0) + 1
+        latencies.setdefault(method, []).append(time.perf_counter() - start)
+    client.writer.close()
+
+
+async def load(host, port, connections, seconds):
+    client = Client(*await asyncio.open_connection(host, port, limit=2 ** 24))
+    nouns = [synset_id for synset_id in await client.call("synsets") if synset_id.endswith("-n")]
+    literals = []
+    for synset_id in random.Random(0).sample(nouns, 500):
+        literals.extend((await client.call("synset", synset_id=synset_id))['literals'])
+    client.writer.close()
+
+    latencies, errors = {}, {}
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(connection(host, port, i, nouns, literals, deadline, latencies, errors)
+                           for i in range(connections)))
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="address of the server")
+    parser.add_argument("--port", type=int, help="port of a running server; a local one is started if missing")
+    parser.add_argument("--workers", type=int, help="worker processes of the local server")
+    parser.add_argument("--connections", type=int, default=32, help="number of concurrent connections")
+    parser.add_argument("--seconds", type=float, default=10, help="duration of the test")
+    args = parser.parse_args()
+
+    server, port = None, args.port
+    if port is None:
+        command = [sys.executable, "-m", "rowordnet.serve", "--host", args.host, "--port", "0"]
+        if args.workers is not None:
+            command += ["--workers", str(args.workers)]
+        server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True,
+                                  cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        port = int(server.stdout.readline().rsplit(":", 1)[1])
+
+    try:
+        latencies, errors = asyncio.run(load(args.host, port, args.connections, args.seconds))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    all_latencies = [latency for method_latencies in latencies.values() for latency in method_latencies]
+    print("{} connections, {:.0f}s: {} requests, {:.0f} requests/s".format(
+        args.connections, args.seconds, len(all_latencies), len(all_latencies) / args.seconds))
+    print("\t{:20s} {:>8s} {:>10s} {:>10s} {:>7s}".format("method", "requests", "p50 (ms)", "p99 (ms)", "errors"))
+    rows = sorted(latencies.items()) + [("all", all_latencies)]
+    for method, method_latencies in rows:
+        print("\t{:20s} {:8d} {:10.2f} {:10.2f} {:7d}".format(
+            method, len(method_latencies), percentile(method_latencies, 50) * 1000,
+            percentile(method_latencies, 99) * 1000,
+            sum(errors.values()) if method == "all" else errors.get(method, 0)))
+
+
+if __name__ == '__main__':
+    main()
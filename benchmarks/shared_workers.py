@@ -0,0 +1,97 @@
+"""
+    Memory and startup time of a pool of worker processes scoring similarity pairs, when every worker gets its own copy
+    of the wordnet (pickled to it) and when the workers attach to a wordnet published in shared memory
+    (RoWordNet.publish / RoWordNet.attach). For each worker it reports the time to get the wordnet and its proportional
+    set size (PSS, the shared pages being split between the processes that map them) after the pairs were scored.
+    Linux only, as the PSS is read from /proc.
+
+    Usage:
+        python benchmarks/shared_workers.py                 # 4 workers, 2000 pairs
+        python benchmarks/shared_workers.py --workers 8 --pairs 10000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rowordnet import RoWordNet
+
+
+_wordnet = None
+
+
+def pss():
+    # in MB
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) / 1024
+
+
+def init_copy(wordnet, started):
+    global _wordnet
+    _wordnet = wordnet
+    started.put(time.perf_counter())
+
+
+def init_attach(name, started):
+    global _wordnet
+    _wordnet = RoWordNet.attach(name)
+    started.put(time.perf_counter())
+
+
+def score(pairs):
+    return [_wordnet.wup_similarity(synset_id1, synset_id2) for synset_id1, synset_id2 in pairs]
+
+
+def report(_):
+    time.sleep(0.2)  # so that every worker gets one of the calls
+    return os.getpid(), pss()
+
+
+def run(name, context, workers, initializer, initargs, pairs):
+    started = context.Queue()
+    start = time.perf_counter()
+    with context.Pool(workers, initializer=initializer, initargs=initargs + (started,)) as pool:
+        ready = [started.get() - start for _ in range(workers)]
+        chunk_size = -(-len(pairs) // workers)
+        start = time.perf_counter()
+        pool.map(score, [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)])
+        scored = time.perf_counter() - start
+        sizes = dict(pool.map(report, range(workers)))
+
+    print("{}: workers ready in {:.3f}s (slowest), {} pairs scored in {:.2f}s, PSS per worker {:.1f} MB, "
+          "total {:.1f} MB".format(name, max(ready), len(pairs), scored, sum(sizes.values()) / len(sizes),
+                                   sum(sizes.values())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="number of worker processes")
+    parser.add_argument("--pairs", type=int, default=2000, help="number of wup similarity pairs to score")
+    args = parser.parse_args()
+
+    wordnet = RoWordNet()
+    rng = random.Random(0)
+    nouns = [synset_id for synset_id in wordnet.synsets() if synset_id.endswith("-n")]
+    pairs = [(rng.choice(nouns), rng.choice(nouns)) for _ in range(args.pairs)]
+    context = multiprocessing.get_context("spawn")
+
+    run("copy", context, args.workers, init_copy, (wordnet,), pairs)
+
+    start = time.perf_counter()
+    block = wordnet.publish()
+    print("published {:.1f} MB in {:.2f}s".format(block.size / 2 ** 20, time.perf_counter() - start))
+    try:
+        run("attach", context, args.workers, init_attach, (block.name,), pairs)
+    finally:
+        block.close()
+        block.unlink()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+    Memory and latency of the sqlite backend (RoWordNet.open_sqlite) against the wordnet loaded in memory. Each backend
+    runs in a process of its own, which reports its resident set size (RSS) after the wordnet is loaded or opened and
+    after the queries, and the time per call of lookups, synset reads, relations, walks, shortest paths and
+    similarities. Linux only, as the RSS is read from /proc.
+
+    Usage:
+        python benchmarks/sqlite_backend.py                         # bundled wordnet, sqlite cache of 2 MiB
+        python benchmarks/sqlite_backend.py --cache-size 2048 32768 --calls 2000
+"""
+import gc
+import os
+import sys
+import time
+import random
+import argparse
+import itertools
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rowordnet import RoWordNet
+
+
+def rss():
+    # in MB
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+
+
+def queries(wn, calls):
+    rng = random.Random(0)
+    synsets_id = wn.synsets()
+    nouns = [synset_id for synset_id in synsets_id if synset_id.endswith("-n")]
+    literals = [literal for synset_id in rng.sample(synsets_id, 1000) for literal in wn.synset(synset_id).literals]
+    sample = [rng.choice(synsets_id) for _ in range(calls)]
+    pairs = [(rng.choice(nouns), rng.choice(nouns)) for _ in range(calls // 10)]
+
+    def shortest_path(synset_id1, synset_id2):
+        try:
+            wn.shortest_path(synset_id1, synset_id2, {"hypernym", "hyponym"})
+        except Exception:  # no path
+            pass
+
+    return [
+        ("synsets(literal)", lambda: [wn.synsets(rng.choice(literals)) for _ in range(calls)], calls),
+        ("synset", lambda: [wn.synset(synset_id) for synset_id in sample], calls),
+        ("outbound_relations", lambda: [wn.outbound_relations(synset_id) for synset_id in sample], calls),
+        ("bfwalk (100 synsets)", lambda: [list(itertools.islice(wn.bfwalk(synset_id), 100))
+                                          for synset_id in sample[:calls // 100]], calls // 100),
+        ("shortest_path (hypernyms)", lambda: [shortest_path(*pair) for pair in pairs], len(pairs)),
+        ("wup_similarity", lambda: [wn.wup_similarity(*pair) for pair in pairs], len(pairs)),
+        ("lch_similarity", lambda: [wn.lch_similarity(*pair) for pair in pairs], len(pairs)),
+    ]
+
+
+def run(backend, filename, cache_size, calls, results):
+    start = time.perf_counter()
+    wn = RoWordNet(filename) if backend == "memory" else RoWordNet.open_sqlite(filename, cache_size)
+    ready = time.perf_counter() - start
+    # the load runs with the garbage collector paused, the first queries would pay for the collection that follows it
+    gc.collect()
+    loaded = rss()
+
+    timings = []
+    for name, function, number in queries(wn, calls):
+        start = time.perf_counter()
+        function()
+        timings.append((name, (time.perf_counter() - start) / number))
+    results.put((ready, loaded, rss(), timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cache-size", type=int, nargs="+", default=[2048], help="sqlite page cache sizes, in KiB")
+    parser.add_argument("--calls", type=int, default=1000, help="number of calls of each query")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        binary_filename = os.path.join(directory, "wordnet.pickle")
+        sqlite_filename = os.path.join(directory, "wordnet.sqlite")
+        wn = RoWordNet()
+        wn.save(binary_filename)
+        start = time.perf_counter()
+        wn.save(sqlite_filename, format="sqlite")
+        print("sqlite file of {:.1f} MB written in {:.2f}s".format(os.path.getsize(sqlite_filename) / 2 ** 20,
+                                                                   time.perf_counter() - start))
+        del wn
+
+        runs = [("memory", binary_filename, 0)] + \
+            [("sqlite {} KiB".format(cache_size), sqlite_filename, cache_size) for cache_size in args.cache_size]
+        reports = []
+        for name, filename, cache_size in runs:
+            results = context.Queue()
+            process = context.Process(target=run, args=(name.split()[0], filename, cache_size, args.calls, results))
+            process.start()
+            reports.append((name, results.get()))
+            process.join()
+
+    print("{:28s}".format("") + "".join("{:>18s}".format(name) for name, _ in reports))
+    print("{:28s}".format("ready (s)") + "".join("{:18.3f}".format(report[0]) for _, report in reports))
+    print("{:28s}".format("RSS after load (MB)") + "".join("{:18.1f}".format(report[1]) for _, report in reports))
+    print("{:28s}".format("RSS after queries (MB)") + "".join("{:18.1f}".format(report[2]) for _, report in reports))
+    for i, (query, _) in enumerate(reports[0][1][3]):
+        print("{:28s}".format(query + " (us)") + "".join("{:18.1f}".format(report[3][i][1] * 1e6)
+                                                        for _, report in reports))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""
+    Benchmark suite of the hot paths of the API: binary, xml and jsonl (plain and gzipped) load and save, synsets()
+    with and without a literal and a pos, inbound/outbound relations, bfwalk, shortest_path, the path, wup and lch
+    similarities, merge, intersection, difference and generate_synset_id. It runs on the bundled wordnet and on
+    synthetic wordnets of the given sizes (see synthetic.py), with the same random inputs on every run.
+
+    Every benchmark is timed --repeat times; the table gives the best and the median time per call. The results can be
+    saved as JSON (together with the commit, python version and machine) and compared with the results saved for
+    another commit, flagging the benchmarks whose median got slower than --threshold times.
+
+    Usage:
+        python benchmarks/suite.py                                        # bundled wordnet
+        python benchmarks/suite.py --synthetic 50000 200000 --json after.json
+        python benchmarks/suite.py --only "similarity|shortest_path" --compare before.json
+        python benchmarks/suite.py --no-bundled --synthetic 10000 --quick
+"""
+import os
+import re
+import gc
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import datetime
+import itertools
+import statistics
+import subprocess
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rowordnet import RoWordNet, Synset
+from rowordnet.rowordnet import merge, intersection, difference
+from synthetic import synthetic_wordnet
+
+
+def changed_copy(wn, rng, synsets_id):
+    # a copy of the wordnet with 1% of its synsets edited, removed or added, for the set operations
+    overlay = wn.overlay()
+    count = max(1, len(synsets_id) // 100)
+    for synset_id in rng.sample(synsets_id, count):
+        overlay.edit_synset(synset_id).definition = "changed"
+    for synset_id in rng.sample(synsets_id, count):
+        if synset_id in overlay._synsets:
+            overlay.remove_synset(synset_id)
+    for synset_id in overlay.generate_synset_ids(count, prefix="BENCH-"):
+        overlay.add_synset(Synset(synset_id, pos=Synset.Pos.NOUN, literals=["bench"], literals_senses=["1"]))
+    return overlay._flatten()
+
+
+def benchmarks(wn, directory, quick):
+    """
+        The benchmarks of a wordnet, as (name, number of calls, function) tuples; a function makes all its calls and
+        returns nothing.
+    """
+
+    rng = random.Random(0)
+    scale = 10 if quick else 1
+    synsets_id = wn.synsets()
+    nouns = [synset_id for synset_id in synsets_id if synset_id.endswith("-n")]
+    literals = [literal for synset_id in rng.sample(synsets_id, min(len(synsets_id), 2000))
+                for literal in wn.synset(synset_id).literals]
+
+    binary_filename = os.path.join(directory, "wordnet.pickle")
+    xml_filename = os.path.join(directory, "wordnet.xml")
+    jsonl_filename = os.path.join(directory, "wordnet.jsonl")
+    jsonl_gz_filename = os.path.join(directory, "wordnet.jsonl.gz")
+    wn.save(binary_filename)
+    wn.save(xml_filename, xml=True)
+    wn.save(jsonl_filename, format="jsonl")
+    wn.save(jsonl_gz_filename, format="jsonl")
+
+    def calls(function, inputs):
+        def run():
+            for args in inputs:
+                function(*args)
+        return len(inputs), run
+
+    def sample(values, n):
+        return [(rng.choice(values),) for _ in range(n // scale)]
+
+    def pairs(n):
+        return [(rng.choice(nouns), rng.choice(nouns)) for _ in range(n // scale)]
+
+    def bfwalk(synset_id):
+        for _ in itertools.islice(wn.bfwalk(synset_id), 1000):
+            pass
+
+    def shortest_path(synset_id1, synset_id2, relations=None):
+        try:
+            wn.shortest_path(synset_id1, synset_id2, relations)
+        except Exception:  # no path
+            pass
+
+    hypernym_pairs = [pair + ({"hypernym", "hyponym"},) for pair in pairs(300)]
+    other = changed_copy(wn, rng, synsets_id)
+
+    yield ("load_binary",) + calls(RoWordNet, [(binary_filename,)])
+    yield ("load_xml",) + calls(lambda filename: RoWordNet(filename, xml=True), [(xml_filename,)])
+    yield ("load_jsonl",) + calls(lambda filename: RoWordNet(filename, format="jsonl"), [(jsonl_filename,)])
+    yield ("load_jsonl_gz",) + calls(lambda filename: RoWordNet(filename, format="jsonl"), [(jsonl_gz_filename,)])
+    yield ("save_binary",) + calls(wn.save, [(binary_filename,)])
+    yield ("save_xml",) + calls(lambda filename: wn.save(filename, xml=True), [(xml_filename,)])
+    yield ("save_jsonl",) + calls(lambda filename: wn.save(filename, format="jsonl"), [(jsonl_filename,)])
+    yield ("save_jsonl_gz",) + calls(lambda filename: wn.save(filename, format="jsonl"), [(jsonl_gz_filename,)])
+    yield ("synsets",) + calls(wn.synsets, [()] * 10)
+    yield ("synsets_pos",) + calls(wn.synsets, [(None, Synset.Pos.NOUN)] * 10)
+    yield ("synsets_literal",) + calls(wn.synsets, sample(literals, 20000))
+    yield ("synsets_literal_pos",) + calls(lambda literal: wn.synsets(literal, Synset.Pos.NOUN),
+                                           sample(literals, 20000))
+    yield ("synsets_literal_strict",) + calls(lambda literal: wn.synsets(literal, strict=True), sample(literals, 20000))
+    yield ("outbound_relations",) + calls(wn.outbound_relations, sample(synsets_id, 20000))
+    yield ("inbound_relations",) + calls(wn.inbound_relations, sample(synsets_id, 20000))
+    yield ("bfwalk_1000",) + calls(bfwalk, sample(nouns, 20))
+    yield ("shortest_path",) + calls(shortest_path, pairs(100))
+    yield ("shortest_path_hypernym",) + calls(shortest_path, hypernym_pairs)
+    yield ("path_similarity",) + calls(wn.path_similarity, pairs(300))
+    yield ("wup_similarity",) + calls(wn.wup_similarity, pairs(1000))
+    yield ("lch_similarity",) + calls(wn.lch_similarity, pairs(300))
+    yield ("merge",) + calls(merge, [(wn, other)])
+    yield ("intersection",) + calls(intersection, [(wn, other)])
+    yield ("difference",) + calls(difference, [(wn, other)])
+    yield ("generate_synset_id",) + calls(wn.generate_synset_id, [()] * (10000 // scale))
+
+
+def time_benchmark(run, repeat):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=10,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", type=int, nargs="*", default=[], help="sizes of the synthetic wordnets")
+    parser.add_argument("--no-bundled", dest="bundled", action="store_false", help="skip the bundled wordnet")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs of each benchmark (default: 3)")
+    parser.add_argument("--only", help="regular expression, run only the benchmarks whose name matches it")
+    parser.add_argument("--quick", action="store_true", help="10 times fewer calls, for a smoke test")
+    parser.add_argument("--json", help="file to save the results to")
+    parser.add_argument("--compare", help="results saved with --json to compare with")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="slowdown of the median that counts as a regression (default: 1.2)")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = {(result["wordnet"], result["benchmark"]): result for result in json.load(f)["results"]}
+
+    wordnets = [("bundled", RoWordNet)] if args.bundled else []
+    wordnets += [("synthetic-{}".format(size), lambda size=size: synthetic_wordnet(size)) for size in args.synthetic]
+
+    results, regressions = [], []
+    print("{:20s} {:24s} {:>7s} {:>14s} {:>14s}{}".format("wordnet", "benchmark", "calls", "best (us/call)",
+                                                          "median", "   vs baseline" if baseline else ""))
+    for name, make_wordnet in wordnets:
+        wn = make_wordnet()
+        with tempfile.TemporaryDirectory() as directory:
+            for benchmark, number, run in benchmarks(wn, directory, args.quick):
+                if args.only and not re.search(args.only, benchmark):
+                    continue
+                times = [elapsed / number for elapsed in time_benchmark(run, args.repeat)]
+                result = {"wordnet": name, "benchmark": benchmark, "calls": number, "repeat": args.repeat,
+                          "best": min(times), "median": statistics.median(times), "times": times}
+                results.append(result)
+
+                comparison = ""
+                previous = baseline.get((name, benchmark))
+                if previous is not None:
+                    ratio = result["median"] / previous["median"]
+                    comparison = "   {:.2f}x{}".format(ratio, " REGRESSION" if ratio > args.threshold else "")
+                    if ratio > args.threshold:
+                        regressions.append(result)
+                print("{:20s} {:24s} {:7d} {:14.1f} {:14.1f}{}".format(name, benchmark, number, result["best"] * 1e6,
+                                                                       result["median"] * 1e6, comparison), flush=True)
+        del wn
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=1)
+    if regressions:
+        print("{} regression(s) over {:.2f}x".format(len(regressions), args.threshold))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+    Memory used by the Synset objects of a wordnet, compared with the previous synset layout (a per-instance __dict__
+    with list attributes and no string interning).
+
+    The synsets are rebuilt from decoded JSON records, like a loader would, so that equal strings start out as
+    separate objects. The retained memory is measured with tracemalloc after the records are dropped.
+
+    Usage:
+        python benchmarks/synset_memory.py                      # the bundled wordnet
+        python benchmarks/synset_memory.py --synthetic 100000   # a synthetic wordnet
+"""
+import os
+import sys
+import gc
+import json
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rowordnet import RoWordNet, Synset
+
+
+class DictSynset(object):
+    """ The synset layout used before __slots__ and interning. """
+
+    def __init__(self, id, pos=None, nonlexicalized=None, definition=None, stamp=None, sentiwn=None, domain=None,
+                 sumo=None, sumotype=None, literals=None, literals_senses=None):
+        self._id = id
+        self._literals = [] if literals is None else literals
+        self._literals_senses = [] if literals_senses is None else literals_senses
+        self._pos = pos
+        self._definition = definition
+        self._stamp = stamp
+        self._domain = domain
+        self._sumo = sumo
+        self._sumotype = sumotype
+        self._sentiwn = sentiwn
+        self._nonlexicalized = nonlexicalized
+
+
+def encode(wn):
+    lines = []
+    for synset_id in wn.synsets():
+        synset = wn.synset(synset_id)
+        lines.append(json.dumps([synset.id, synset.pos.value if synset.pos is not None else None,
+                                 synset.nonlexicalized, synset.definition, synset.stamp, synset.sentiwn, synset.domain,
+                                 synset.sumo, synset.sumotype.value if synset.sumotype is not None else None,
+                                 synset.literals, synset.literals_senses]))
+    return lines
+
+
+def measure(synset_class, lines):
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    records = [json.loads(line) for line in lines]
+    synsets = []
+    for (synset_id, pos, nonlexicalized, definition, stamp, sentiwn, domain, sumo, sumotype, literals,
+         literals_senses) in records:
+        synsets.append(synset_class(synset_id, pos=Synset.Pos(pos) if pos is not None else None,
+                                    nonlexicalized=nonlexicalized, definition=definition, stamp=stamp,
+                                    sentiwn=sentiwn, domain=domain, sumo=sumo,
+                                    sumotype=Synset.SumoType(sumotype) if sumotype is not None else None,
+                                    literals=literals, literals_senses=literals_senses))
+    del records
+    gc.collect()
+
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del synsets
+    return retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", type=int, default=None, help="number of synsets of a synthetic wordnet")
+    args = parser.parse_args()
+
+    if args.synthetic is None:
+        wn = RoWordNet()
+    else:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        from synthetic import synthetic_wordnet
+        wn = synthetic_wordnet(args.synthetic)
+
+    lines = encode(wn)
+    del wn
+    gc.collect()
+
+    dict_bytes = measure(DictSynset, lines)
+    slots_bytes = measure(Synset, lines)
+
+    print("{} synsets".format(len(lines)))
+    print("\tdict synsets : {:8.1f} MB ({:.0f} bytes/synset)".format(dict_bytes / 2 ** 20, dict_bytes / len(lines)))
+    print("\tslots synsets: {:8.1f} MB ({:.0f} bytes/synset)".format(slots_bytes / 2 ** 20, slots_bytes / len(lines)))
+    print("\tsaved        : {:8.1f} MB ({:.1%})".format((dict_bytes - slots_bytes) / 2 ** 20,
+                                                        1 - slots_bytes / dict_bytes))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+    Synthetic wordnets for benchmarks: a random hypernym tree (with the matching hyponym edges) plus a few other
+    relations, random literals drawn from a Zipf-like vocabulary, definitions and SentiWN values.
+"""
+import random
+import itertools
+
+from rowordnet import RoWordNet, Synset, WordNetError
+
+
+ROOT_ID = "ENG30-00000001-n"
+RELATION_TYPES = ['hypernym', 'hyponym', 'near_antonym', 'similar_to', 'part_meronym', 'part_holonym']
+
+
+def synthetic_wordnet(num_synsets: int, seed: int = 0, vocabulary_size: int = None):
+    """
+        Build a synthetic wordnet.
+        Args:
+            num_synsets (int): The number of synsets.
+            seed (int, optional): The random seed. Defaults to 0.
+            vocabulary_size (int, optional): The number of distinct words. Defaults to num_synsets.
+        Returns:
+            RoWordNet: The synthetic wordnet.
+    """
+
+    rng = random.Random(seed)
+    vocabulary_size = vocabulary_size or num_synsets
+    vocabulary = ["w{}".format(i) for i in range(vocabulary_size)]
+    # cumulative weights, computed once instead of by every rng.choices call
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(vocabulary_size)))
+    domains = ["domain{}".format(i) for i in range(50)]
+    sumos = ["Sumo{}".format(i) for i in range(500)]
+    poses = list(Synset.Pos)
+    sentiwns = [[0.0, 0.0, 1.0], [0.125, 0.0, 0.875], [0.0, 0.25, 0.75], [0.5, 0.0, 0.5], [0.0, 0.625, 0.375]]
+
+    wn = RoWordNet(empty=True)
+    for relation_type in RELATION_TYPES:
+        wn.add_relation_type(relation_type)
+
+    synsets_id = []
+    for i in range(num_synsets):
+        pos = poses[0] if i == 0 else rng.choice(poses)
+        synset_id = ROOT_ID if i == 0 else "ENG30-{:08d}-{}".format(i + 1, pos)
+
+        literals = []
+        for word in rng.choices(vocabulary, cum_weights=weights, k=rng.randint(1, 3)):
+            if rng.random() < 0.2:
+                word = "{}_{}".format(word, rng.choice(vocabulary))
+            if word not in literals:
+                literals.append(word)
+
+        synset = Synset(synset_id, pos=pos, nonlexicalized=False,
+                        definition=" ".join(rng.choices(vocabulary, cum_weights=weights, k=rng.randint(3, 15))),
+                        stamp=rng.choice([None, "Verginica"]), sentiwn=rng.choice(sentiwns),
+                        domain=rng.choice(domains), sumo=rng.choice(sumos), sumotype=rng.choice(list(Synset.SumoType)),
+                        literals=literals, literals_senses=[str(rng.randint(1, 5)) for _ in literals])
+        wn.add_synset(synset)
+        synsets_id.append(synset_id)
+
+        if i > 0:
+            # attach to a random earlier synset, with a bias towards recent ones to get a deeper tree
+            parent_id = synsets_id[int(i * rng.random() ** 0.5)]
+            wn.add_relation(synset_id, parent_id, 'hypernym')
+            wn.add_relation(parent_id, synset_id, 'hyponym')
+
+    for _ in range(num_synsets // 4):
+        synset_id1, synset_id2 = rng.sample(synsets_id, 2)
+        try:
+            wn.add_relation(synset_id1, synset_id2, rng.choice(RELATION_TYPES[2:]))
+        except WordNetError:  # there's already a relation between the two synsets
+            pass
+
+    # set by RoWordNet.__init__ for the root of a full wordnet, and needed by lch_similarity
+    wn._max_hypernym_height = wn._hypernym_tree_height(ROOT_ID)
+
+    return wn
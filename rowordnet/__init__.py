@@ -1,3 +1,29 @@
+import importlib
+
 from .rowordnet import RoWordNet
 from .synset import Synset
-from .exceptions import WordNetError, SynsetError
\ No newline at end of file
+from .columns import SynsetColumns
+from .exceptions import WordNetError, SynsetError
+
+# the other backends are imported when they're first used, so that importing the package doesn't import what they
+# depend on (i.e. multiprocessing.shared_memory, new in python 3.8, or asyncio)
+_backends = {
+    'RoWordNetOverlay': '.overlay',
+    'SharedRoWordNet': '.sharedmem',
+    'SqliteRoWordNet': '.sqlitedb',
+    'VersionedRoWordNet': '.versioned',
+    'AsyncRoWordNet': '.aio',
+}
+
+__all__ = ['RoWordNet', 'Synset', 'SynsetColumns', 'WordNetError', 'SynsetError'] + list(_backends)
+
+
+def __getattr__(name):
+    module = _backends.get(name)
+    if module is None:
+        raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+    return getattr(importlib.import_module(module, __name__), name)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_backends))
@@ -0,0 +1,5 @@
+from .cli import main
+
+# the workers of a spawned pool import this module again, as __mp_main__, and must not run the command
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+import os
+import math
+import asyncio
+import operator
+import functools
+
+from .rowordnet import RoWordNet
+from .synset import Synset
+from . import workers as _workers
+
+
+class AsyncRoWordNet(object):
+    def __init__(self, wordnet: RoWordNet, workers: int = None, timeout: float = None):
+        """
+            Awaitable facade of a wordnet, for asyncio applications. The lookups in the indexes (synsets, synset,
+            relations) are fast and run inline. The traversals (bfwalk, shortest_path) and the similarities run in a
+            pool of worker processes that hold the wordnet, so they never block the event loop.
+
+                async with AsyncRoWordNet(RoWordNet(), workers=4, timeout=1.0) as wn:
+                    synsets_id = await wn.synsets("tren")
+                    similarity = await wn.lch_similarity(synsets_id[0], synsets_id[1])
+
+            Every call can be cancelled and has a timeout. A call still waiting for a worker is dropped; a call that's
+            already running in a worker can't be interrupted, so it runs to the end there and its result is discarded.
+            The exceptions raised by the wordnet are raised by the awaited calls, and an expired timeout raises
+            asyncio.TimeoutError.
+            The wordnet must not be changed while the facade is in use: the workers have their own copy of it.
+
+            Args:
+                wordnet (RoWordNet): The wordnet.
+                workers (int, optional): The number of worker processes, 0 to run the heavy calls in a thread of this
+                    process instead. Defaults to the number of CPUs.
+                timeout (float, optional): The default timeout of the heavy calls, in seconds. Defaults to None (no
+                    timeout).
+            Raises:
+                TypeError: If any argument has incorrect type.
+        """
+
+        if not isinstance(wordnet, RoWordNet):
+            raise TypeError("Argument 'wordnet' has incorrect type, expected RoWordNet, got {}"
+                            .format(type(wordnet).__name__))
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if not isinstance(workers, int):
+            raise TypeError("Argument 'workers' has incorrect type, expected int, got {}"
+                            .format(type(workers).__name__))
+
+        self.wordnet = wordnet
+        self.workers = workers
+        self.timeout = timeout
+        self._pool = _workers.worker_pool(wordnet, workers) if workers > 0 else None
+        # the calls submitted to the pool and not done yet, so that close can cancel the ones still waiting
+        self._pending = set()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    def close(self):
+        """
+            Shut down the worker processes, once they're done with the calls they're running. Calls still waiting for
+            a worker are cancelled. This blocks until the workers exit, so in an event loop use aclose instead.
+        """
+
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            _workers.shutdown_pool(pool, self._pending)
+
+    async def aclose(self):
+        """
+            Shut down the worker processes like close does, but wait for them in a thread, so the event loop keeps
+            running the other tasks in the meantime.
+        """
+
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.get_running_loop().run_in_executor(None, _workers.shutdown_pool, pool, self._pending)
+
+    def _submit(self, function):
+        loop = asyncio.get_running_loop()
+        if self._pool is not None:
+            future = self._pool.submit(_workers.run, function)
+            self._pending.add(future)
+            future.add_done_callback(self._pending.discard)
+            return asyncio.wrap_future(future, loop=loop)
+        return loop.run_in_executor(None, function, self.wordnet)
+
+    async def _offload(self, function, timeout: float):
+        return await asyncio.wait_for(self._submit(function), self.timeout if timeout is None else timeout)
+
+    # inline lookups, see the RoWordNet methods with the same name
+
+    async def synsets(self, literal: str = None, pos: Synset.Pos = None, strict: bool = False):
+        return self.wordnet.synsets(literal, pos, strict)
+
+    async def synset(self, synset_id: str):
+        return self.wordnet.synset(synset_id)
+
+    async def synset_by_sense(self, literal: str, sense: str, pos: Synset.Pos = None):
+        return self.wordnet.synset_by_sense(literal, sense, pos)
+
+    async def outbound_relations(self, synset_id: str):
+        return self.wordnet.outbound_relations(synset_id)
+
+    async def inbound_relations(self, synset_id: str):
+        return self.wordnet.inbound_relations(synset_id)
+
+    async def relations(self, synset_id: str):
+        return self.wordnet.relations(synset_id)
+
+    async def relation_exists(self, synset_id1: str, synset_id2: str, relation: str):
+        return self.wordnet.relation_exists(synset_id1, synset_id2, relation)
+
+    # heavy calls, run by the workers; timeout (in seconds) overrides the default timeout of the facade
+
+    async def bfwalk(self, synset_id: str, limit: int = 100, timeout: float = None):
+        """
+            Travel the wordnet starting from a given synset, see RoWordNet.bfwalk.
+            Args:
+                synset_id (str): The id of the synset.
+                limit (int, optional): The maximum number of steps. Defaults to 100.
+                timeout (float, optional): The timeout of the call. Defaults to the timeout of the facade.
+            Returns:
+                list of tuples: The first steps of the walk, as (synset id, relation, from synset id) tuples.
+        """
+
+        return await self._offload(functools.partial(_workers._bfwalk, synset_id=synset_id, limit=limit), timeout)
+
+    async def shortest_path(self, synset_id1: str, synset_id2: str, relations: set = None, timeout: float = None):
+        return await self._offload(operator.methodcaller('shortest_path', synset_id1, synset_id2, relations), timeout)
+
+    async def path_similarity(self, synset_id1: str, synset_id2: str, simulate_root: bool = True,
+                              timeout: float = None):
+        return await self._offload(operator.methodcaller('path_similarity', synset_id1, synset_id2, simulate_root),
+                                   timeout)
+
+    async def wup_similarity(self, synset_id1: str, synset_id2: str, simulate_root: bool = True, timeout: float = None):
+        return await self._offload(operator.methodcaller('wup_similarity', synset_id1, synset_id2, simulate_root),
+                                   timeout)
+
+    async def lch_similarity(self, synset_id1: str, synset_id2: str, simulate_root: bool = True, timeout: float = None):
+        return await self._offload(operator.methodcaller('lch_similarity', synset_id1, synset_id2, simulate_root),
+                                   timeout)
+
+    async def similarities(self, pairs: list, metric: str = "wup", simulate_root: bool = True, timeout: float = None):
+        """
+            Compute the similarity of many pairs of synsets. The pairs are split in one chunk per worker, and each chunk
+            is computed by a single call of a worker.
+            Args:
+                pairs (list of tuples): The (synset id, synset id) pairs.
+                metric (str, optional): The similarity: "path", "wup" or "lch". Defaults to "wup".
+                simulate_root (bool, optional): See RoWordNet.path_similarity. Defaults to True.
+                timeout (float, optional): The timeout of the whole batch. Defaults to the timeout of the facade.
+            Returns:
+                list of float: The similarity of each pair.
+            Raises:
+                ValueError: If the metric is not known.
+        """
+
+        if metric not in ("path", "wup", "lch"):
+            raise ValueError("Unknown similarity '{}', expected 'path', 'wup' or 'lch'".format(metric))
+        if len(pairs) == 0:
+            return []
+
+        chunk_size = math.ceil(len(pairs) / max(self.workers, 1))
+        chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+        batch = asyncio.gather(*(self._submit(functools.partial(_workers.similarities, metric=metric, pairs=chunk,
+                                                                simulate_root=simulate_root))
+                                 for chunk in chunks))
+        results = await asyncio.wait_for(batch, self.timeout if timeout is None else timeout)
+        return [similarity for chunk_results in results for similarity in chunk_results]
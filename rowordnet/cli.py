@@ -0,0 +1,310 @@
+import os
+import sys
+import json
+import time
+import argparse
+import functools
+import itertools
+from collections import deque
+
+import networkx as nx
+
+from .rowordnet import RoWordNet
+from .records import synset_to_record, _chr2pos
+from . import workers as _workers
+
+
+def _synsets_of(wordnet, value: str):
+    # a synset id stands for itself, anything else for the synsets of the literal
+    if value in wordnet._synsets:
+        return [value]
+    return wordnet.synsets(value, strict=True)
+
+
+def _lookup(wordnet, options, literal, pos=None):
+    synsets_id = _workers._synsets(wordnet, literal, pos or options['pos'], options['strict'])
+    if options['records']:
+        return [synset_to_record(wordnet.synset(synset_id)) for synset_id in synsets_id]
+    return synsets_id
+
+
+def _similarity(wordnet, options, synset_id1, synset_id2):
+    # the similarity of two synsets; for a literal, the highest similarity of any of its synsets
+    similarity = getattr(wordnet, options['metric'] + "_similarity")
+    best = None
+    for synset_id1_ in _synsets_of(wordnet, synset_id1):
+        for synset_id2_ in _synsets_of(wordnet, synset_id2):
+            value = similarity(synset_id1_, synset_id2_, options['simulate_root'])
+            if value is not None and (best is None or value > best):
+                best = value
+    return best
+
+
+def _paths(wordnet, options, synset_id1, synset_id2):
+    try:
+        return wordnet.shortest_path(synset_id1, synset_id2, options['relations'])
+    except nx.NetworkXNoPath:
+        return None
+
+
+def _expand(wordnet, options, synset_id):
+    # the synsets reached from the synset (or from the synsets of a literal) by at most 'depth' relations, breadth first
+    relations = options['relations']
+    reached = dict.fromkeys(_synsets_of(wordnet, synset_id))
+    fringe = list(reached)
+    for _ in range(options['depth']):
+        next_fringe = []
+        for fringe_synset_id in fringe:
+            for adj_synset_id, relation in wordnet._outbound(fringe_synset_id):
+                if adj_synset_id not in reached and (relations is None or relation in relations):
+                    reached[adj_synset_id] = None
+                    next_fringe.append(adj_synset_id)
+        fringe = next_fringe
+
+    if options['literals']:
+        return list(dict.fromkeys(literal for reached_synset_id in reached
+                                  for literal in wordnet.synset(reached_synset_id).literals))
+    return list(reached)
+
+
+# the function of each command, the names of its input fields (which are also the TSV columns) and how many of them
+# are required
+commands = {
+    'lookup': (_lookup, ('literal', 'pos'), 1),
+    'similarity': (_similarity, ('synset_id1', 'synset_id2'), 2),
+    'paths': (_paths, ('synset_id1', 'synset_id2'), 2),
+    'expand': (_expand, ('synset_id',), 1),
+}
+
+
+def _tsv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def run_lines(wordnet, command: str, options: dict, input_format: str, lines: list):
+    """
+        Run a command on lines of input. A JSONL line is an object with the input fields of the command, and gets
+        back the same object with a "result" (or an "error" with its "type" and "message"). A TSV line has the input
+        fields as its columns, and gets back its columns followed by the result and the error message, if any.
+        Args:
+            wordnet (RoWordNet): The wordnet.
+            command (str): The name of the command, one of the keys of commands.
+            options (dict): The options of the command, see main.
+            input_format (str): "jsonl" or "tsv".
+            lines (list of str): The input lines, without line endings.
+        Returns:
+            tuple: The output lines, in the same order, and the number of lines that gave an error.
+    """
+
+    function, names, required = commands[command]
+    output, errors = [], 0
+    for line in lines:
+        record, result, error = None, None, None
+        try:
+            if input_format == "jsonl":
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("A line must be a JSON object")
+                fields = {name: record[name] for name in names if name in record}
+            else:
+                fields = dict(zip(names, line.split("\t")))
+            for name in names[:required]:
+                if name not in fields:
+                    raise ValueError("Missing field '{}'".format(name))
+            result = function(wordnet, options, **fields)
+        except Exception as e:
+            error = {'type': type(e).__name__, 'message': str(e)}
+            errors += 1
+
+        if input_format == "jsonl":
+            response = dict(record) if isinstance(record, dict) else {'line': line}
+            if error is None:
+                response['result'] = result
+            else:
+                response['error'] = error
+            output.append(json.dumps(response, ensure_ascii=False))
+        else:
+            output.append("\t".join((line, _tsv_value(result),
+                                     "" if error is None else "{}: {}".format(error['type'], error['message']))))
+    return output, errors
+
+
+def _chunks(lines, chunk_size: int):
+    lines = (line.rstrip("\r\n") for line in lines)
+    lines = (line for line in lines if line.strip())
+    while True:
+        chunk = list(itertools.islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _run_ordered(pool, function, chunks, pending: deque, max_pending: int):
+    # submit the chunks to the pool, at most max_pending at a time, and yield their results in the order of the chunks.
+    # The calls not done yet are kept in pending, so that they can be cancelled if the results are not all read.
+    for chunk in chunks:
+        pending.append(pool.submit(_workers.run, functools.partial(function, lines=chunk)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class _Progress(object):
+    # the number of lines done and the throughput, written to stderr every interval seconds and at the end
+    def __init__(self, command: str, interval: float, quiet: bool):
+        self._command = command
+        self._interval = interval
+        self._quiet = quiet
+        self._start = self._last = time.perf_counter()
+        self.lines = 0
+        self.errors = 0
+
+    def update(self, lines: int, errors: int):
+        self.lines += lines
+        self.errors += errors
+        now = time.perf_counter()
+        if now - self._last >= self._interval:
+            self._last = now
+            self._report(now, "")
+
+    def done(self):
+        self._report(time.perf_counter(), ", done")
+
+    def _report(self, now: float, suffix: str):
+        if self._quiet:
+            return
+        elapsed = now - self._start
+        print("rowordnet {}: {} lines, {} errors, {:.1f}s, {:.0f} lines/s{}".format(
+            self._command, self.lines, self.errors, elapsed, self.lines / elapsed if elapsed > 0 else 0, suffix),
+            file=sys.stderr, flush=True)
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog="rowordnet",
+                                     description="Run wordnet lookups, similarities, paths and expansions over JSONL "
+                                                 "or TSV input, in parallel, with the output in the order of the "
+                                                 "input.")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("input", nargs="?", default="-", help="input file, - for stdin (default)")
+    common.add_argument("-o", "--output", default="-", help="output file, - for stdout (default)")
+    common.add_argument("--format", choices=("jsonl", "tsv"),
+                        help="input and output format (default: tsv for a .tsv input file, jsonl otherwise)")
+    common.add_argument("--filename", help="wordnet file to load, the bundled wordnet if missing")
+    common.add_argument("--xml", action="store_true", help="load the wordnet from an xml file")
+    common.add_argument("-p", "--processes", type=int, default=os.cpu_count() or 1,
+                        help="worker processes, 1 to run in this process (default: the number of CPUs)")
+    common.add_argument("--chunk-size", type=int, default=1000, help="lines sent to a worker at a time (default: 1000)")
+    common.add_argument("--progress", type=float, default=10,
+                        help="seconds between two throughput reports on stderr (default: 10)")
+    common.add_argument("-q", "--quiet", action="store_true", help="don't report the throughput")
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    lookup = subparsers.add_parser("lookup", parents=[common], help="the synsets of literals",
+                                   description="Fields: literal, pos (optional, i.e. n). Result: the "
+                                               "synset ids.")
+    lookup.add_argument("--pos", choices=sorted(_chr2pos), help="only the synsets with this pos")
+    lookup.add_argument("--strict", action="store_true", help="exact matches only, see RoWordNet.synsets")
+    lookup.add_argument("--records", action="store_true", help="give the synset records instead of their ids")
+
+    similarity = subparsers.add_parser("similarity", parents=[common], help="similarity of synset or literal pairs",
+                                       description="Fields: synset_id1, synset_id2; a value that's not a synset id is "
+                                                   "a literal, scored by its most similar synset. Result: the "
+                                                   "similarity, null if there's none.")
+    similarity.add_argument("--metric", choices=("path", "wup", "lch"), default="wup", help="default: wup")
+    similarity.add_argument("--no-simulate-root", dest="simulate_root", action="store_false",
+                            help="no virtual root for synsets without a common root")
+
+    paths = subparsers.add_parser("paths", parents=[common], help="shortest paths between synsets",
+                                  description="Fields: synset_id1, synset_id2. Result: the synset ids of the shortest "
+                                              "path, null if there's none.")
+    paths.add_argument("--hypernyms", action="store_true", help="follow only the hypernym and hyponym relations")
+
+    expand = subparsers.add_parser("expand", parents=[common], help="the synsets related to synsets or literals",
+                                   description="Fields: synset_id (or a literal). Result: the synset ids reached by at "
+                                               "most --depth relations, breadth first.")
+    expand.add_argument("--depth", type=int, default=1, help="default: 1")
+    expand.add_argument("--relations", help="comma separated relations to follow (default: all)")
+    expand.add_argument("--literals", action="store_true", help="give the literals of the synsets instead of their ids")
+
+    return parser
+
+
+def _options(args):
+    # the options of the command, as a picklable dict
+    if args.command == 'lookup':
+        return {'pos': args.pos, 'strict': args.strict, 'records': args.records}
+    if args.command == 'similarity':
+        return {'metric': args.metric, 'simulate_root': args.simulate_root}
+    if args.command == 'paths':
+        return {'relations': {"hypernym", "hyponym"} if args.hypernyms else None}
+    return {'depth': args.depth, 'literals': args.literals,
+            'relations': set(args.relations.split(",")) if args.relations else None}
+
+
+def _open(filename: str, mode: str):
+    if filename == "-":
+        stream = sys.stdin if mode == "r" else sys.stdout
+        if hasattr(stream, "reconfigure"):
+            stream.reconfigure(encoding="utf-8")
+        return stream
+    return open(filename, mode, encoding="utf-8")
+
+
+def main(argv=None):
+    """
+        The rowordnet command:
+
+            rowordnet similarity pairs.tsv --metric wup -p 8 > scores.tsv
+            cat words.jsonl | rowordnet lookup --pos n
+
+        The input is read in chunks of lines that are run by a pool of worker processes, which read the wordnet from
+        shared memory (see RoWordNet.publish). The output lines come in the order of the input lines. See run_lines for
+        the formats.
+    """
+
+    args = _parser().parse_args(argv)
+    input_format = args.format or ("tsv" if args.input.endswith(".tsv") else "jsonl")
+    function = functools.partial(run_lines, command=args.command, options=_options(args), input_format=input_format)
+
+    source, target = _open(args.input, "r"), _open(args.output, "w")
+    wordnet = RoWordNet(args.filename, xml=args.xml)
+    block, pool, pending = None, None, deque()
+    try:
+        if args.processes > 1:
+            try:
+                block = wordnet.publish()
+            except ImportError:  # no shared memory before python 3.8, each worker gets its own copy of the wordnet
+                pass
+            else:
+                wordnet = RoWordNet.attach(block.name)
+            pool = _workers.worker_pool(wordnet, args.processes)
+
+        progress = _Progress(args.command, args.progress, args.quiet)
+        chunks = _chunks(source, args.chunk_size)
+        if pool is None:
+            results = (function(wordnet, lines=chunk) for chunk in chunks)
+        else:
+            results = _run_ordered(pool, function, chunks, pending, 2 * args.processes)
+        for output, errors in results:
+            target.write("\n".join(output) + "\n")
+            progress.update(len(output), errors)
+        target.flush()
+        progress.done()
+    except BrokenPipeError:  # i.e. piped to head
+        pass
+    finally:
+        if pool is not None:
+            _workers.shutdown_pool(pool, pending)
+        if block is not None:
+            wordnet.close()
+            block.close()
+            block.unlink()
+        for stream in (source, target):
+            if stream is not sys.stdin and stream is not sys.stdout:
+                stream.close()
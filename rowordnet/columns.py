@@ -0,0 +1,263 @@
+import json
+import mmap
+import struct
+from array import array
+from collections.abc import Sequence
+
+
+_magic = b"RWNCOLS1"
+_alignment = 8
+
+# name, array typecode and numpy dtype of the numeric columns
+_numeric_columns = [
+    ('pos', 'b', 'int8'),
+    ('sumotype', 'b', 'int8'),
+    ('domain', 'i', 'int32'),
+    ('sumo', 'i', 'int32'),
+    ('sentiwn', 'd', 'float64'),
+    ('literal_offsets', 'q', 'int64'),
+    ('literal_lengths', 'i', 'int32'),
+    ('fingerprints', 'B', 'uint8'),
+]
+_fingerprint_size = 16
+_string_columns = ['ids', 'literals', 'domains', 'sumos']
+
+
+def _encode_header(magic: bytes, buffers: list, fields: dict):
+    # the magic, the length of the JSON header and the header, which has the given fields and the offset of each
+    # (name, typecode, buffer) from the end of the header. The buffers follow it, each padded to the alignment.
+    layout = {}
+    offset = 0
+    for name, typecode, buffer in buffers:
+        layout[name] = {"typecode": typecode, "offset": offset, "nbytes": buffer.nbytes}
+        offset += -(-buffer.nbytes // _alignment) * _alignment
+
+    header = json.dumps(dict(fields, columns=layout)).encode("utf-8")
+    header += b" " * (-(len(magic) + 8 + len(header)) % _alignment)
+    return magic + struct.pack("<Q", len(header)) + header
+
+
+def _decode_header(magic: bytes, buffer):
+    # the header written by _encode_header and a typed view of each buffer that follows it, or None if the buffer
+    # doesn't start with the magic
+    if bytes(buffer[:len(magic)]) != magic:
+        return None
+    header_length, = struct.unpack_from("<Q", buffer, len(magic))
+    start = len(magic) + 8 + header_length
+    header = json.loads(bytes(buffer[len(magic) + 8:start]).decode("utf-8"))
+
+    view = memoryview(buffer)
+    raw = {name: view[start + entry["offset"]:start + entry["offset"] + entry["nbytes"]].cast(entry["typecode"])
+           for name, entry in header["columns"].items()}
+    return header, raw
+
+
+class StringColumn(Sequence):
+    def __init__(self, offsets, data):
+        """
+            A column of strings stored as utf-8 bytes back to back, with len(column) + 1 offsets into the bytes.
+
+            Args:
+                offsets (array or memoryview of int64): The start of each string, followed by the end of the last one.
+                data (bytes or memoryview): The utf-8 encoded strings.
+        """
+
+        self._offsets = offsets
+        self._data = data
+
+    @classmethod
+    def from_strings(cls, strings):
+        offsets = array('q', [0])
+        data = bytearray()
+        for string in strings:
+            data += string.encode("utf-8")
+            offsets.append(len(data))
+
+        return cls(offsets, bytes(data))
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("StringColumn index out of range")
+
+        return bytes(self._data[self._offsets[index]:self._offsets[index + 1]]).decode("utf-8")
+
+
+class SynsetColumns(object):
+    def __init__(self, columns: dict, buffer=None):
+        """
+            Struct-of-arrays view of the synsets of a wordnet, with one row per synset. Use RoWordNet.to_columns() to
+            build it and SynsetColumns.load() to read a saved one.
+
+            Numeric columns (array, memoryview or numpy array):
+                pos: the Synset.Pos value of each synset, -1 if it has none.
+                sumotype: the Synset.SumoType value of each synset, -1 if it has none.
+                domain: the index of the domain of each synset in 'domains', -1 if it has none.
+                sumo: the index of the sumo of each synset in 'sumos', -1 if it has none.
+                sentiwn: the P, N, O values of each synset, 3 values per row, NaN if the synset has none.
+                literal_offsets: the index of the first literal of each synset in 'literals'.
+                literal_lengths: the number of literals of each synset.
+                fingerprints: the 16-byte Synset.fingerprint of each synset, back to back.
+            String columns (sequences of str):
+                ids: the synset ids. The row number is the integer index of the synset.
+                literals: the literals of all synsets, in row order.
+                domains, sumos: the distinct domains and sumos.
+
+            Args:
+                columns (dict): The columns, by name.
+                buffer (mmap, optional): The mapped file the columns point to, if they were loaded from disk.
+        """
+
+        self._buffer = buffer
+        for name in _string_columns:
+            setattr(self, name, columns[name])
+        for name, _, _ in _numeric_columns:
+            setattr(self, name, columns[name])
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_synsets(cls, synsets):
+        columns = {name: array(typecode) for name, typecode, _ in _numeric_columns}
+        ids, literals = [], []
+        categories = {'domain': {}, 'sumo': {}}
+
+        for synset in synsets:
+            ids.append(synset.id)
+            columns['pos'].append(synset.pos.value if synset.pos is not None else -1)
+            columns['sumotype'].append(synset.sumotype.value if synset.sumotype is not None else -1)
+            for name in ('domain', 'sumo'):
+                value = getattr(synset, name)
+                codes = categories[name]
+                columns[name].append(-1 if value is None else codes.setdefault(value, len(codes)))
+            columns['sentiwn'].extend(synset.sentiwn if synset.sentiwn is not None else (float('nan'),) * 3)
+
+            synset_literals = synset.literals
+            columns['literal_offsets'].append(len(literals))
+            columns['literal_lengths'].append(len(synset_literals))
+            literals.extend(synset_literals)
+            columns['fingerprints'].frombytes(synset.fingerprint)
+
+        columns['ids'] = StringColumn.from_strings(ids)
+        columns['literals'] = StringColumn.from_strings(literals)
+        columns['domains'] = StringColumn.from_strings(categories['domain'])
+        columns['sumos'] = StringColumn.from_strings(categories['sumo'])
+
+        return cls(columns)
+
+    def fingerprint(self, row: int):
+        """
+            Get the fingerprint of the synset on a given row.
+            Args:
+                row (int): The row of the synset.
+            Returns:
+                bytes: The fingerprint of the synset.
+        """
+
+        return bytes(self.fingerprints[row * _fingerprint_size:(row + 1) * _fingerprint_size])
+
+    def changed_synsets(self, other):
+        """
+            Compare two versions of a wordnet by their fingerprints, without building any synset. Only the ids and the
+            fingerprint columns are read.
+            Args:
+                other (SynsetColumns): The columns of the other version of the wordnet.
+            Returns:
+                set of str: The ids of the synsets of the other version that are not in this version or have a
+                    different content.
+        """
+
+        fingerprints = {synset_id: self.fingerprint(row) for row, synset_id in enumerate(self.ids)}
+        return {synset_id for row, synset_id in enumerate(other.ids)
+                if fingerprints.get(synset_id) != other.fingerprint(row)}
+
+    def _buffers(self):
+        # (name, typecode, raw buffer) for everything that is written to disk
+        for name, typecode, _ in _numeric_columns:
+            yield name, typecode, memoryview(getattr(self, name)).cast('B')
+        for name in _string_columns:
+            column = getattr(self, name)
+            yield name + ".offsets", 'q', memoryview(column._offsets).cast('B')
+            yield name + ".data", 'B', memoryview(column._data).cast('B')
+
+    def save(self, filename: str):
+        """
+            Save the columns in a binary file. Every column is stored as a raw, 8-byte aligned buffer, so that the file
+            can be memory mapped by SynsetColumns.load.
+
+            Args:
+                filename (str): The file where the columns will be saved.
+            Raises:
+                TypeError: If any argument has incorrect type.
+        """
+
+        if not isinstance(filename, str):
+            raise TypeError("Argument 'filename' has incorrect type, expected str, got {}"
+                            .format(type(filename).__name__))
+
+        buffers = list(self._buffers())
+        with open(filename, "wb") as f:
+            f.write(_encode_header(_magic, buffers, {"rows": len(self)}))
+            for name, _, buffer in buffers:
+                f.write(buffer)
+                f.write(b"\0" * (-buffer.nbytes % _alignment))
+
+    @classmethod
+    def load(cls, filename: str):
+        """
+            Load columns saved with SynsetColumns.save. The file is memory mapped and the columns are views over it, so
+            nothing is copied until a value is read.
+
+            Args:
+                filename (str): The file to load from.
+            Returns:
+                SynsetColumns: The loaded columns.
+            Raises:
+                TypeError: If any argument has incorrect type.
+                ValueError: If the file is not a columns file.
+        """
+
+        if not isinstance(filename, str):
+            raise TypeError("Argument 'filename' has incorrect type, expected str, got {}"
+                            .format(type(filename).__name__))
+
+        with open(filename, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        layout = _decode_header(_magic, buffer)
+        if layout is None:
+            raise ValueError("File '{}' is not a RoWordNet columns file".format(filename))
+        _, raw = layout
+
+        columns = {name: raw[name] for name, _, _ in _numeric_columns}
+        for name in _string_columns:
+            columns[name] = StringColumn(raw[name + ".offsets"], raw[name + ".data"])
+
+        return cls(columns, buffer)
+
+    def numpy(self):
+        """
+            Get the numeric columns as numpy arrays. The arrays share memory with the columns (and with the mapped file
+            for loaded columns), nothing is copied. 'sentiwn' is returned as an N x 3 matrix and 'fingerprints' as an
+            N x 16 matrix.
+
+            Returns:
+                dict: The numpy arrays, by column name.
+            Raises:
+                ImportError: If numpy is not installed.
+        """
+
+        import numpy as np
+
+        arrays = {name: np.frombuffer(getattr(self, name), dtype=dtype) for name, _, dtype in _numeric_columns}
+        arrays['sentiwn'] = arrays['sentiwn'].reshape(-1, 3)
+        arrays['fingerprints'] = arrays['fingerprints'].reshape(-1, _fingerprint_size)
+
+        return arrays
@@ -331,19 +331,14 @@ def demo_create_and_edit_synsets():
     synset_id = wn.synsets()[0]
     synset = wn(synset_id)
     # add a literal to the synset
+    # the rowordnet is notified about the change and indexes the new literal
     synset.add_literal(literal, sense)
-    # tell the rowordnet that synsets's literals have been changed. This step is
-    # necessary for a correct internal representation.
-    wn.reindex_literals()
     print("\n\tAdded literal with literal '{}' and sense '{}' to the synset '{}'. "
           "Number of synsets containing literal '{}': {}"
           .format(literal, sense, synset.id, literal, len(wn.synsets(literal))))
 
     # remove the previous literal from synset.
     synset.remove_literal(literal)
-    # again, we have to tell the rowordnet that synset's literals have been
-    # changed.
-    wn.reindex_literals()
     print("\tRemoved literal with literal '{}' from the synset '{}'. Number of synsets containing literal '{}': {}"
           .format(literal, synset.id, literal, len(wn.synsets(literal))))
 
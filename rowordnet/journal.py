@@ -0,0 +1,107 @@
+import os
+import json
+
+from .exceptions import WordNetError
+
+
+_format = "rowordnet-journal"
+
+
+def _scan(filename: str):
+    # read the header and the complete records of a journal; a record is complete once its line ends with a newline,
+    # so a record torn by a crash is dropped together with anything after it
+    header, operations, end = None, [], 0
+    with open(filename, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line.decode("utf-8"))
+            except ValueError:
+                break
+            if header is None:
+                if not isinstance(record, dict) or record.get("format") != _format:
+                    raise WordNetError("File '{}' is not a RoWordNet journal".format(filename))
+                header = record
+            else:
+                operations.append(record)
+            end += len(line)
+
+    return header, operations, end
+
+
+class Journal(object):
+    def __init__(self, filename: str, generation: int, sync: bool = False):
+        """
+            Append-only file of the changes made to a wordnet since its last snapshot. Every change is written as one
+            patch operation per line (see rowordnet.patch) and flushed right away.
+            The header of the journal holds the generation of the snapshot it applies to. A journal of an older
+            generation was already folded into the snapshot, so it's emptied instead of replayed.
+
+            Args:
+                filename (str): The journal file. It's created if it doesn't exist.
+                generation (int): The generation of the wordnet snapshot the journal is opened for.
+                sync (bool, optional): Call fsync after every record, so that the records survive a power loss and
+                    not only a crash of the process. Defaults to False.
+            Raises:
+                WordNetError: If the file is not a journal or if it belongs to a newer snapshot.
+        """
+
+        self.filename = filename
+        self.sync = sync
+        self._file = None
+        self._operations = []
+
+        header, operations, end = _scan(filename) if os.path.exists(filename) else (None, [], 0)
+        if header is not None and header["generation"] > generation:
+            raise WordNetError("Journal '{}' belongs to a newer snapshot (generation {}, expected {})"
+                               .format(filename, header["generation"], generation))
+
+        if header is None or header["generation"] < generation:
+            self.reset(generation)
+        else:
+            self._operations = operations
+            self._file = open(filename, "r+b")
+            self._file.truncate(end)
+            self._file.seek(end)
+
+    def replay(self):
+        """
+            Get the operations that were in the journal when it was opened, once.
+            Returns:
+                list of dict: The operations, in the order they were written.
+        """
+
+        operations, self._operations = self._operations, []
+        return operations
+
+    def append(self, operation: dict):
+        """
+            Write an operation at the end of the journal.
+            Args:
+                operation (dict): The patch operation.
+        """
+
+        self._file.write(json.dumps(operation, ensure_ascii=False).encode("utf-8") + b"\n")
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+
+    def reset(self, generation: int):
+        """
+            Empty the journal and start a new generation.
+            Args:
+                generation (int): The generation of the snapshot the journal applies to from now on.
+        """
+
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.filename, "wb")
+        self._file.write(json.dumps({"format": _format, "generation": generation}).encode("utf-8") + b"\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,118 @@
+import sys
+import types
+import weakref
+from enum import Enum
+from array import array
+from collections import deque, defaultdict
+
+# objects that are not part of any structure even when they are reached from one: the global singletons, classes,
+# functions and modules, and the weak references of the synsets to their wordnets
+_skipped_types = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+                  weakref.ref, Enum)
+# the types that are measured without looking up their attributes
+_containers = frozenset((list, tuple, set, frozenset, deque))
+_dicts = frozenset((dict, defaultdict))
+_atoms = frozenset((str, bytes, bytearray, memoryview, int, float, complex, array))
+
+
+def _referents(obj):
+    # the objects held by an object that is not a builtin container: its attributes and its items, if it's a dict
+    if isinstance(obj, dict):
+        yield from obj
+        yield from obj.values()
+    dict_ = getattr(obj, '__dict__', None)
+    if isinstance(dict_, dict):
+        yield dict_
+    for cls in type(obj).__mro__:
+        slots = cls.__dict__.get('__slots__', ())
+        for slot in (slots,) if isinstance(slots, str) else slots:
+            if slot not in ('__dict__', '__weakref__') and hasattr(obj, slot):
+                yield getattr(obj, slot)
+
+
+def memory_report(structures: dict):
+    """
+        Measure the given structures deeply, following the containers and the attributes of the objects. An object
+        held by several structures is counted in each of them, and once in the total.
+        Args:
+            structures (dict): The root object of each structure, by name.
+        Returns:
+            dict: A dict with 'structures', that maps the name of each structure to a dict with its number of
+                'objects', their 'bytes', the 'buffer_bytes' read through memoryviews (i.e. in shared memory), its
+                'strings' and their 'string_bytes', the 'shared_strings' that another structure holds too and the
+                'unique_bytes' of the objects that no other structure holds, and 'total', with the same counts for the
+                whole wordnet plus the 'duplicate_strings' (equal to another string object) and their
+                'duplicate_string_bytes', which interning them would save.
+    """
+
+    getsizeof = sys.getsizeof
+    sizes = {}
+    owners = {}  # the name of the structure that holds an object, or None if several structures hold it
+    strings = {}
+    buffer_bytes = 0
+    report = {}
+    for name, root in structures.items():
+        counts = report[name] = dict.fromkeys(('objects', 'bytes', 'buffer_bytes', 'strings', 'string_bytes',
+                                               'shared_strings', 'unique_bytes'), 0)
+        seen = set()
+        stack = [root]
+        while stack:
+            obj = stack.pop()
+            type_ = type(obj)
+            if obj is None or type_ is bool:
+                continue
+            key = id(obj)
+            if key in seen:
+                continue
+            seen.add(key)
+            if type_ not in _atoms and type_ not in _dicts and type_ not in _containers and \
+                    isinstance(obj, _skipped_types):
+                continue
+
+            size = sizes.get(key)
+            if size is None:
+                size = sizes[key] = getsizeof(obj)
+                owners[key] = name
+                if type_ is str:
+                    strings[key] = obj
+                elif type_ is memoryview:
+                    buffer_bytes += obj.nbytes
+            elif owners[key] != name:
+                owners[key] = None
+            counts['objects'] += 1
+            counts['bytes'] += size
+
+            if type_ is str:
+                counts['strings'] += 1
+                counts['string_bytes'] += size
+            elif type_ in _dicts:
+                stack.extend(obj)
+                stack.extend(obj.values())
+            elif type_ in _containers:
+                stack.extend(obj)
+            elif type_ is memoryview:
+                counts['buffer_bytes'] += obj.nbytes
+            elif type_ not in _atoms:
+                stack.extend(_referents(obj))
+        report[name] = (counts, seen)
+
+    for name, (counts, seen) in report.items():
+        for key in seen:
+            owner = owners.get(key, name)
+            if owner == name:
+                counts['unique_bytes'] += sizes.get(key, 0)
+            elif owner is None and key in strings:
+                counts['shared_strings'] += 1
+        report[name] = counts
+
+    total = {'objects': len(sizes), 'bytes': sum(sizes.values()), 'buffer_bytes': buffer_bytes,
+             'strings': len(strings), 'string_bytes': sum(sizes[key] for key in strings),
+             'duplicate_strings': 0, 'duplicate_string_bytes': 0}
+    values = set()
+    for key, string in strings.items():
+        if string in values:
+            total['duplicate_strings'] += 1
+            total['duplicate_string_bytes'] += sizes[key]
+        else:
+            values.add(string)
+    return {'structures': report, 'total': total}
@@ -0,0 +1,352 @@
+import copy
+import pickle
+from collections.abc import MutableMapping
+
+from .rowordnet import RoWordNet
+from .exceptions import WordNetError
+
+
+class _LayeredSynsets(MutableMapping):
+    # the synsets of an overlay: the ones of the base wordnet, minus the shadowed ones (deleted or replaced in the
+    # overlay), plus the local ones. Iterates in the order of the base, followed by the synsets new to the overlay.
+    def __init__(self, base: MutableMapping):
+        self.base = base
+        self.local = {}
+        self.shadowed = set()
+
+    def __getitem__(self, synset_id):
+        synset = self.local.get(synset_id)
+        if synset is not None:
+            return synset
+        if synset_id in self.shadowed:
+            raise KeyError(synset_id)
+        return self.base[synset_id]
+
+    def __contains__(self, synset_id):
+        if synset_id in self.local:
+            return True
+        return synset_id not in self.shadowed and synset_id in self.base
+
+    def __setitem__(self, synset_id, synset):
+        if synset_id in self.base:
+            self.shadowed.add(synset_id)
+        self.local[synset_id] = synset
+
+    def __delitem__(self, synset_id):
+        if synset_id in self.local:
+            del self.local[synset_id]
+        elif synset_id in self.shadowed or synset_id not in self.base:
+            raise KeyError(synset_id)
+        if synset_id in self.base:
+            self.shadowed.add(synset_id)
+
+    def __iter__(self):
+        local, shadowed = self.local, self.shadowed
+        for synset_id in self.base:
+            if synset_id not in shadowed or synset_id in local:
+                yield synset_id
+        for synset_id in local:
+            if synset_id not in shadowed:
+                yield synset_id
+
+    def __len__(self):
+        return len(self.base) - len(self.shadowed) + len(self.local)
+
+
+class RoWordNetOverlay(RoWordNet):
+    def __init__(self, base: RoWordNet):
+        """
+            A copy-on-write view of a wordnet: it reads everything from the base wordnet and keeps its own edits (new,
+            changed and removed synsets and relations) on the side, so creating one costs next to nothing no matter how
+            big the base is. Every overlay of the same base is independent of the others; discarding an overlay
+            discards its edits. Overlays can be stacked, i.e. the base of an overlay can be another overlay.
+            The synsets of the base are shared with the overlay: synset gives a copy of a synset of the base, and
+            changing that copy (or the one given by edit_synset) changes the synset in the overlay only. The base must
+            not be changed while it has overlays.
+
+            Args:
+                base (RoWordNet): The wordnet the overlay reads from.
+            Raises:
+                TypeError: If any argument has incorrect type.
+        """
+
+        if not isinstance(base, RoWordNet):
+            raise TypeError("Argument 'base' has incorrect type, expected RoWordNet, got {}"
+                            .format(type(base).__name__))
+
+        super().__init__(empty=True)
+        self._base = base
+        self._synsets = _LayeredSynsets(base._synsets)
+        self._relation_types = set(base._relation_types)
+        self._max_hypernym_height = base._max_hypernym_height
+        self._id_counters = dict(base._id_counters)
+        # the relations added in the overlay and the relations of the base removed from it, by source and by target
+        self._added = {}
+        self._added_pred = {}
+        self._removed = {}
+        self._removed_pred = {}
+        # the ids of the local synsets shared with the overlay this one was copied from, see _copy
+        self._shared = set()
+
+    def edit_synset(self, synset_id: str):
+        """
+            Get a synset that can be changed without changing the base wordnet. The first time a synset of the base is
+            edited, it's replaced in the overlay by a copy of it.
+            Args:
+                synset_id (str): Id of the synset.
+            Returns:
+                Synset: The synset of the overlay.
+            Raises:
+                TypeError: If any argument has incorrect type.
+                WordNetError: If there's no synset with the given id in the wordnet.
+        """
+
+        if not isinstance(synset_id, str):
+            raise TypeError("Argument 'synset_id' has incorrect type, expected str, got {}"
+                            .format(type(synset_id).__name__))
+        if synset_id not in self._synsets:
+            raise WordNetError("Synset with id '{}' is not in the wordnet".format(synset_id))
+
+        return self._writable_synset(synset_id)
+
+    def synset(self, synset_id: str):
+        """
+            Get a synset, given its id. A synset that was not edited in the overlay is given as a copy of the synset of
+            the base, so changing it can't change the base: the first change of the copy makes it the synset of the
+            overlay, like edit_synset does. Each call gives a new copy, so change the synset through a single one.
+            Args:
+                synset_id (str): The id of the synset.
+            Returns:
+                Synset: The synset with the desired id.
+            Raises:
+                TypeError: If any argument has incorrect type.
+                WordNetError: If there's no synset with the given id in the wordnet.
+        """
+
+        synset = super().synset(synset_id)
+        if synset_id in self._synsets.local and synset_id not in self._shared:
+            return synset
+
+        synset = copy.copy(synset)
+        synset._wordnets = self._refs
+        return synset
+
+    def _adopt_synset(self, synset):
+        # a copy given by synset was changed: it becomes the synset of the overlay, with the indexes of the overlay
+        # updated as for a synset given by edit_synset, unless an other copy was made the synset of the overlay first
+        synset_id = synset.id
+        if synset_id not in self._synsets or self._synsets[synset_id] is synset:
+            return
+        if synset_id in self._synsets.local and synset_id not in self._shared:
+            return
+        self._writable_synset(synset_id)
+        self._synsets.local[synset_id] = synset
+
+    def _synset_literals_replaced(self, synset, old_pairs: tuple, new_pairs: tuple):
+        self._adopt_synset(synset)
+        super()._synset_literals_replaced(synset, old_pairs, new_pairs)
+
+    def _synset_literals_senses_changed(self, synset, old_literals_senses: list):
+        self._adopt_synset(synset)
+        super()._synset_literals_senses_changed(synset, old_literals_senses)
+
+    def _synset_attribute_changed(self, synset, name: str, old_value, new_value):
+        self._adopt_synset(synset)
+        super()._synset_attribute_changed(synset, name, old_value, new_value)
+
+    def _writable_synset(self, synset_id: str):
+        synset = self._synsets.local.get(synset_id)
+        if synset is not None and synset_id not in self._shared:
+            return synset
+
+        if synset is None:
+            synset = copy.copy(self._synsets[synset_id])
+            self._synsets[synset_id] = synset
+            self._index_literals((synset,))
+        else:
+            # the copy has the same literals as the shared synset, so the local indexes stay as they are
+            self._shared.discard(synset_id)
+            synset = copy.copy(synset)
+            self._synsets.local[synset_id] = synset
+        self._attach_synset(synset)
+        return synset
+
+    def _memory_structures(self):
+        # the edits of the overlay, the base is reported on its own. The hypernym relations are kept with the others.
+        return {
+            'graph': (self._added, self._added_pred, self._removed, self._removed_pred),
+            'hypernym_graph': None,
+            'synsets': (self._synsets.local, self._synsets.shadowed),
+            'literal2synset': self._literal2synset,
+            'literal2synset_strict': self._literal2synset_strict,
+            'sense2synset': self._sense2synset,
+            'indexes': (self._mwe_trie, self._definition_indexes, self._attribute_indexes, self._sentiwn_indexes),
+        }
+
+    def _copy(self):
+        # an overlay of the same base with the same edits, which can be edited without changing this one. The local
+        # synsets are shared until edit_synset copies them.
+        overlay = RoWordNetOverlay(self._base)
+        overlay._relation_types = set(self._relation_types)
+        overlay._max_hypernym_height = self._max_hypernym_height
+        overlay._id_counters = dict(self._id_counters)
+        overlay._synsets.local = dict(self._synsets.local)
+        overlay._synsets.shadowed = set(self._synsets.shadowed)
+        overlay._shared = set(self._synsets.local)
+        overlay._added = {synset_id: dict(added) for synset_id, added in self._added.items()}
+        overlay._added_pred = {synset_id: dict(added) for synset_id, added in self._added_pred.items()}
+        overlay._removed = {synset_id: set(removed) for synset_id, removed in self._removed.items()}
+        overlay._removed_pred = {synset_id: set(removed) for synset_id, removed in self._removed_pred.items()}
+        for name in ('_literal2synset', '_literal2synset_strict', '_sense2synset'):
+            index = getattr(overlay, name)
+            for key, synsets_id in getattr(self, name).items():
+                index[key] = list(synsets_id)
+        return overlay
+
+    def _changes(self):
+        # the size of the edits kept by the overlay
+        return len(self._synsets.local) + len(self._synsets.shadowed) + \
+            sum(len(removed) for removed in self._removed.values()) + sum(len(added) for added in self._added.values())
+
+    def reindex_literals(self):
+        """
+            Rebuild the literal and (literal, sense) indexes of the synsets added or edited in the overlay. The indexes
+            of the base are left as they are.
+        """
+
+        self._literal2synset.clear()
+        self._literal2synset_strict.clear()
+        self._sense2synset.clear()
+        self._mwe_trie = None
+        self._index_literals(self._synsets.local.values())
+
+    def load(self, filename: str, xml: bool = False, progress=None, format: str = None):
+        raise WordNetError("An overlay can't be loaded, load the base wordnet instead")
+
+    def _flatten(self):
+        # a plain wordnet with the base and the edits merged
+        wordnet = RoWordNet._from_parts(list(self._synsets.values()), self._relation_types, list(self._edges()))
+        wordnet._max_hypernym_height = self._max_hypernym_height
+        wordnet._id_counters = dict(self._id_counters)
+        wordnet._journal_generation = self._journal_generation
+        return wordnet
+
+    def _save_to_binary(self, filename: str):
+        with open(filename, "wb") as f:
+            pickle.dump(self._flatten(), f)
+
+    def memory_report(self):
+        report = super().memory_report()
+        report['base'] = self._base.memory_report()
+        return report
+
+    # storage accessors, see RoWordNet
+
+    def _lookup_literal(self, literal: str, strict: bool):
+        synsets_id = self._base._lookup_literal(literal, strict)
+        shadowed = self._synsets.shadowed
+        if len(shadowed) > 0:
+            synsets_id = [synset_id for synset_id in synsets_id if synset_id not in shadowed]
+        local_synsets_id = (self._literal2synset_strict if strict else self._literal2synset).get(literal)
+        if local_synsets_id:
+            synsets_id = list(synsets_id) + local_synsets_id
+        return synsets_id
+
+    def _lookup_senses(self, literal: str, sense: str):
+        synsets_id = self._base._lookup_senses(literal, sense)
+        shadowed = self._synsets.shadowed
+        if len(shadowed) > 0:
+            synsets_id = [synset_id for synset_id in synsets_id if synset_id not in shadowed]
+        local_synsets_id = self._sense2synset.get((literal, sense))
+        if local_synsets_id:
+            synsets_id = list(synsets_id) + local_synsets_id
+        return synsets_id
+
+    def _strict_literals(self):
+        literals = set(self._base._strict_literals())
+        for synset_id in self._synsets.shadowed:
+            for literal in self._base._synsets[synset_id].literals:
+                if len(self._lookup_literal(literal, True)) == 0:
+                    literals.discard(literal)
+        literals.update(self._literal2synset_strict.keys())
+        return literals
+
+    def _outbound(self, synset_id: str, hypernym: bool = False):
+        relations = self._base._outbound(synset_id, hypernym)
+        removed = self._removed.get(synset_id)
+        if removed is not None:
+            relations = [(adj_synset_id, relation) for adj_synset_id, relation in relations
+                         if adj_synset_id not in removed]
+        added = self._added.get(synset_id)
+        if added is not None:
+            relations = relations + [(adj_synset_id, relation) for adj_synset_id, relation in added.items()
+                                     if not hypernym or relation == "hypernym" or relation == "hyponym"]
+        return relations
+
+    def _inbound(self, synset_id: str, hypernym: bool = False):
+        relations = self._base._inbound(synset_id, hypernym)
+        removed = self._removed_pred.get(synset_id)
+        if removed is not None:
+            relations = [(adj_synset_id, relation) for adj_synset_id, relation in relations
+                         if adj_synset_id not in removed]
+        added = self._added_pred.get(synset_id)
+        if added is not None:
+            relations = relations + [(adj_synset_id, relation) for adj_synset_id, relation in added.items()
+                                     if not hypernym or relation == "hypernym" or relation == "hyponym"]
+        return relations
+
+    def _successors(self, synset_id: str, hypernym: bool = False):
+        if synset_id not in self._added and synset_id not in self._removed:
+            return self._base._successors(synset_id, hypernym)
+        return [adj_synset_id for adj_synset_id, _ in self._outbound(synset_id, hypernym)]
+
+    def _predecessors(self, synset_id: str, hypernym: bool = False):
+        if synset_id not in self._added_pred and synset_id not in self._removed_pred:
+            return self._base._predecessors(synset_id, hypernym)
+        return [adj_synset_id for adj_synset_id, _ in self._inbound(synset_id, hypernym)]
+
+    def _edge_label(self, synset_id1: str, synset_id2: str):
+        added = self._added.get(synset_id1)
+        if added is not None and synset_id2 in added:
+            return added[synset_id2]
+        if synset_id2 in self._removed.get(synset_id1, ()):
+            return None
+        return self._base._edge_label(synset_id1, synset_id2)
+
+    def _edges(self):
+        for synset_id in self._synsets:
+            for adj_synset_id, relation in self._outbound(synset_id):
+                yield synset_id, adj_synset_id, relation
+
+    def _add_nodes(self, synsets_id):
+        # the synsets of an overlay are its nodes, there's no graph to add them to
+        pass
+
+    def _remove_node(self, synset_id: str):
+        for adj_synset_id, _ in self._outbound(synset_id):
+            self._remove_edge(synset_id, adj_synset_id)
+        for adj_synset_id, _ in self._inbound(synset_id):
+            self._remove_edge(adj_synset_id, synset_id)
+
+    def _add_edge(self, synset_id1: str, synset_id2: str, relation: str):
+        self._added.setdefault(synset_id1, {})[synset_id2] = relation
+        self._added_pred.setdefault(synset_id2, {})[synset_id1] = relation
+
+    def _add_edges(self, relations: list):
+        for synset_id1, synset_id2, relation in relations:
+            self._add_edge(synset_id1, synset_id2, relation)
+
+    def _remove_edge(self, synset_id1: str, synset_id2: str):
+        added = self._added.get(synset_id1)
+        if added is None or synset_id2 not in added:
+            self._removed.setdefault(synset_id1, set()).add(synset_id2)
+            self._removed_pred.setdefault(synset_id2, set()).add(synset_id1)
+            return
+
+        del added[synset_id2]
+        if len(added) == 0:
+            del self._added[synset_id1]
+        added_pred = self._added_pred[synset_id2]
+        del added_pred[synset_id1]
+        if len(added_pred) == 0:
+            del self._added_pred[synset_id2]
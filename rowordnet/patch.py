@@ -0,0 +1,121 @@
+import json
+
+from .records import synset_to_record, record_fields
+
+
+_header = {"format": "rowordnet-patch", "version": 1}
+
+
+def _changed_fields(record_1: dict, record_2: dict):
+    fields = {name: record_2[name] for name in record_fields if record_1[name] != record_2[name]}
+    # the literals and their senses go together, so that the patch can reindex the (literal, sense) pairs
+    if 'literals' in fields or 'literals_senses' in fields:
+        fields['literals'] = record_2['literals']
+        fields['literals_senses'] = record_2['literals_senses']
+
+    return fields
+
+
+def diff(wordnet_1, wordnet_2):
+    """
+        Compute the patch that turns a wordnet into another one. The operations are generated one by one, in the order
+        they must be applied, so a patch can be written out while it's computed:
+
+            {"op": "add_relation_type", "relation": ...}
+            {"op": "remove_relation", "source": ..., "target": ..., "relation": ...}
+            {"op": "delete_synset", "id": ...}
+            {"op": "upsert_synset", "id": ..., "fields": {...}}
+            {"op": "add_relation", "source": ..., "target": ..., "relation": ...}
+
+        The fields of an upsert are encoded as in records.synset_to_record. A new synset gets all its fields, a changed
+        one only the fields that differ. The relations of a deleted synset are removed together with it.
+
+        Args:
+            wordnet_1 (RoWordNet): The wordnet the patch applies to.
+            wordnet_2 (RoWordNet): The wordnet the patch produces.
+        Yields:
+            dict: The operations of the patch.
+    """
+
+    synsets_1, synsets_2 = wordnet_1._synsets, wordnet_2._synsets
+
+    for relation in sorted(wordnet_2.relation_types - wordnet_1.relation_types):
+        yield {"op": "add_relation_type", "relation": relation}
+
+    for synset_id1, synset_id2, relation in wordnet_1._edges():
+        if synset_id1 not in synsets_2 or synset_id2 not in synsets_2:
+            continue
+        if wordnet_2._edge_label(synset_id1, synset_id2) != relation:
+            yield {"op": "remove_relation", "source": synset_id1, "target": synset_id2, "relation": relation}
+
+    for synset_id in synsets_1:
+        if synset_id not in synsets_2:
+            yield {"op": "delete_synset", "id": synset_id}
+
+    for synset_id, synset_2 in synsets_2.items():
+        synset_1 = synsets_1.get(synset_id)
+        if synset_1 is None:
+            record = synset_to_record(synset_2)
+            del record['id']
+            yield {"op": "upsert_synset", "id": synset_id, "fields": record}
+        elif synset_1.fingerprint != synset_2.fingerprint:
+            fields = _changed_fields(synset_to_record(synset_1), synset_to_record(synset_2))
+            yield {"op": "upsert_synset", "id": synset_id, "fields": fields}
+
+    for synset_id1, synset_id2, relation in wordnet_2._edges():
+        if synset_id1 not in synsets_1 or synset_id2 not in synsets_1 or \
+                wordnet_1._edge_label(synset_id1, synset_id2) != relation:
+            yield {"op": "add_relation", "source": synset_id1, "target": synset_id2, "relation": relation}
+
+
+def write_patch(operations, filename: str):
+    """
+        Write a patch as a JSON Lines file: a header line followed by one operation per line.
+        Args:
+            operations (iterable of dict): The operations, i.e. as generated by diff.
+            filename (str): The file where the patch will be written.
+        Returns:
+            int: The number of operations written.
+        Raises:
+            TypeError: If any argument has incorrect type.
+    """
+
+    if not isinstance(filename, str):
+        raise TypeError("Argument 'filename' has incorrect type, expected str, got {}".format(type(filename).__name__))
+
+    count = 0
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(json.dumps(_header) + "\n")
+        for operation in operations:
+            f.write(json.dumps(operation, ensure_ascii=False) + "\n")
+            count += 1
+
+    return count
+
+
+def read_patch(filename: str):
+    """
+        Read a patch written by write_patch, one operation at a time.
+        Args:
+            filename (str): The patch file.
+        Yields:
+            dict: The operations of the patch.
+        Raises:
+            TypeError: If any argument has incorrect type.
+            ValueError: If the file is not a patch file.
+    """
+
+    if not isinstance(filename, str):
+        raise TypeError("Argument 'filename' has incorrect type, expected str, got {}".format(type(filename).__name__))
+
+    with open(filename, "r", encoding="utf-8") as f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get("format") != _header["format"]:
+            raise ValueError("File '{}' is not a RoWordNet patch file".format(filename))
+
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,153 @@
+import time
+import math
+import inspect
+import functools
+import threading
+
+# the latency histograms have 4 buckets per power of two, from 1 microsecond up to about 1000 seconds; bucket i holds
+# the latencies up to 2 ** (i / 4) microseconds
+_buckets_per_octave = 4
+_buckets = 30 * _buckets_per_octave + 1
+
+# the methods that are never counted: the ones of the profiling itself
+_excluded = frozenset(('enable_profiling', 'disable_profiling', 'stats'))
+
+
+def _bucket(seconds: float):
+    microseconds = seconds * 1e6
+    if microseconds <= 1:
+        return 0
+    return min(_buckets - 1, math.ceil(math.log2(microseconds) * _buckets_per_octave))
+
+
+def _bucket_limit(bucket: int):
+    # in seconds
+    return 2 ** (bucket / _buckets_per_octave) / 1e6
+
+
+class _MethodStats(object):
+    __slots__ = ('calls', 'errors', 'total', 'max', 'histogram')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * _buckets
+
+    def percentile(self, q: float):
+        # the upper limit of the bucket that holds the q-th percentile, or the highest latency if that's lower
+        rank = q * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= rank:
+                return min(_bucket_limit(bucket), self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total': self.total,
+            'mean': self.total / self.calls if self.calls else 0.0,
+            'p50': self.percentile(0.5),
+            'p90': self.percentile(0.9),
+            'p99': self.percentile(0.99),
+            'max': self.max,
+        }
+
+
+class _Profile(object):
+    # the counters of a profiled wordnet; the methods of the wordnet are replaced by timing wrappers, set on the
+    # instance, and the lazily built indexes report whether they were built already (a hit) or had to be built (a miss)
+    def __init__(self, callback):
+        self.callback = callback
+        self.lock = threading.Lock()
+        self.methods = {}
+        self.caches = {}
+        self.wrapped = ()
+
+    def record(self, name: str, elapsed: float, error: bool):
+        with self.lock:
+            stats = self.methods.get(name)
+            if stats is None:
+                stats = self.methods[name] = _MethodStats()
+            stats.calls += 1
+            stats.errors += error
+            stats.total += elapsed
+            if elapsed > stats.max:
+                stats.max = elapsed
+            stats.histogram[_bucket(elapsed)] += 1
+        if self.callback is not None:
+            self.callback(name, elapsed, error)
+
+    def cache(self, name: str, hit: bool):
+        with self.lock:
+            counts = self.caches.get(name)
+            if counts is None:
+                counts = self.caches[name] = [0, 0]
+            counts[0 if hit else 1] += 1
+
+    def wrap(self, wordnet):
+        # set a timing wrapper for every public method of the wordnet's class on the wordnet itself, so that calls made
+        # by the wordnet's own methods (i.e. relations calling inbound_relations) are counted too
+        names = []
+        for cls in type(wordnet).__mro__:
+            for name, value in vars(cls).items():
+                # static methods and properties are not functions, so they're left alone
+                if name.startswith("_") or name in _excluded or name in names or not inspect.isfunction(value):
+                    continue
+                setattr(wordnet, name, self._wrapper(name, getattr(wordnet, name)))
+                names.append(name)
+        self.wrapped = tuple(names)
+
+    def unwrap(self, wordnet):
+        for name in self.wrapped:
+            wordnet.__dict__.pop(name, None)
+        self.wrapped = ()
+
+    def _wrapper(self, name: str, method):
+        record = self.record
+        perf_counter = time.perf_counter
+
+        if inspect.isgeneratorfunction(method):
+            # a generator (i.e. bfwalk) is timed until it's exhausted or closed
+            @functools.wraps(method)
+            def wrapper(*args, **kwargs):
+                start = perf_counter()
+                error = False
+                try:
+                    yield from method(*args, **kwargs)
+                except GeneratorExit:  # closed before the end, i.e. by islice
+                    raise
+                except BaseException:
+                    error = True
+                    raise
+                finally:
+                    record(name, perf_counter() - start, error)
+        else:
+            @functools.wraps(method)
+            def wrapper(*args, **kwargs):
+                start = perf_counter()
+                try:
+                    result = method(*args, **kwargs)
+                except BaseException:
+                    record(name, perf_counter() - start, True)
+                    raise
+                record(name, perf_counter() - start, False)
+                return result
+        return wrapper
+
+    def to_dict(self, reset: bool):
+        with self.lock:
+            stats = {
+                'methods': {name: stats.to_dict() for name, stats in sorted(self.methods.items())},
+                'caches': {name: {'hits': hits, 'misses': misses,
+                                  'hit_rate': hits / (hits + misses) if hits + misses else 0.0}
+                           for name, (hits, misses) in sorted(self.caches.items())},
+            }
+            if reset:
+                self.methods = {}
+                self.caches = {}
+        return stats
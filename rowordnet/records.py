@@ -0,0 +1,64 @@
+from .synset import Synset
+
+
+# the codes used for pos and sumotype are the same as in the xml format
+_chr2pos = {str(pos): pos for pos in Synset.Pos}
+_chr2sumotype = {str(sumotype): sumotype for sumotype in Synset.SumoType}
+
+# the fields of a record besides 'id', in the order of the Synset constructor arguments
+record_fields = ('pos', 'nonlexicalized', 'definition', 'stamp', 'sentiwn', 'domain', 'sumo', 'sumotype', 'literals',
+                 'literals_senses')
+
+
+def synset_to_record(synset: Synset):
+    """
+        Convert a synset to a JSON-serializable dict.
+        Args:
+            synset (Synset): The synset.
+        Returns:
+            dict: The record of the synset, with the 'id' key and one key for each field in record_fields.
+    """
+
+    return {
+        'id': synset.id,
+        'pos': str(synset.pos) if synset.pos is not None else None,
+        'nonlexicalized': synset.nonlexicalized,
+        'definition': synset.definition,
+        'stamp': synset.stamp,
+        'sentiwn': synset.sentiwn,
+        'domain': synset.domain,
+        'sumo': synset.sumo,
+        'sumotype': str(synset.sumotype) if synset.sumotype is not None else None,
+        'literals': synset.literals,
+        'literals_senses': synset.literals_senses,
+    }
+
+
+def record_to_fields(record: dict):
+    """
+        Decode the fields of a (possibly partial) record into Synset constructor arguments.
+        Args:
+            record (dict): The record. Keys that are not in record_fields (i.e. 'id') are ignored.
+        Returns:
+            dict: The decoded fields, by Synset constructor argument name.
+    """
+
+    fields = {name: record[name] for name in record_fields if name in record}
+    if fields.get('pos') is not None:
+        fields['pos'] = _chr2pos[fields['pos']]
+    if fields.get('sumotype') is not None:
+        fields['sumotype'] = _chr2sumotype[fields['sumotype']]
+
+    return fields
+
+
+def synset_from_record(record: dict):
+    """
+        Build a synset from its record.
+        Args:
+            record (dict): The record, as returned by synset_to_record.
+        Returns:
+            Synset: The synset.
+    """
+
+    return Synset(record['id'], **record_to_fields(record))
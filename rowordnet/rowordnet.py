@@ -1,18 +1,180 @@
+import gc
+import os
+import json
+import time
 import pickle
 import networkx as nx
 import lxml.etree as et
-from collections import defaultdict
+from collections import defaultdict, deque
+from contextlib import contextmanager
 from queue import Queue
 import math
+import weakref
+from bisect import bisect_left, bisect_right
+from array import array
 
 from .synset import Synset
 from .exceptions import WordNetError
+from .textindex import DefinitionIndex
+from .columns import SynsetColumns
+from .records import synset_to_record, record_to_fields
+from .patch import read_patch
+from .journal import Journal
+
+
+# the root synset of the noun hypernym tree ('entitate') of a full wordnet
+_root_id = "ENG30-00002684-n"
+
+
+@contextmanager
+def _gc_paused():
+    # building the wordnet structures allocates millions of small containers, which would otherwise trigger lots of
+    # useless full garbage collections
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _bidirectional_shortest_path(source: str, target: str, successors, predecessors):
+    # the bidirectional breadth-first search of networkx.shortest_path, over the successors and predecessors functions
+    # of a storage instead of a networkx graph. The fringes are expanded in the same order, so the same path is found.
+    if source == target:
+        return [source]
+
+    pred, succ = {source: None}, {target: None}
+    forward_fringe, reverse_fringe = [source], [target]
+    meeting_synset_id = None
+
+    while forward_fringe and reverse_fringe and meeting_synset_id is None:
+        if len(forward_fringe) <= len(reverse_fringe):
+            this_level, forward_fringe = forward_fringe, []
+            for synset_id in this_level:
+                for adj_synset_id in successors(synset_id):
+                    if adj_synset_id not in pred:
+                        forward_fringe.append(adj_synset_id)
+                        pred[adj_synset_id] = synset_id
+                    if adj_synset_id in succ:
+                        meeting_synset_id = adj_synset_id
+                        break
+                if meeting_synset_id is not None:
+                    break
+        else:
+            this_level, reverse_fringe = reverse_fringe, []
+            for synset_id in this_level:
+                for adj_synset_id in predecessors(synset_id):
+                    if adj_synset_id not in succ:
+                        succ[adj_synset_id] = synset_id
+                        reverse_fringe.append(adj_synset_id)
+                    if adj_synset_id in pred:
+                        meeting_synset_id = adj_synset_id
+                        break
+                if meeting_synset_id is not None:
+                    break
+
+    if meeting_synset_id is None:
+        raise nx.NetworkXNoPath("No path between {} and {}.".format(source, target))
+
+    path = []
+    synset_id = meeting_synset_id
+    while synset_id is not None:
+        path.append(synset_id)
+        synset_id = pred[synset_id]
+    path.reverse()
+    synset_id = succ[meeting_synset_id]
+    while synset_id is not None:
+        path.append(synset_id)
+        synset_id = succ[synset_id]
+
+    return path
+
+
+def _file_format(xml: bool, format: str, formats: tuple):
+    # the format of a file to load or save: format if it's given, else binary or xml as xml says
+    if not isinstance(format, str) and format is not None:
+        raise TypeError("Argument 'format' has incorrect type, expected str, got {}".format(type(format).__name__))
+    if format is None:
+        format = "xml" if xml else "binary"
+    if format not in formats:
+        raise ValueError("Argument 'format' must be {} or '{}', got '{}'"
+                         .format(", ".join("'{}'".format(name) for name in formats[:-1]), formats[-1], format))
+    return format
+
+
+def _synset_id_number(synset_id: str, prefix: str, suffix: str):
+    # the number in the middle of an id like '<prefix>00012345<suffix>', None if the id doesn't have this form
+    if len(synset_id) <= len(prefix) + len(suffix) or not synset_id.startswith(prefix) or \
+            not synset_id.endswith(suffix):
+        return None
+    number = synset_id[len(prefix):len(synset_id) - len(suffix)]
+    return int(number) if number.isdigit() else None
+
+
+class _Batch(object):
+    # the changes buffered inside RoWordNet.batch, applied all at once when the batch ends
+    def __init__(self):
+        self.relation_types = []
+        self.synsets = []
+        self.relations = []
+
+
+class _LoadPhases(object):
+    # the time of each phase of a load, see RoWordNet.load_profile, and the progress reports of the phases. A phase
+    # reports (phase, 0, total) when it starts, (phase, done, total) as it goes and (phase, total, total) when it ends.
+    _chunk_size = 1 << 20
+
+    def __init__(self, progress):
+        self.progress = progress
+        self.times = {}
+        self._name = None
+        self._total = 0
+        self._start = 0.0
+
+    def start(self, name: str, total: int):
+        self.end()
+        self._name, self._total, self._start = name, total, time.perf_counter()
+        if self.progress is not None:
+            self.progress(name, 0, total)
+
+    def update(self, done: int):
+        if self.progress is not None:
+            self.progress(self._name, done, self._total)
+
+    def end(self):
+        if self._name is None:
+            return
+        self.times[self._name] = self.times.get(self._name, 0.0) + time.perf_counter() - self._start
+        if self.progress is not None:
+            self.progress(self._name, self._total, self._total)
+        self._name = None
+
+    def read(self, filename: str):
+        # the content of the file, read in chunks to report the progress, as the 'read' phase
+        self.start('read', os.path.getsize(filename))
+        chunks = []
+        done = 0
+        with open(filename, "rb") as f:
+            while True:
+                chunk = f.read(self._chunk_size)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                done += len(chunk)
+                self.update(done)
+        return b"".join(chunks)
 
 
 class RoWordNet(object):
-    def __init__(self, filename: str = None, empty: bool = False, xml: bool = False):
+    # the counters of enable_profiling, None while profiling is off
+    _profile = None
+
+    def __init__(self, filename: str = None, empty: bool = False, xml: bool = False, progress=None,
+                 format: str = None):
         """
-            Initialize a wordnet object.
+            Initialize a wordnet object. The time taken by each phase of the load is kept in load_profile.
 
             Args:
                 filename (str, optional): File to load from. If filename==None, load from internal resources. Defaults
@@ -21,8 +183,14 @@ class RoWordNet(object):
                     editing purposes, etc.) . Defaults to False.
                 xml (bool, optional): If set to True the wordnet will be loaded from an xml file. If set to False the
                     wordnet will be loaded from a binary file.
+                progress (callable, optional): Called with the name of the phase, the work done and the total work of
+                    the phase (bytes for reading or streaming the file, synsets for the others) when a phase starts, as
+                    it goes and when it ends. Defaults to None.
+                format (str, optional): The format of the file: "binary", "xml" or "jsonl" (see save). Overrides xml if
+                    given. Defaults to None.
             Raises:
                 TypeError: If any argument has incorrect type.
+                ValueError: If the format is not known.
         """
 
         if not isinstance(filename, str) and filename is not None:
@@ -32,31 +200,362 @@ class RoWordNet(object):
             raise TypeError("Argument 'empty' has incorrect type, expected bool, got {}".format(type(empty).__name__))
         if not isinstance(xml, bool):
             raise TypeError("Argument 'xml' has incorrect type, expected bool, got {}".format(type(xml).__name__))
+        if progress is not None and not callable(progress):
+            raise TypeError("Argument 'progress' has incorrect type, expected callable, got {}"
+                            .format(type(progress).__name__))
+        format = _file_format(xml, format, ("binary", "xml", "jsonl"))
 
+        self._journal = None
+        self._batch = None
         self._clean()
         if empty:
             return
 
-        if filename is None:
-            import pkg_resources
-            path = "rowordnet.pickle"  # always use slash
-            filepath = pkg_resources.resource_filename(__name__, path)
-            self._load_from_binary(filepath)
-        else:
-            if xml is True:
-                self._load_from_xml(filename)
+        phases = _LoadPhases(progress)
+        with _gc_paused():
+            if filename is None:
+                import pkg_resources
+                path = "rowordnet.pickle"  # always use slash
+                filepath = pkg_resources.resource_filename(__name__, path)
+                self._load_from_binary(filepath, phases)
             else:
-                self._load_from_binary(filename)
+                self._load_file(filename, format, phases)
 
-        self._max_hypernym_height = self._hypernym_tree_height("ENG30-00002684-n")
+            phases.start('hypernym_height', 1)
+            self._max_hypernym_height = self._hypernym_height()
+            phases.end()
+        self.load_profile = phases.times
 
     def _clean(self):
         self._graph = nx.DiGraph()
         self._hypernym_graph = nx.DiGraph()
         self._synsets = {}
+        # the seconds taken by each phase of the last load, by name
+        self.load_profile = {}
         self._literal2synset = defaultdict(list)
         self._literal2synset_strict = defaultdict(list)
+        self._sense2synset = defaultdict(list)
         self._relation_types = set()
+        self._mwe_trie = None
+        self._definition_indexes = {}
+        self._attribute_indexes = None
+        self._sentiwn_indexes = None
+        # the height of the hypernym taxonomy, for lch_similarity; None until it's computed, see _hypernym_height
+        self._max_hypernym_height = None
+        # the generation of the snapshot, see compact_journal
+        self._journal_generation = 0
+        # the highest number used in an id, for each (prefix, suffix) asked for, see generate_synset_id
+        self._id_counters = {}
+        self._ref = weakref.ref(self)
+        self._refs = (self._ref,)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # the multi-word expression trie is rebuilt on demand, there's no point in saving it
+        state['_mwe_trie'] = None
+        del state['_ref']
+        del state['_refs']
+        del state['_journal']
+        del state['_batch']
+        # the profiling wrappers are bound to this wordnet, a copy starts without profiling
+        if self._profile is not None:
+            for name in self._profile.wrapped:
+                del state[name]
+            del state['_profile']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._journal = None
+        self._batch = None
+        self._ref = weakref.ref(self)
+        self._refs = (self._ref,)
+        for synset in self._synsets.values():
+            self._attach_synset(synset)
+
+    def _attach_synset(self, synset: Synset):
+        # the synset keeps weak references to the wordnets it belongs to and notifies them when its literals change
+        if len(synset._wordnets) == 0:
+            synset._wordnets = self._refs
+            return
+        wordnets = tuple(wordnet_ref for wordnet_ref in synset._wordnets if wordnet_ref() is not None)
+        if any(wordnet_ref() is self for wordnet_ref in wordnets):
+            return
+        synset._wordnets = wordnets + self._refs if wordnets else self._refs
+
+    def _detach_synset(self, synset: Synset):
+        synset._wordnets = tuple(wordnet_ref for wordnet_ref in synset._wordnets
+                                 if wordnet_ref() is not None and wordnet_ref() is not self)
+
+    def _index_literal(self, synset_id: str, literal: str):
+        self._literal2synset[literal].append(synset_id)
+        self._literal2synset_strict[literal].append(synset_id)
+        literal_parts = literal.split('_')
+        if len(literal_parts) > 1:  # add composing words for multi-word literals in non-strict index
+            for literal_part in literal_parts:
+                self._literal2synset[literal_part].append(synset_id)
+
+    def _index_literals(self, synsets):
+        # _index_literal and _index_sense for all the literals of many synsets, with the indexes bound once
+        literal2synset, literal2synset_strict = self._literal2synset, self._literal2synset_strict
+        sense2synset = self._sense2synset
+        for synset in synsets:
+            synset_id = synset.id
+            for literal, sense in zip(synset.literals, synset.literals_senses):
+                literal2synset[literal].append(synset_id)
+                literal2synset_strict[literal].append(synset_id)
+                sense2synset[(literal, sense)].append(synset_id)
+                if '_' in literal:
+                    for literal_part in literal.split('_'):
+                        literal2synset[literal_part].append(synset_id)
+
+    def _unindex_literal(self, synset_id: str, literal: str):
+        keys = [(self._literal2synset, literal), (self._literal2synset_strict, literal)]
+        literal_parts = literal.split('_')
+        if len(literal_parts) > 1:
+            keys.extend((self._literal2synset, literal_part) for literal_part in literal_parts)
+
+        for index, key in keys:
+            synsets_id = index.get(key)
+            if synsets_id is None or synset_id not in synsets_id:
+                continue
+            synsets_id.remove(synset_id)
+            if len(synsets_id) == 0:
+                del index[key]
+
+    def _index_sense(self, synset_id: str, literal: str, sense: str):
+        self._sense2synset[(literal, sense)].append(synset_id)
+
+    def _unindex_sense(self, synset_id: str, literal: str, sense: str):
+        synsets_id = self._sense2synset.get((literal, sense))
+        if synsets_id is None or synset_id not in synsets_id:
+            return
+        synsets_id.remove(synset_id)
+        if len(synsets_id) == 0:
+            del self._sense2synset[(literal, sense)]
+
+    def _reindex_senses(self):
+        self._sense2synset.clear()
+        for synset in self._synsets.values():
+            for literal, sense in zip(synset.literals, synset.literals_senses):
+                self._index_sense(synset.id, literal, sense)
+
+    def _log_synset_fields(self, synset: Synset, names: tuple):
+        record = synset_to_record(synset)
+        self._journal.append({"op": "upsert_synset", "id": synset.id, "fields": {name: record[name] for name in names}})
+
+    def _synset_literals_replaced(self, synset: Synset, old_pairs: tuple, new_pairs: tuple):
+        # a single notification for any change of the (literal, sense) pairs of a synset, however many literals it
+        # touches: the indexes are updated with the difference and the journal gets one record
+        if self._synsets.get(synset.id) is not synset:
+            return
+        if self._journal is not None:
+            self._log_synset_fields(synset, ('literals', 'literals_senses'))
+
+        old_set, new_set = set(old_pairs), set(new_pairs)
+        removed = [pair for pair in old_pairs if pair not in new_set]
+        added = [pair for pair in new_pairs if pair not in old_set]
+        for literal, sense in removed:
+            self._unindex_literal(synset.id, literal)
+            self._unindex_sense(synset.id, literal, sense)
+        for literal, sense in added:
+            self._index_literal(synset.id, literal)
+            self._index_sense(synset.id, literal, sense)
+        if any('_' in literal for literal, _ in removed) or any('_' in literal for literal, _ in added):
+            self._mwe_trie = None
+        self._definition_indexes.pop(True, None)
+
+    def _synset_literals_senses_changed(self, synset: Synset, old_literals_senses: list):
+        if self._synsets.get(synset.id) is not synset:
+            return
+        if self._journal is not None:
+            self._log_synset_fields(synset, ('literals_senses',))
+
+        for literal, sense in zip(synset.literals, old_literals_senses):
+            self._unindex_sense(synset.id, literal, sense)
+        for literal, sense in zip(synset.literals, synset.literals_senses):
+            self._index_sense(synset.id, literal, sense)
+
+    def _synset_attribute_changed(self, synset: Synset, name: str, old_value, new_value):
+        if self._synsets.get(synset.id) is not synset:
+            return
+        if self._journal is not None:
+            self._log_synset_fields(synset, (name,))
+
+        if name == 'definition':
+            self._definition_indexes.clear()
+        elif name == 'sentiwn':
+            self._sentiwn_indexes = None
+        elif self._attribute_indexes is not None and name in self._attribute_indexes:
+            attribute_index = self._attribute_indexes[name]
+            if old_value is not None:
+                synsets_id = attribute_index[old_value]
+                synsets_id.discard(synset.id)
+                if len(synsets_id) == 0:
+                    del attribute_index[old_value]
+            if new_value is not None:
+                attribute_index[new_value].add(synset.id)
+
+    _indexed_attributes = ('pos', 'domain', 'sumo', 'sumotype', 'stamp')
+
+    def _build_attribute_indexes(self):
+        # the indexes are published only once complete, for the readers of a snapshot that's shared between threads
+        attribute_indexes = {name: defaultdict(set) for name in self._indexed_attributes}
+        for synset in self._synsets.values():
+            for name, attribute_index in attribute_indexes.items():
+                value = getattr(synset, name)
+                if value is not None:
+                    attribute_index[value].add(synset.id)
+        self._attribute_indexes = attribute_indexes
+
+    def _index_attributes(self, synset: Synset):
+        for name, attribute_index in self._attribute_indexes.items():
+            value = getattr(synset, name)
+            if value is not None:
+                attribute_index[value].add(synset.id)
+
+    def _unindex_attributes(self, synset: Synset):
+        for name, attribute_index in self._attribute_indexes.items():
+            value = getattr(synset, name)
+            synsets_id = attribute_index.get(value)
+            if synsets_id is not None:
+                synsets_id.discard(synset.id)
+                if len(synsets_id) == 0:
+                    del attribute_index[value]
+
+    def _build_sentiwn_indexes(self):
+        # for each of the P, N and O values, the synset ids sorted by that value together with the sorted values
+        sentiwn_indexes = []
+        entries = [(synset.sentiwn, synset.id) for synset in self._synsets.values() if synset.sentiwn is not None]
+        for i in range(3):
+            entries.sort(key=lambda entry: entry[0][i])
+            sentiwn_indexes.append((array('d', (sentiwn[i] for sentiwn, _ in entries)),
+                                    [synset_id for _, synset_id in entries]))
+        self._sentiwn_indexes = sentiwn_indexes
+
+    # Storage accessors. The query and edit methods read and write the relations and the literal indexes only through
+    # these, so a different storage (see RoWordNetOverlay) only has to override them.
+
+    def _lookup_literal(self, literal: str, strict: bool):
+        index = self._literal2synset_strict if strict else self._literal2synset
+        return index.get(literal, [])
+
+    def _lookup_senses(self, literal: str, sense: str):
+        return self._sense2synset.get((literal, sense), [])
+
+    def _strict_literals(self):
+        return self._literal2synset_strict.keys()
+
+    def _outbound(self, synset_id: str, hypernym: bool = False):
+        graph = self._hypernym_graph if hypernym else self._graph
+        adj_synsets = graph._adj.get(synset_id)
+        if adj_synsets is None:
+            return []
+        return [(adj_synset_id, data['label']) for adj_synset_id, data in adj_synsets.items()]
+
+    def _inbound(self, synset_id: str, hypernym: bool = False):
+        graph = self._hypernym_graph if hypernym else self._graph
+        adj_synsets = graph._pred.get(synset_id)
+        if adj_synsets is None:
+            return []
+        return [(adj_synset_id, data['label']) for adj_synset_id, data in adj_synsets.items()]
+
+    def _successors(self, synset_id: str, hypernym: bool = False):
+        graph = self._hypernym_graph if hypernym else self._graph
+        return graph._adj.get(synset_id, ())
+
+    def _predecessors(self, synset_id: str, hypernym: bool = False):
+        graph = self._hypernym_graph if hypernym else self._graph
+        return graph._pred.get(synset_id, ())
+
+    def _edge_label(self, synset_id1: str, synset_id2: str):
+        data = self._graph._adj.get(synset_id1, {}).get(synset_id2)
+        return None if data is None else data['label']
+
+    def _shortest_path(self, synset_id1: str, synset_id2: str, hypernym: bool = False):
+        if not hypernym:
+            return _bidirectional_shortest_path(synset_id1, synset_id2, self._successors, self._predecessors)
+        return _bidirectional_shortest_path(synset_id1, synset_id2,
+                                            lambda synset_id: self._successors(synset_id, hypernym=True),
+                                            lambda synset_id: self._predecessors(synset_id, hypernym=True))
+
+    def _edges(self):
+        # all the relations as (synset_id1, synset_id2, relation), grouped by source synset
+        adj = self._graph._adj
+        for synset_id in self._synsets:
+            adj_synsets = adj.get(synset_id)
+            if adj_synsets is not None:
+                for adj_synset_id, data in adj_synsets.items():
+                    yield synset_id, adj_synset_id, data['label']
+
+    def _add_nodes(self, synsets_id):
+        self._graph.add_nodes_from(synsets_id)
+        self._hypernym_graph.add_nodes_from(synsets_id)
+
+    def _remove_node(self, synset_id: str):
+        for graph in (self._graph, self._hypernym_graph):
+            if graph.has_node(synset_id):
+                graph.remove_node(synset_id)
+
+    def _add_edge(self, synset_id1: str, synset_id2: str, relation: str):
+        self._graph.add_edge(synset_id1, synset_id2, label=relation)
+        if relation == "hypernym" or relation == "hyponym":
+            self._hypernym_graph.add_edge(synset_id1, synset_id2, label=relation)
+
+    def _add_edges(self, relations: list):
+        self._graph.add_edges_from((synset_id1, synset_id2, {'label': relation})
+                                   for synset_id1, synset_id2, relation in relations)
+        self._hypernym_graph.add_edges_from((synset_id1, synset_id2, {'label': relation})
+                                            for synset_id1, synset_id2, relation in relations
+                                            if relation == "hypernym" or relation == "hyponym")
+
+    def _remove_edge(self, synset_id1: str, synset_id2: str):
+        self._graph.remove_edge(synset_id1, synset_id2)
+        if self._hypernym_graph.has_edge(synset_id1, synset_id2):
+            self._hypernym_graph.remove_edge(synset_id1, synset_id2)
+
+    def _writable_synset(self, synset_id: str):
+        # the synset to change in place, i.e. when applying a patch
+        return self._synsets[synset_id]
+
+    def _memory_structures(self):
+        # the root object of each internal structure, see memory_report
+        return {
+            'graph': self._graph,
+            'hypernym_graph': self._hypernym_graph,
+            'synsets': self._synsets,
+            'literal2synset': self._literal2synset,
+            'literal2synset_strict': self._literal2synset_strict,
+            'sense2synset': self._sense2synset,
+            'indexes': (self._mwe_trie, self._definition_indexes, self._attribute_indexes, self._sentiwn_indexes),
+        }
+
+    @classmethod
+    def _from_parts(cls, synsets: list, relation_types: set, relations: list):
+        # bulk constructor for the set operations: the synsets and (synset_id1, synset_id2, relation) tuples are assumed
+        # to be valid, so nothing is checked and the indexes are built once, at the end
+        wordnet = cls(empty=True)
+        wordnet._relation_types = set(relation_types)
+
+        with _gc_paused():
+            for synset in synsets:
+                wordnet._synsets[synset.id] = synset
+                wordnet._attach_synset(synset)
+
+            wordnet._graph.add_nodes_from(wordnet._synsets)
+            wordnet._graph.add_edges_from((synset_id1, synset_id2, {'label': relation})
+                                          for synset_id1, synset_id2, relation in relations)
+            wordnet._build_hypernym_graph(relations)
+            wordnet.reindex_literals()
+
+        return wordnet
+
+    def _build_hypernym_graph(self, relations: list):
+        self._hypernym_graph = nx.DiGraph()
+        self._hypernym_graph.add_nodes_from(self._synsets)
+        self._hypernym_graph.add_edges_from((synset_id1, synset_id2, {'label': relation})
+                                            for synset_id1, synset_id2, relation in relations
+                                            if relation == "hypernym" or relation == "hyponym")
 
     @property
     def relation_types(self):
@@ -68,7 +567,7 @@ class RoWordNet(object):
 
         return self._relation_types
 
-    def save(self, filename: str, xml: bool = False):
+    def save(self, filename: str, xml: bool = False, format: str = None):
         """
             Save a wordnet object in a given file.
 
@@ -76,8 +575,13 @@ class RoWordNet(object):
                 filename (str): The file where the wordnet will be saved.
                 xml (bool, optional): If set to True, it will save in xml format. If set to False it will save in binary
                     format. Defaults to False.
+                format (str, optional): The format of the file: "binary", "xml", "sqlite", an indexed file that can be
+                    queried without loading it (see open_sqlite), or "jsonl", a JSON Lines file with one synset per
+                    line (see iter_synsets_jsonl), compressed with gzip or lzma if the filename ends with .gz, .xz or
+                    .lzma. Overrides xml if given. Defaults to None.
             Raises:
                 TypeError: If any argument has incorrect type.
+                ValueError: If the format is not known.
         """
 
         if not isinstance(filename, str):
@@ -85,21 +589,35 @@ class RoWordNet(object):
                             .format(type(filename).__name__))
         if not isinstance(xml, bool):
             raise TypeError("Argument 'xml' has incorrect type, expected bool, got {}".format(type(xml).__name__))
+        format = _file_format(xml, format, ("binary", "xml", "sqlite", "jsonl"))
 
-        if xml is True:
+        if format == "xml":
             self._save_to_xml(filename)
-        elif xml is False:
+        elif format == "binary":
             self._save_to_binary(filename)
+        elif format == "jsonl":
+            from .jsonl import write_jsonl
+
+            write_jsonl(self, filename)
+        else:
+            from .sqlitedb import export
+
+            export(self, filename)
 
-    def load(self, filename: str, xml: bool = False):
+    def load(self, filename: str, xml: bool = False, progress=None, format: str = None):
         """
-            Load a wordnet object from a given file.
+            Load a wordnet object from a given file. The time taken by each phase of the load is kept in load_profile.
             Args:
                 filename (str): The file from where wordnet will be loaded.
                 xml (bool, optional): If set to True, it will load from xml format. If set to False, it will load from
                     binary format. Defaults to False.
+                progress (callable, optional): Called with the name, the work done and the total work of each phase of
+                    the load, see __init__. Defaults to None.
+                format (str, optional): The format of the file: "binary", "xml" or "jsonl" (see save). Overrides xml if
+                    given. Defaults to None.
             Raises:
                 TypeError: If any argument has incorrect type.
+                ValueError: If the format is not known.
         """
 
         if not isinstance(filename, str):
@@ -107,19 +625,37 @@ class RoWordNet(object):
                             .format(type(filename).__name__))
         if not isinstance(xml, bool):
             raise TypeError("Argument 'xml' has incorrect type, expected bool, got {}".format(type(xml).__name__))
+        if progress is not None and not callable(progress):
+            raise TypeError("Argument 'progress' has incorrect type, expected callable, got {}"
+                            .format(type(progress).__name__))
+        format = _file_format(xml, format, ("binary", "xml", "jsonl"))
+
+        phases = _LoadPhases(progress)
+        with _gc_paused():
+            self._load_file(filename, format, phases)
+        self.load_profile = phases.times
+
+    def _load_file(self, filename: str, format: str, phases: _LoadPhases):
+        if format == "xml":
+            self._load_from_xml(filename, phases)
+        elif format == "jsonl":
+            self._load_from_jsonl(filename, phases)
+        else:
+            self._load_from_binary(filename, phases)
 
-        if xml is True:
-            self._load_from_xml(filename)
-        elif xml is False:
-            self._load_from_binary(filename)
-
-    def _load_from_xml(self, filename: str):
+    def _load_from_xml(self, filename: str, phases: _LoadPhases):
         self._clean()
 
         parser = et.XMLParser(encoding="utf-8")
-        root = et.parse(filename, parser).getroot()
-
-        for child in root:
+        data = phases.read(filename)
+        phases.start('parse', len(data))
+        root = et.fromstring(data, parser)
+        del data
+
+        phases.start('synsets', len(root))
+        for i, child in enumerate(root):
+            if i & 4095 == 0:
+                phases.update(i)
             synset = None
 
             for element in child:
@@ -146,15 +682,12 @@ class RoWordNet(object):
                     for literal in element:
                         literals_senses.append(literal[0].text if literal[0].text is not None else "")
                     synset.literals_senses = literals_senses
+                    for literal, sense in zip(synset.literals, synset.literals_senses):
+                        self._index_sense(synset.id, literal, sense)
 
                     # index literals
                     for literal in synset.literals:
-                        self._literal2synset[literal].append(synset.id)
-                        self._literal2synset_strict[literal].append(synset.id)
-                        literal_parts = literal.split('_')
-                        if len(literal_parts) > 1:  # add composing words for multi-word literals in non-strict index
-                            for literal_part in literal_parts:
-                                self._literal2synset[literal_part].append(synset.id)
+                        self._index_literal(synset.id, literal)
 
                 if element.tag == 'STAMP':
                     synset.stamp = element.text
@@ -187,10 +720,76 @@ class RoWordNet(object):
                     synset.sentiwn = [float(subelement.text) for subelement in element]
 
             self._synsets[synset.id] = synset
+            self._attach_synset(synset)
 
-    def _load_from_binary(self, filename: str):
-        with open(filename, "rb") as f:
-            wn = pickle.load(f)
+        # the relations are added to the graph as they're read, the synsets without any and the hypernym graph are
+        # added at the end
+        phases.start('hypernym_graph', len(self._synsets))
+        self._graph.add_nodes_from(self._synsets)
+        self._build_hypernym_graph(list(self._edges()))
+        phases.end()
+
+    def _load_from_jsonl(self, filename: str, phases: _LoadPhases):
+        from .jsonl import _JsonlFile, _record_relations
+
+        self._clean()
+        synsets = self._synsets
+        relation_types = self._relation_types
+        literal2synset, literal2synset_strict = self._literal2synset, self._literal2synset_strict
+        sense2synset = self._sense2synset
+        refs = self._refs
+        relations = []
+        decode = json.JSONDecoder().decode
+
+        # the synsets and their literals are indexed as the lines are read, the relations are added to the graphs at
+        # the end, when all their targets are known
+        phases.start('stream', os.path.getsize(filename))
+        with _JsonlFile(filename, "r") as f:
+            for i, line in enumerate(f, 1):
+                if i & 4095 == 0:
+                    phases.update(f.bytes_read())
+                if not line.strip():
+                    continue
+                try:
+                    record = decode(line)
+                    synset = Synset(record['id'], **record_to_fields(record))
+                    synset_relations = _record_relations(record)
+                except (ValueError, KeyError, TypeError) as e:
+                    raise WordNetError("Line {} of '{}' is not a synset record: {}".format(i, filename, e))
+                synset_id = synset.id
+                if synset_id in synsets:
+                    raise WordNetError("Synset with id '{}' is in '{}' twice".format(synset_id, filename))
+                synsets[synset_id] = synset
+                synset._wordnets = refs
+
+                for literal, sense in zip(synset.literals, synset.literals_senses):
+                    literal2synset[literal].append(synset_id)
+                    literal2synset_strict[literal].append(synset_id)
+                    sense2synset[(literal, sense)].append(synset_id)
+                    if '_' in literal:
+                        for literal_part in literal.split('_'):
+                            literal2synset[literal_part].append(synset_id)
+
+                for adj_synset_id, relation in synset_relations:
+                    relations.append((synset_id, adj_synset_id, relation))
+                    relation_types.add(relation)
+
+        phases.start('graph', len(synsets))
+        for synset_id1, synset_id2, _ in relations:
+            if synset_id2 not in synsets:
+                raise WordNetError("Synset '{}' has a relation to '{}', which is not in '{}'"
+                                   .format(synset_id1, synset_id2, filename))
+        self._graph.add_nodes_from(synsets)
+        self._graph.add_edges_from((synset_id1, synset_id2, {'label': relation})
+                                   for synset_id1, synset_id2, relation in relations)
+        self._build_hypernym_graph(relations)
+        phases.end()
+
+    def _load_from_binary(self, filename: str, phases: _LoadPhases):
+        data = phases.read(filename)
+        phases.start('unpickle', len(data))
+        wn = pickle.loads(data)
+        del data
 
         self._clean()
 
@@ -198,7 +797,10 @@ class RoWordNet(object):
 
         synsets_id = wn.synsets()
 
-        for synset_id in synsets_id:
+        phases.start('graph', len(synsets_id))
+        for i, synset_id in enumerate(synsets_id):
+            if i & 4095 == 0:
+                phases.update(i)
             self._graph.add_node(synset_id)
             self._hypernym_graph.add_node(synset_id)
 
@@ -209,18 +811,34 @@ class RoWordNet(object):
                 if relation == "hypernym" or relation == "hyponym":
                     self._hypernym_graph.add_edge(synset_id, adj_synset_id, label=relation)
 
-        for synset_id in synsets_id:
-            self._synsets[synset_id] = wn.synset(synset_id)
-
+        phases.start('synsets', len(synsets_id))
         for synset_id in synsets_id:
             synset = wn.synset(synset_id)
+            self._synsets[synset_id] = synset
+            # the synsets were just unpickled, so they belong only to this wordnet
+            synset._wordnets = self._refs
+
+        phases.start('literal_index', len(synsets_id))
+        for i, synset in enumerate(self._synsets.values()):
+            if i & 4095 == 0:
+                phases.update(i)
             for literal in synset.literals:
-                self._literal2synset[literal].append(synset.id)
-                self._literal2synset_strict[literal].append(synset.id)
-                literal_parts = literal.split('_')
-                if len(literal_parts) > 1:  # add composing words for multi-word literals in non-strict index
-                    for literal_part in literal_parts:
-                        self._literal2synset[literal_part].append(synset.id)
+                self._index_literal(synset.id, literal)
+
+        # binary files saved by newer versions already contain the (literal, sense) index
+        phases.start('sense_index', len(synsets_id))
+        sense2synset = getattr(wn, '_sense2synset', None)
+        if sense2synset is not None:
+            self._sense2synset = sense2synset
+        else:
+            self._reindex_senses()
+        phases.end()
+
+        definition_indexes = getattr(wn, '_definition_indexes', None)
+        if definition_indexes is not None:
+            self._definition_indexes = definition_indexes
+
+        self._journal_generation = getattr(wn, '_journal_generation', 0)
 
     def _save_to_xml(self, filename: str):
         root = et.Element("ROWN")
@@ -243,11 +861,10 @@ class RoWordNet(object):
             if synset.stamp is not None:
                 et.SubElement(syn, "STAMP").text = synset.stamp
 
-            if synset.id in self._graph.adj.keys():
-                for target_node_id, edge_data in self._graph[synset.id].items():
-                    ilr = et.SubElement(syn, "ILR")
-                    ilr.text = target_node_id
-                    et.SubElement(ilr, "TYPE").text = edge_data['label']
+            for target_node_id, relation in self._outbound(synset.id):
+                ilr = et.SubElement(syn, "ILR")
+                ilr.text = target_node_id
+                et.SubElement(ilr, "TYPE").text = relation
             if synset.definition is not None:
                 et.SubElement(syn, "DEF").text = synset.definition
 
@@ -272,6 +889,21 @@ class RoWordNet(object):
         with open(filename, "wb") as f:
             pickle.dump(self, f)
 
+    def iter_synsets_jsonl(self):
+        """
+            Iterate over the wordnet as JSON Lines, one synset at a time, i.e. to stream it to another process. Each
+            line holds the record of a synset (the 'id' and the fields of records.synset_to_record) and its outbound
+            relations under 'relations', as [synset_id, relation] pairs. The lines are what save(filename,
+            format="jsonl") writes and RoWordNet(filename, format="jsonl") loads. The relation types that no relation
+            uses are not kept, as in the xml format.
+            Yields:
+                str: The lines, each ending with a newline.
+        """
+
+        from .jsonl import synset_lines
+
+        yield from synset_lines(self)
+
     def synsets(self, literal: str = None, pos: Synset.Pos = None, strict: bool = False):
         """
             Get a list of synsets. If a literal is given, only the synsets that contain that literal will be selected.
@@ -296,14 +928,7 @@ class RoWordNet(object):
                 raise TypeError("Argument 'literal' has incorrect type, expected str, got {}"
                                 .format(type(literal).__name__))
 
-            if strict:
-                if literal not in self._literal2synset_strict:
-                    return []
-                synsets_id = self._literal2synset_strict[literal]
-            else:
-                if literal not in self._literal2synset:
-                    return []
-                synsets_id = self._literal2synset[literal]
+            synsets_id = list(self._lookup_literal(literal, strict))
 
         if pos is not None:
             if not isinstance(pos, Synset.Pos):
@@ -314,6 +939,239 @@ class RoWordNet(object):
 
         return synsets_id
 
+    def search_definitions(self, query: str, k: int = 10, pos: Synset.Pos = None, literals: bool = False):
+        """
+            Full-text search over the definitions of the synsets, ranked with BM25.
+            The inverted index is built the first time it's needed (or after the definitions change) and it's saved
+            together with the wordnet in the binary format.
+            Args:
+                query (str): The words to search for.
+                k (int, optional): The maximum number of results. Defaults to 10.
+                pos (Synset.Pos, optional): The pos that the synsets must have. Defaults to None.
+                literals (bool, optional): Search the literals of the synsets as well. Defaults to False.
+            Returns:
+                list of tuples: A list of (synset id, score) pairs, sorted from the most relevant synset.
+            Raises:
+                TypeError: If any argument has incorrect type.
+        """
+
+        if not isinstance(query, str):
+            raise TypeError("Argument 'query' has incorrect type, expected str, got {}".format(type(query).__name__))
+        if not isinstance(k, int):
+            raise TypeError("Argument 'k' has incorrect type, expected int, got {}".format(type(k).__name__))
+        if pos is not None and not isinstance(pos, Synset.Pos):
+            raise TypeError("Argument 'pos' has incorrect type, expected Synset.Pos, got {}"
+                            .format(type(pos).__name__))
+        if not isinstance(literals, bool):
+            raise TypeError("Argument 'literals' has incorrect type, expected bool, got {}"
+                            .format(type(literals).__name__))
+
+        definition_index = self._definition_indexes.get(literals)
+        if self._profile is not None:
+            self._profile.cache('definition_index', definition_index is not None)
+        if definition_index is None:
+            definition_index = DefinitionIndex(self._synsets.values(), literals=literals)
+            self._definition_indexes[literals] = definition_index
+
+        accept = None
+        if pos is not None:
+            accept = lambda synset_id: self._synsets[synset_id].pos == pos
+
+        return definition_index.search(query, k, accept)
+
+    def query(self, pos: Synset.Pos = None, domain: str = None, sumo: str = None, sumotype: Synset.SumoType = None,
+              stamp: str = None, positive: tuple = None, negative: tuple = None, objective: tuple = None):
+        """
+            Find the synsets that match all the given conditions, e.g. all the noun synsets with a given domain and an
+            EQUIVALENT sumo type, or all the synsets with a negative SentiWN score of at least 0.6.
+            Every attribute has its own index and the most selective condition is used to produce the candidates,
+            which are then checked against the other conditions. The results are generated lazily, in no particular
+            order.
+            Args:
+                pos (Synset.Pos, optional): The pos of the synsets.
+                domain (str, optional): The domain of the synsets.
+                sumo (str, optional): The sumo of the synsets.
+                sumotype (Synset.SumoType, optional): The sumo type of the synsets.
+                stamp (str, optional): The stamp of the synsets.
+                positive (tuple, optional): A (min, max) range for the positive SentiWN value. Any of the two limits can
+                    be None. The limits are inclusive.
+                negative (tuple, optional): A (min, max) range for the negative SentiWN value.
+                objective (tuple, optional): A (min, max) range for the objective SentiWN value.
+            Returns:
+                generator of str: The ids of the synsets that match all the conditions. If no condition is given, all
+                    the synsets are returned.
+            Raises:
+                TypeError: If any argument has incorrect type.
+        """
+
+        if pos is not None and not isinstance(pos, Synset.Pos):
+            raise TypeError("Argument 'pos' has incorrect type, expected Synset.Pos, got {}"
+                            .format(type(pos).__name__))
+        if domain is not None and not isinstance(domain, str):
+            raise TypeError("Argument 'domain' has incorrect type, expected str, got {}".format(type(domain).__name__))
+        if sumo is not None and not isinstance(sumo, str):
+            raise TypeError("Argument 'sumo' has incorrect type, expected str, got {}".format(type(sumo).__name__))
+        if sumotype is not None and not isinstance(sumotype, Synset.SumoType):
+            raise TypeError("Argument 'sumotype' has incorrect type, expected Synset.SumoType, got {}"
+                            .format(type(sumotype).__name__))
+        if stamp is not None and not isinstance(stamp, str):
+            raise TypeError("Argument 'stamp' has incorrect type, expected str, got {}".format(type(stamp).__name__))
+        for name, bounds in (('positive', positive), ('negative', negative), ('objective', objective)):
+            if bounds is None:
+                continue
+            if not isinstance(bounds, tuple) or len(bounds) != 2:
+                raise TypeError("Argument '{}' has incorrect type, expected a (min, max) tuple, got {}"
+                                .format(name, type(bounds).__name__))
+            for bound in bounds:
+                if bound is not None and not isinstance(bound, (int, float)):
+                    raise TypeError("Argument '{}' has incorrect type, expected int/float limits, got {}"
+                                    .format(name, type(bound).__name__))
+
+        # each condition is a (number of candidates, candidate ids, predicate) tuple
+        conditions = []
+
+        attribute_values = {'pos': pos, 'domain': domain, 'sumo': sumo, 'sumotype': sumotype, 'stamp': stamp}
+        if any(value is not None for value in attribute_values.values()):
+            if self._profile is not None:
+                self._profile.cache('attribute_indexes', self._attribute_indexes is not None)
+            if self._attribute_indexes is None:
+                self._build_attribute_indexes()
+            for name, value in attribute_values.items():
+                if value is None:
+                    continue
+                synsets_id = self._attribute_indexes[name].get(value, set())
+                conditions.append((len(synsets_id), synsets_id, synsets_id.__contains__))
+
+        if any(bounds is not None for bounds in (positive, negative, objective)):
+            if self._profile is not None:
+                self._profile.cache('sentiwn_indexes', self._sentiwn_indexes is not None)
+            if self._sentiwn_indexes is None:
+                self._build_sentiwn_indexes()
+            for i, bounds in enumerate((positive, negative, objective)):
+                if bounds is None:
+                    continue
+                low, high = bounds
+                values, synsets_id = self._sentiwn_indexes[i]
+                start = 0 if low is None else bisect_left(values, low)
+                end = len(values) if high is None else bisect_right(values, high)
+                conditions.append((max(end - start, 0), (synsets_id[j] for j in range(start, end)),
+                                   self._sentiwn_predicate(i, low, high)))
+
+        return self._run_query(conditions)
+
+    def _sentiwn_predicate(self, i: int, low: float, high: float):
+        def predicate(synset_id):
+            sentiwn = self._synsets[synset_id].sentiwn
+            if sentiwn is None:
+                return False
+            return (low is None or sentiwn[i] >= low) and (high is None or sentiwn[i] <= high)
+
+        return predicate
+
+    def _run_query(self, conditions: list):
+        if len(conditions) == 0:
+            yield from list(self._synsets.keys())
+            return
+
+        conditions.sort(key=lambda condition: condition[0])
+        if conditions[0][0] == 0:
+            return
+
+        predicates = [predicate for _, _, predicate in conditions[1:]]
+        for synset_id in conditions[0][1]:
+            if all(predicate(synset_id) for predicate in predicates):
+                yield synset_id
+
+    def fingerprints(self):
+        """
+            Get the content fingerprint of every synset, see Synset.fingerprint. Two versions of a wordnet can be
+            compared by their fingerprints alone, e.g. the ones saved in a columns file by SynsetColumns.save.
+            Returns:
+                dict: The fingerprint (bytes) of each synset, by synset id.
+        """
+
+        return {synset_id: synset.fingerprint for synset_id, synset in self._synsets.items()}
+
+    def to_columns(self):
+        """
+            Get the synsets as a columnar (struct-of-arrays) table with one row per synset: pos and sumotype codes,
+            domain and sumo category codes, an N x 3 SentiWN matrix, the literals as offsets and lengths into a
+            flat literal column and the synset fingerprints. The table can be saved with SynsetColumns.save, loaded
+            back memory mapped with SynsetColumns.load, and its numeric columns can be viewed as numpy arrays without
+            copies.
+            Returns:
+                SynsetColumns: The columnar table of the synsets, in the order given by synsets().
+        """
+
+        return SynsetColumns.from_synsets(self._synsets.values())
+
+    def synset_by_sense(self, literal: str, sense: str, pos: Synset.Pos = None):
+        """
+            Get the synset that contains a literal with a given sense, e.g. ('arbore', '1').
+            A few (literal, sense) pairs, mostly the ones with 'x' senses, are shared by more than one synset. In that
+            case the first of them, in wordnet order, is returned; use pos to narrow the search.
+            Args:
+                literal (str): The literal.
+                sense (str): The sense of the literal.
+                pos (Synset.Pos, optional): The pos that the synset must have. Defaults to None.
+            Returns:
+                str: The id of the synset.
+            Raises:
+                TypeError: If any argument has incorrect type.
+                WordNetError: If there's no synset with the given literal and sense in the wordnet.
+        """
+
+        if not isinstance(literal, str):
+            raise TypeError("Argument 'literal' has incorrect type, expected str, got {}"
+                            .format(type(literal).__name__))
+        if not isinstance(sense, str):
+            raise TypeError("Argument 'sense' has incorrect type, expected str, got {}".format(type(sense).__name__))
+        if pos is not None and not isinstance(pos, Synset.Pos):
+            raise TypeError("Argument 'pos' has incorrect type, expected Synset.Pos, got {}"
+                            .format(type(pos).__name__))
+
+        synset_id = self._lookup_sense(literal, sense, pos)
+        if synset_id is None:
+            raise WordNetError("There's no synset with literal '{}' and sense '{}' in the wordnet"
+                               .format(literal, sense))
+
+        return synset_id
+
+    def synsets_by_senses(self, literals_senses: list, pos: Synset.Pos = None):
+        """
+            Bulk version of synset_by_sense.
+            Args:
+                literals_senses (list of tuples): A list of (literal, sense) pairs.
+                pos (Synset.Pos, optional): The pos that the synsets must have. Defaults to None.
+            Returns:
+                list of str: The id of the synset for each (literal, sense) pair, or None for the pairs that are not
+                    in the wordnet.
+            Raises:
+                TypeError: If any argument has incorrect type.
+        """
+
+        if not isinstance(literals_senses, list):
+            raise TypeError("Argument 'literals_senses' has incorrect type, expected list, got {}"
+                            .format(type(literals_senses).__name__))
+        if pos is not None and not isinstance(pos, Synset.Pos):
+            raise TypeError("Argument 'pos' has incorrect type, expected Synset.Pos, got {}"
+                            .format(type(pos).__name__))
+
+        return [self._lookup_sense(literal, sense, pos) for literal, sense in literals_senses]
+
+    def _lookup_sense(self, literal: str, sense: str, pos: Synset.Pos):
+        synsets_id = self._lookup_senses(literal, sense)
+        if not synsets_id:
+            return None
+        if pos is None:
+            return synsets_id[0]
+
+        for synset_id in synsets_id:
+            if self._synsets[synset_id].pos == pos:
+                return synset_id
+
+        return None
+
     def print_synset(self, synset_id: str):
         """
             Fully prints a synset.
@@ -369,26 +1227,95 @@ class RoWordNet(object):
             return False
 
         current_synset = self._synsets[synset.id]
-        if current_synset != synset:
+        if current_synset.fingerprint != synset.fingerprint:
             return False
 
         return True
 
     def reindex_literals(self):
         """
-            Reindex all literals to the synsets. This is used if the literals of a synset have been changed.
+            Rebuild the literal and (literal, sense) indexes from scratch, in a single pass over the literals of all
+            synsets. Changes made through Synset.add_literal, Synset.remove_literal or the Synset.literals and
+            Synset.literals_senses setters are indexed automatically for the synsets that belong to this wordnet, so
+            this is only needed if the indexes got out of step with the synsets some other way (i.e. a synset's
+            private fields were changed directly). The lists returned by the Synset.literals and
+            Synset.literals_senses getters are copies, so changing them in place changes nothing to reindex.
         """
 
         self._literal2synset.clear()
         self._literal2synset_strict.clear()
-        for synset in self._synsets.values():
-            for literal in synset.literals:
-                self._literal2synset[literal].append(synset.id)
-                [literal].append(synset.id)
-                literal_parts = literal.split('_')
-                if len(literal_parts) > 1:  # add composing words for multi-word literals in non-strict index
-                    for literal_part in literal_parts:
-                        self._literal2synset[literal_part].append(synset.id)
+        self._sense2synset.clear()
+        self._mwe_trie = None
+        self._index_literals(self._synsets.values())
+
+    def _build_mwe_trie(self):
+        # token-level trie over all the multi-word literals; a leaf is marked by the None key which holds the literal
+        trie = {}
+        max_length = 0
+        for literal in self._strict_literals():
+            literal_parts = literal.split('_')
+            if len(literal_parts) < 2:
+                continue
+
+            node = trie
+            for literal_part in literal_parts:
+                node = node.setdefault(literal_part, {})
+            node[None] = literal
+            max_length = max(max_length, len(literal_parts))
+
+        self._mwe_trie = (trie, max_length)
+
+    def multiword_expressions(self, tokens):
+        """
+            Find the multi-word literals (e.g. 'tren_de_marfă') in a stream of tokens. The tokens are scanned from left
+            to right and, at each position, the longest multi-word literal that starts there is selected. Matches never
+            overlap. The scan keeps at most as many tokens in memory as the longest multi-word literal has, so it runs
+            in linear time over the token stream.
+            Example: for the tokens ['un', 'tren', 'de', 'marfă'], it yields (1, 4, 'tren_de_marfă', [...]).
+            Args:
+                tokens (iterable of str): The token stream. It can be a list or any other iterable (i.e. a generator).
+            Yields:
+                tuple: A tuple (start, end, literal, synset ids) for every multi-word literal found, where
+                    tokens[start:end] are the tokens that form the literal.
+        """
+
+        if self._profile is not None:
+            self._profile.cache('mwe_trie', self._mwe_trie is not None)
+        if self._mwe_trie is None:
+            self._build_mwe_trie()
+        trie, max_length = self._mwe_trie
+
+        tokens = iter(tokens)
+        window = deque()
+        start = 0
+        exhausted = False
+
+        while True:
+            while not exhausted and len(window) < max_length:
+                try:
+                    window.append(next(tokens))
+                except StopIteration:
+                    exhausted = True
+            if len(window) == 0:
+                return
+
+            node = trie
+            match_length, match_literal = 0, None
+            for index, token in enumerate(window):
+                node = node.get(token)
+                if node is None:
+                    break
+                if None in node:
+                    match_length, match_literal = index + 1, node[None]
+
+            if match_literal is not None:
+                yield start, start + match_length, match_literal, list(self._lookup_literal(match_literal, True))
+            else:
+                match_length = 1
+
+            for _ in range(match_length):
+                window.popleft()
+            start += match_length
 
     def inbound_relations(self, synset_id: str):
         if not isinstance(synset_id, str):
@@ -397,13 +1324,7 @@ class RoWordNet(object):
         if synset_id not in self._synsets:
             raise WordNetError("Synset with id '{}' is not in the wordnet".format(synset_id))
 
-        inbound_relations = []
-        for synset_id_iter in self._graph.adj.keys():
-            for adj_synset_id, data in self._graph.adj[synset_id_iter].items():
-                if adj_synset_id == synset_id:
-                    inbound_relations.append((synset_id_iter, data['label']))
-
-        return inbound_relations
+        return self._inbound(synset_id)
 
     def outbound_relations(self, synset_id: str):
         if not isinstance(synset_id, str):
@@ -412,14 +1333,7 @@ class RoWordNet(object):
         if synset_id not in self._synsets:
             raise WordNetError("Synset with id '{}' is not in the wordnet".format(synset_id))
 
-        if synset_id not in self._graph.adj.keys():
-            return []
-
-        outbound_relations = []
-        for adj_synset_id, data in self._graph.adj[synset_id].items():
-            outbound_relations.append((adj_synset_id, data['label']))
-
-        return outbound_relations
+        return self._outbound(synset_id)
 
     def relations(self, synset_id: str):
         return self.outbound_relations(synset_id) + self.inbound_relations(synset_id)
@@ -441,20 +1355,21 @@ class RoWordNet(object):
         if relation not in self._relation_types:
             raise WordNetError("Relation '{}' is not a correct relation".format(relation))
 
-        for adj_synset_id, data in self._graph.adj[synset_id1].items():
-            if adj_synset_id == synset_id2 and data['label'] == relation:
-                return True
-
-        return False
+        return self._edge_label(synset_id1, synset_id2) == relation
 
     def add_relation_type(self, relation_type: str):
         if not isinstance(relation_type, str):
             raise TypeError("Argument 'relation_type' has incorrect type, expected str, got {}"
                             .format(type(relation_type).__name__))
+        if self._batch is not None:
+            self._batch.relation_types.append(relation_type)
+            return
         if relation_type in self._relation_types:
             raise WordNetError("Relation type {} is already in the wordnet".format(relation_type))
 
         self._relation_types.add(relation_type)
+        if self._journal is not None:
+            self._journal.append({"op": "add_relation_type", "relation": relation_type})
 
     def __call__(self, synset_id: str):
         if not isinstance(synset_id, str):
@@ -487,7 +1402,10 @@ class RoWordNet(object):
 
     def generate_synset_id(self, prefix: str = 'ENG30-', suffix: str = '-n'):
         """
-            Generate the first available id that starts with the given prefix and ends with the given suffix.
+            Generate the first available id that starts with the given prefix and ends with the given suffix. The
+            highest id of each prefix and suffix is found once and then kept up to date, so this takes constant time.
+            The id is not reserved: calling this again before the synset is added returns the same id. Use
+            generate_synset_ids to get many ids at once.
             Args:
                 prefix (str, optional): The desired prefix. Defaults to 'ENG30-'
                 suffix (str, optional): The desired suffix. Defaults to '-n'.
@@ -504,27 +1422,318 @@ class RoWordNet(object):
             raise TypeError("Argument 'prefix' has incorrect type, expected str, got {}"
                             .format(type(prefix).__name__))
 
-        matched = False
-        maximum = 0
+        return "{}{:08d}{}".format(prefix, self._id_counter(prefix, suffix) + 1, suffix)
 
-        for synset_id in self._synsets:
-            if not synset_id.startswith(prefix):
-                continue
-            if not synset_id.endswith(suffix):
-                continue
+    def generate_synset_ids(self, n: int, prefix: str = 'ENG30-', suffix: str = '-n'):
+        """
+            Generate n new ids that start with the given prefix and end with the given suffix. Unlike
+            generate_synset_id, the ids are reserved: they won't be generated again, even if the synsets are not added
+            yet.
+            Args:
+                n (int): The number of ids.
+                prefix (str, optional): The desired prefix. Defaults to 'ENG30-'
+                suffix (str, optional): The desired suffix. Defaults to '-n'.
+            Returns:
+                list of str: The new ids, in increasing order.
+            Raises:
+                TypeError: If any argument has incorrect type.
+                ValueError: If n is negative.
+        """
+
+        if not isinstance(n, int):
+            raise TypeError("Argument 'n' has incorrect type, expected int, got {}".format(type(n).__name__))
+        if not isinstance(suffix, str):
+            raise TypeError("Argument 'suffix' has incorrect type, expected str, got {}"
+                            .format(type(suffix).__name__))
+        if not isinstance(prefix, str):
+            raise TypeError("Argument 'prefix' has incorrect type, expected str, got {}"
+                            .format(type(prefix).__name__))
+        if n < 0:
+            raise ValueError("Argument 'n' must not be negative, got {}".format(n))
+
+        first = self._id_counter(prefix, suffix) + 1
+        self._id_counters[(prefix, suffix)] = first + n - 1
+
+        return ["{}{:08d}{}".format(prefix, number, suffix) for number in range(first, first + n)]
+
+    def _id_counter(self, prefix: str, suffix: str):
+        # the first request for a (prefix, suffix) pair scans the ids once, after that the counter is kept up to date by
+        # _count_synset_id
+        counter = self._id_counters.get((prefix, suffix))
+        if self._profile is not None:
+            self._profile.cache('id_counter', counter is not None)
+        if counter is None:
+            counter = 0
+            for synset_id in self._synsets:
+                number = _synset_id_number(synset_id, prefix, suffix)
+                if number is not None and number > counter:
+                    counter = number
+            self._id_counters[(prefix, suffix)] = counter
+
+        return counter
+
+    def _count_synset_id(self, synset_id: str):
+        for (prefix, suffix), counter in self._id_counters.items():
+            number = _synset_id_number(synset_id, prefix, suffix)
+            if number is not None and number > counter:
+                self._id_counters[(prefix, suffix)] = number
+
+    def overlay(self):
+        """
+            Create a copy-on-write overlay of the wordnet, i.e. for the edits of a single request or tenant. The overlay
+            reads through to this wordnet and keeps its own edits, without copying anything up front. This wordnet must
+            not be changed while it has overlays. See RoWordNetOverlay.
+            Returns:
+                RoWordNetOverlay: An overlay of this wordnet.
+        """
+
+        from .overlay import RoWordNetOverlay
+
+        return RoWordNetOverlay(self)
+
+    def publish(self, name: str = None):
+        """
+            Copy the wordnet into a block of shared memory, so that other processes (i.e. the workers of a pool) can
+            read it with RoWordNet.attach(block.name) instead of unpickling or loading their own copy. The relations,
+            the literal indexes and the hypernym depths are stored as flat arrays that every attached wordnet reads in
+            place. Later changes to this wordnet are not seen by the attached ones.
+            The block stays in memory until it's unlinked: call block.close() and block.unlink() when the other
+            processes are done with it.
+            Args:
+                name (str, optional): The name of the block. Defaults to a random name.
+            Returns:
+                multiprocessing.shared_memory.SharedMemory: The block, whose name is given to attach.
+            Raises:
+                TypeError: If any argument has incorrect type.
+                FileExistsError: If there's already a block with the given name.
+                ImportError: Before python 3.8, which has no multiprocessing.shared_memory.
+        """
 
-            matched = True
+        if not isinstance(name, str) and name is not None:
+            raise TypeError("Argument 'name' has incorrect type, expected str, got {}".format(type(name).__name__))
 
-            synset_id = synset_id.replace(prefix, "")
-            synset_id = synset_id.replace(suffix, "")
+        from .sharedmem import publish
 
-            if int(synset_id) > maximum:
-                maximum = int(synset_id)
+        return publish(self, name)
 
-        if matched:
-            return "{}{:08d}{}".format(prefix, maximum + 1, suffix)
-        else:
-            return "{}{:08d}{}".format(prefix, 1, suffix)
+    @staticmethod
+    def attach(name: str):
+        """
+            Attach to a wordnet published in shared memory by RoWordNet.publish. Attaching maps the block and reads its
+            header, nothing is copied: the relations and the indexes are read in place and a synset is decoded when it's
+            asked for. The attached wordnet has the whole read API of a wordnet, but it can't be changed. See
+            SharedRoWordNet.
+            Args:
+                name (str): The name of the block.
+            Returns:
+                SharedRoWordNet: The attached wordnet.
+            Raises:
+                TypeError: If any argument has incorrect type.
+                FileNotFoundError: If there's no block with the given name.
+                WordNetError: If the block doesn't hold a published wordnet.
+                ImportError: Before python 3.8, which has no multiprocessing.shared_memory.
+        """
+
+        from .sharedmem import SharedRoWordNet
+
+        return SharedRoWordNet(name)
+
+    @staticmethod
+    def open_sqlite(filename: str, cache_size: int = 2048):
+        """
+            Open a wordnet saved with save(filename, format="sqlite"), without loading it: the synsets, relations and
+            literal indexes are read from the file as they're needed, so the memory used stays small no matter how big
+            the wordnet is, at the cost of slower queries. The opened wordnet has the whole read API of a wordnet, but
+            it can't be changed. See SqliteRoWordNet.
+            Args:
+                filename (str): The sqlite file.
+                cache_size (int, optional): The size of sqlite's page cache, in KiB. Defaults to 2048.
+            Returns:
+                SqliteRoWordNet: The opened wordnet.
+            Raises:
+                TypeError: If any argument has incorrect type.
+                ValueError: If the cache size is not positive.
+                FileNotFoundError: If the file doesn't exist.
+                WordNetError: If the file doesn't hold a wordnet.
+        """
+
+        from .sqlitedb import SqliteRoWordNet
+
+        return SqliteRoWordNet(filename, cache_size)
+
+    def enable_profiling(self, callback=None):
+        """
+            Start counting the calls of the public methods of the wordnet: the number of calls and errors, the total,
+            mean, highest and percentile latencies, and the hits and misses of the indexes built on demand (i.e. the
+            multi-word expression trie) and of the decoded synsets of a shared or sqlite wordnet ('synsets'). The calls
+            the methods make to each other are counted too, so the time of path_similarity shows up under shortest_path
+            as well. While profiling is off nothing is counted and the methods run as they are. See stats.
+            Args:
+                callback (callable, optional): Called after every call with the name of the method, the latency in
+                    seconds and whether it raised an error, i.e. to feed a metrics exporter. Defaults to None.
+            Raises:
+                TypeError: If any argument has incorrect type.
+        """
+
+        if callback is not None and not callable(callback):
+            raise TypeError("Argument 'callback' has incorrect type, expected callable, got {}"
+                            .format(type(callback).__name__))
+
+        from .profiling import _Profile
+
+        self.disable_profiling()
+        self._profile = _Profile(callback)
+        self._profile.wrap(self)
+
+    def disable_profiling(self):
+        """
+            Stop counting the calls of the methods of the wordnet and drop the counters.
+        """
+
+        if self._profile is not None:
+            self._profile.unwrap(self)
+            del self._profile
+
+    def stats(self, reset: bool = False):
+        """
+            Get the counters of the wordnet since profiling was enabled (or since they were last reset). Latencies are
+            in seconds; the percentiles come from a histogram with 4 buckets per power of two, so they are accurate to
+            about 20%.
+            Args:
+                reset (bool, optional): Set the counters to zero after reading them. Defaults to False.
+            Returns:
+                dict: A dict with 'methods', that maps the name of every method called to a dict with its 'calls',
+                    'errors', 'total', 'mean', 'p50', 'p90', 'p99' and 'max' latency, and 'caches', that maps the name
+                    of every index built on demand (and of the synset cache) to a dict with its 'hits', 'misses' and
+                    'hit_rate'. Both are empty if profiling is off.
+            Raises:
+                TypeError: If any argument has incorrect type.
+        """
+
+        if not isinstance(reset, bool):
+            raise TypeError("Argument 'reset' has incorrect type, expected bool, got {}".format(type(reset).__name__))
+
+        if self._profile is None:
+            return {'methods': {}, 'caches': {}}
+        return self._profile.to_dict(reset)
+
+    def memory_report(self):
+        """
+            Measure the memory used by each internal structure of the wordnet: the relation graph ('graph'), the
+            hypernym graph ('hypernym_graph'), the synsets ('synsets'), the literal indexes ('literal2synset',
+            'literal2synset_strict' and 'sense2synset') and the indexes built on demand ('indexes'). Every structure is
+            measured deeply, so this takes about ten seconds on a full wordnet. An overlay reports its own edits, with
+            the report of its base under 'base'; a wordnet attached to shared memory reports the bytes it reads from
+            the block as 'buffer_bytes'.
+            Returns:
+                dict: A dict with the 'backend' (the class of the wordnet), 'structures', that maps the name of each
+                    structure to a dict with its number of 'objects', their 'bytes', its 'buffer_bytes', its 'strings'
+                    and their 'string_bytes', the 'shared_strings' that another structure holds too and the
+                    'unique_bytes' of the objects that no other structure holds, and 'total', with the same counts for
+                    the whole wordnet (each object counted once) plus the 'duplicate_strings' (equal to another string
+                    object) and their 'duplicate_string_bytes'.
+        """
+
+        from .memory import memory_report
+
+        report = memory_report(self._memory_structures())
+        report['backend'] = type(self).__name__
+        return report
+
+    @contextmanager
+    def batch(self):
+        """
+            Group many additions into one transaction, for bulk imports:
+
+                with wn.batch():
+                    for synset in synsets:
+                        wn.add_synset(synset)
+                    for synset_id1, synset_id2, relation in relations:
+                        wn.add_relation(synset_id1, synset_id2, relation)
+
+            Inside the batch, add_relation_type, add_synset and add_relation only check the types of their arguments
+            and buffer the change. When the batch ends, all the changes are validated together and then applied in one
+            pass, with a single update of the graphs and the literal, sense and attribute indexes. If a change is
+            invalid or an exception escapes the with block, nothing is applied. The buffered changes are not visible
+            before the batch ends, and relations and synsets can't be removed inside a batch. Nested batches are part
+            of the outermost one.
+
+            Raises:
+                WordNetError: When the batch ends, if any buffered change is invalid (see add_relation_type, add_synset
+                    and add_relation), or at once if the wordnet is read-only (a shared or a sqlite wordnet).
+        """
+
+        if self._batch is not None:
+            yield
+            return
+
+        batch = self._batch = _Batch()
+        try:
+            yield
+        finally:
+            self._batch = None
+        self._commit_batch(batch)
+
+    def _commit_batch(self, batch: _Batch):
+        # validate everything first, so that a failure leaves the wordnet untouched
+        relation_types = set(self._relation_types)
+        for relation_type in batch.relation_types:
+            if relation_type in relation_types:
+                raise WordNetError("Relation type {} is already in the wordnet".format(relation_type))
+            relation_types.add(relation_type)
+
+        synsets = self._synsets
+        new_synsets = {}
+        for synset in batch.synsets:
+            if synset.id in synsets or synset.id in new_synsets:
+                raise WordNetError("Synset with id '{}' is already in the wordnet".format(synset.id))
+            new_synsets[synset.id] = synset
+
+        new_edges = set()
+        for synset_id1, synset_id2, relation in batch.relations:
+            if synset_id1 not in synsets and synset_id1 not in new_synsets:
+                raise WordNetError("Synset with id '{}' is not in the wordnet".format(synset_id1))
+            if synset_id2 not in synsets and synset_id2 not in new_synsets:
+                raise WordNetError("Synset with id '{}' is not in the wordnet".format(synset_id2))
+            if relation not in relation_types:
+                raise WordNetError("Relation '{}' is not a correct relation".format(relation))
+            if (synset_id1, synset_id2) in new_edges or self._edge_label(synset_id1, synset_id2) is not None:
+                raise WordNetError("There's already a relation from the synset with id '{}' to the synset with id '{}'"
+                                   .format(synset_id1, synset_id2))
+            new_edges.add((synset_id1, synset_id2))
+
+        # the storage is written first, so that if it refuses a change (i.e. a read-only backend) the indexes and the
+        # relation types are left untouched
+        with _gc_paused():
+            for synset_id, synset in new_synsets.items():
+                synsets[synset_id] = synset
+            self._add_nodes(new_synsets)
+            self._add_edges(batch.relations)
+
+            self._relation_types.update(batch.relation_types)
+            self._index_literals(new_synsets.values())
+            for synset_id, synset in new_synsets.items():
+                self._attach_synset(synset)
+                if len(self._id_counters) > 0:
+                    self._count_synset_id(synset_id)
+                if self._attribute_indexes is not None:
+                    self._index_attributes(synset)
+                if synset.sentiwn is not None:
+                    self._sentiwn_indexes = None
+            if len(new_synsets) > 0:
+                self._mwe_trie = None
+                self._definition_indexes.clear()
+
+        if self._journal is not None:
+            for relation_type in batch.relation_types:
+                self._journal.append({"op": "add_relation_type", "relation": relation_type})
+            for synset_id, synset in new_synsets.items():
+                record = synset_to_record(synset)
+                del record['id']
+                self._journal.append({"op": "upsert_synset", "id": synset_id, "fields": record})
+            for synset_id1, synset_id2, relation in batch.relations:
+                self._journal.append({"op": "add_relation", "source": synset_id1, "target": synset_id2,
+                                      "relation": relation})
 
     def add_synset(self, synset: Synset):
         """
@@ -539,18 +1748,30 @@ class RoWordNet(object):
         if not isinstance(synset, Synset):
             raise TypeError("Argument 'synset' has incorrect type, expected Synset, got {}"
                             .format(type(synset).__name__))
+        if self._batch is not None:
+            self._batch.synsets.append(synset)
+            return
         if synset.id in self._synsets:
             raise WordNetError("Synset with id '{}' is already in the wordnet".format(synset.id))
 
-        self._graph.add_node(synset.id)
+        self._add_nodes((synset.id,))
         self._synsets[synset.id] = synset
-        for literal in synset.literals:
-            self._literal2synset[literal].append(synset.id)
-            self._literal2synset_strict[literal].append(synset.id)
-            literal_parts = literal.split('_')
-            if len(literal_parts) > 1:  # add composing words for multi-word literals in non-strict index
-                for literal_part in literal_parts:
-                    self._literal2synset[literal_part].append(synset.id)
+        if len(self._id_counters) > 0:
+            self._count_synset_id(synset.id)
+        self._attach_synset(synset)
+        self._mwe_trie = None
+        self._definition_indexes.clear()
+        if self._attribute_indexes is not None:
+            self._index_attributes(synset)
+        if synset.sentiwn is not None:
+            self._sentiwn_indexes = None
+        for literal, sense in zip(synset.literals, synset.literals_senses):
+            self._index_literal(synset.id, literal)
+            self._index_sense(synset.id, literal, sense)
+        if self._journal is not None:
+            record = synset_to_record(synset)
+            del record['id']
+            self._journal.append({"op": "upsert_synset", "id": synset.id, "fields": record})
 
     def add_relation(self, synset_id1: str, synset_id2: str, relation: str):
         """
@@ -575,17 +1796,23 @@ class RoWordNet(object):
         if not isinstance(relation, str):
             raise TypeError("Argument 'relation' has incorrect type, expected str, got {}"
                             .format(type(relation).__name__))
+        if self._batch is not None:
+            self._batch.relations.append((synset_id1, synset_id2, relation))
+            return
         if synset_id1 not in self._synsets:
             raise WordNetError("Synset with id '{}' is not in the wordnet".format(synset_id1))
         if synset_id2 not in self._synsets:
             raise WordNetError("Synset with id '{}' is not in the wordnet".format(synset_id2))
         if relation not in self._relation_types:
             raise WordNetError("Relation '{}' is not a correct relation".format(relation))
-        if self._graph.has_edge(synset_id1, synset_id2):
+        if self._edge_label(synset_id1, synset_id2) is not None:
             raise WordNetError("There's already a relation from the synset with id '{}' to the synset with id '{}'"
                                .format(synset_id1, synset_id2))
 
-        self._graph.add_edge(synset_id1, synset_id2, label=relation)
+        self._add_edge(synset_id1, synset_id2, relation)
+        if self._journal is not None:
+            self._journal.append({"op": "add_relation", "source": synset_id1, "target": synset_id2,
+                                  "relation": relation})
 
     def remove_relation(self, synset_id1: str, synset_id2: str):
         """
@@ -605,15 +1832,186 @@ class RoWordNet(object):
         if not isinstance(synset_id2, str):
             raise TypeError("Argument 'synset_id2' has incorrect type, expected str, got {}"
                             .format(type(synset_id2).__name__))
+        if self._batch is not None:
+            raise WordNetError("Relations and synsets can't be removed inside a batch")
         if synset_id1 not in self._synsets:
             raise WordNetError("Synset with id '{}' is not in the wordnet".format(synset_id1))
         if synset_id2 not in self._synsets:
             raise WordNetError("Synset with id '{}' is not in the wordnet".format(synset_id2))
-        if not self._graph.has_edge(synset_id1, synset_id2):
+        relation = self._edge_label(synset_id1, synset_id2)
+        if relation is None:
             raise WordNetError("There's no relation from the synset with id '{}' to the synset with id '{}'"
                                .format(synset_id1, synset_id2))
 
-        self._graph.remove_edge(synset_id1, synset_id2)
+        self._remove_edge(synset_id1, synset_id2)
+        if self._journal is not None:
+            self._journal.append({"op": "remove_relation", "source": synset_id1, "target": synset_id2,
+                                  "relation": relation})
+
+    def remove_synset(self, synset_id: str):
+        """
+            Remove a synset from the wordnet, together with all its relations.
+            Args:
+                synset_id (str): Id of the synset.
+            Raises:
+                TypeError: If any argument has incorrect type.
+                WordNetError: If there's no synset with the given id in the wordnet.
+        """
+
+        if not isinstance(synset_id, str):
+            raise TypeError("Argument 'synset_id' has incorrect type, expected str, got {}"
+                            .format(type(synset_id).__name__))
+        if self._batch is not None:
+            raise WordNetError("Relations and synsets can't be removed inside a batch")
+        if synset_id not in self._synsets:
+            raise WordNetError("Synset with id '{}' is not in the wordnet".format(synset_id))
+
+        synset = self._synsets.pop(synset_id)
+        self._detach_synset(synset)
+        self._remove_node(synset_id)
+
+        for literal, sense in zip(synset.literals, synset.literals_senses):
+            self._unindex_literal(synset_id, literal)
+            self._unindex_sense(synset_id, literal, sense)
+        self._mwe_trie = None
+        self._definition_indexes.clear()
+        if self._attribute_indexes is not None:
+            self._unindex_attributes(synset)
+        if synset.sentiwn is not None:
+            self._sentiwn_indexes = None
+        if self._journal is not None:
+            self._journal.append({"op": "delete_synset", "id": synset_id})
+
+    def apply_patch(self, patch):
+        """
+            Apply a patch, as computed by rowordnet.patch.diff, to this wordnet. Only the synsets and relations named in
+            the patch are touched and the indexes are updated incrementally for them. Changed synsets are updated in
+            place, so the Synset objects already handed out see the new values.
+            Args:
+                patch (str or iterable of dict): A patch file written by rowordnet.patch.write_patch or an iterable of
+                    patch operations.
+            Returns:
+                int: The number of operations applied.
+            Raises:
+                TypeError: If any argument has incorrect type.
+                WordNetError: If an operation is unknown or can't be applied to this wordnet.
+        """
+
+        if isinstance(patch, str):
+            operations = read_patch(patch)
+        elif hasattr(patch, '__iter__'):
+            operations = patch
+        else:
+            raise TypeError("Argument 'patch' has incorrect type, expected str or iterable, got {}"
+                            .format(type(patch).__name__))
+
+        count = 0
+        for operation in operations:
+            op = operation.get('op')
+            if op == 'upsert_synset':
+                fields = record_to_fields(operation['fields'])
+                if operation['id'] not in self._synsets:
+                    self.add_synset(Synset(operation['id'], **fields))
+                else:
+                    self._writable_synset(operation['id'])._update(fields)
+            elif op == 'delete_synset':
+                self.remove_synset(operation['id'])
+            elif op == 'add_relation':
+                self.add_relation(operation['source'], operation['target'], operation['relation'])
+            elif op == 'remove_relation':
+                if not self.relation_exists(operation['source'], operation['target'], operation['relation']):
+                    raise WordNetError("There's no '{}' relation from the synset with id '{}' to the synset with id "
+                                       "'{}'".format(operation['relation'], operation['source'], operation['target']))
+                self.remove_relation(operation['source'], operation['target'])
+            elif op == 'add_relation_type':
+                if operation['relation'] not in self._relation_types:
+                    self.add_relation_type(operation['relation'])
+            else:
+                raise WordNetError("Unknown patch operation '{}'".format(op))
+            count += 1
+
+        return count
+
+    def open_journal(self, filename: str, sync: bool = False):
+        """
+            Attach a write-ahead journal to the wordnet. The changes already in the journal are replayed first, then
+            every change made to the wordnet (to its synsets, relations and relation types) is appended to the journal
+            as soon as it's made. The journal is emptied by compact_journal, which saves a new snapshot.
+            Example:
+                wn = RoWordNet("snapshot.pickle")
+                wn.open_journal("snapshot.journal")
+                ...  # edit the wordnet; every edit is persisted right away
+                wn.compact_journal("snapshot.pickle")
+
+            Args:
+                filename (str): The journal file. It's created if it doesn't exist.
+                sync (bool, optional): Call fsync after every change, so that the journal survives a power loss and not
+                    only a crash of the process. Much slower. Defaults to False.
+            Returns:
+                int: The number of changes replayed from the journal.
+            Raises:
+                TypeError: If any argument has incorrect type.
+                WordNetError: If a journal is already open, if the file is not a journal of this wordnet's snapshot or
+                    if a change can't be replayed.
+        """
+
+        if not isinstance(filename, str):
+            raise TypeError("Argument 'filename' has incorrect type, expected str, got {}"
+                            .format(type(filename).__name__))
+        if not isinstance(sync, bool):
+            raise TypeError("Argument 'sync' has incorrect type, expected bool, got {}".format(type(sync).__name__))
+        if self._journal is not None:
+            raise WordNetError("A journal is already open: '{}'".format(self._journal.filename))
+
+        journal = Journal(filename, self._journal_generation, sync=sync)
+        try:
+            count = self.apply_patch(journal.replay())
+        except Exception:
+            journal.close()
+            raise
+
+        self._journal = journal
+        return count
+
+    def compact_journal(self, filename: str):
+        """
+            Fold the open journal into a new binary snapshot of the wordnet and empty the journal. The snapshot is
+            written to a temporary file and then moved over the given one, and it carries a new generation number, so a
+            crash at any point leaves either the old snapshot with its journal or the new snapshot.
+            Args:
+                filename (str): The file where the snapshot will be saved.
+            Raises:
+                TypeError: If any argument has incorrect type.
+                WordNetError: If there's no open journal.
+        """
+
+        if not isinstance(filename, str):
+            raise TypeError("Argument 'filename' has incorrect type, expected str, got {}"
+                            .format(type(filename).__name__))
+        if self._journal is None:
+            raise WordNetError("There's no open journal")
+
+        self._journal_generation += 1
+        temporary_filename = filename + ".tmp"
+        try:
+            self._save_to_binary(temporary_filename)
+            with open(temporary_filename, "rb") as f:
+                os.fsync(f.fileno())
+            os.replace(temporary_filename, filename)
+        except BaseException:
+            self._journal_generation -= 1
+            raise
+
+        self._journal.reset(self._journal_generation)
+
+    def close_journal(self):
+        """
+            Detach the journal from the wordnet. The changes made afterwards are not persisted anymore.
+        """
+
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
 
     def synset_to_hypernym_root(self, synset_id: str):
         """
@@ -633,21 +2031,25 @@ class RoWordNet(object):
         if synset_id not in self._synsets:
             raise WordNetError("Synset with id '{}' is not in the wordnet".format(synset_id))
 
-        synset_id_ancestor = synset_id
         synset_id_to_root = [synset_id]
-
+        synset_id_ancestor = self._hypernym(synset_id)
         while synset_id_ancestor is not None:
-            adj_synsets = self._hypernym_graph[synset_id_ancestor]
-            synset_id_ancestor = None
-
-            for adj_synset_id, adj_synset_data in adj_synsets.items():
-                if adj_synset_data['label'] == 'hypernym':
-                    synset_id_to_root.append(adj_synset_id)
-                    synset_id_ancestor = adj_synset_id
-                    break
+            synset_id_to_root.append(synset_id_ancestor)
+            synset_id_ancestor = self._hypernym(synset_id_ancestor)
 
         return synset_id_to_root
 
+    def _hypernym(self, synset_id: str):
+        # the first hypernym of the synset, None for the root of a hypernym tree
+        for adj_synset_id, relation in self._outbound(synset_id, hypernym=True):
+            if relation == 'hypernym':
+                return adj_synset_id
+        return None
+
+    def _hypernym_depth(self, synset_id: str):
+        # the length of the path from the synset to the root of its hypernym tree, the synset included
+        return len(self.synset_to_hypernym_root(synset_id))
+
     def lowest_hypernym_common_ancestor(self, synset_id1: str, synset_id2: str):
         """
             Find the lowest common ancestor of two synsets in a specified tree.
@@ -692,21 +2094,19 @@ class RoWordNet(object):
         marked_synsets_id = [synset_id]
         from_synsets_rel = dict()
 
-        for adj_synset_id, data in self._graph.adj[synset_id].items():
-            from_synsets_rel[adj_synset_id] = (data['label'], synset_id)
+        for adj_synset_id, relation in self._outbound(synset_id):
+            from_synsets_rel[adj_synset_id] = (relation, synset_id)
             queue.put(adj_synset_id)
             marked_synsets_id.append(adj_synset_id)
 
         while not queue.empty():
             cur_synset_id = queue.get()
 
-            adj_synsets_id = self._graph.adj[cur_synset_id]
-
-            for adj_synset_id, data in adj_synsets_id.items():
+            for adj_synset_id, relation in self._outbound(cur_synset_id):
                 if adj_synset_id not in marked_synsets_id:
                     marked_synsets_id.append(adj_synset_id)
                     queue.put(adj_synset_id)
-                    from_synsets_rel[adj_synset_id] = (data['label'], cur_synset_id)
+                    from_synsets_rel[adj_synset_id] = (relation, cur_synset_id)
 
             yield cur_synset_id, from_synsets_rel[cur_synset_id][0], from_synsets_rel[cur_synset_id][1]
 
@@ -741,7 +2141,7 @@ class RoWordNet(object):
             raise WordNetError("Synset with id '{}' is not in the wordnet".format(synset_id2))
 
         if relations is None:
-            return nx.shortest_path(self._graph, synset_id1, synset_id2)
+            return self._shortest_path(synset_id1, synset_id2)
         else:
             if not isinstance(relations, set):
                 raise TypeError("Argument 'relations' has incorrect type, expected set, got {}"
@@ -755,7 +2155,7 @@ class RoWordNet(object):
                     raise WordNetError("Relation '{}' is not a correct relation".format(relation))
 
             if relations == {"hypernym", "hyponym"}:
-                return nx.shortest_path(self._hypernym_graph, synset_id1, synset_id2)
+                return self._shortest_path(synset_id1, synset_id2, hypernym=True)
             else:
                 raise NotImplemented("The current set of relations is not supported anymore by the function.")
 
@@ -793,8 +2193,8 @@ class RoWordNet(object):
             shortest_path_distance = len(self.shortest_path(synset_id1, synset_id2, relations={"hypernym", "hyponym"}))
         except nx.exception.NetworkXNoPath:
             if simulate_root:
-                depth_synset1 = len(self.synset_to_hypernym_root(synset_id1))
-                depth_synset2 = len(self.synset_to_hypernym_root(synset_id2))
+                depth_synset1 = self._hypernym_depth(synset_id1)
+                depth_synset2 = self._hypernym_depth(synset_id2)
 
                 shortest_path_distance = depth_synset1 + depth_synset2 + 2
             else:
@@ -834,8 +2234,8 @@ class RoWordNet(object):
 
         lcs_synset = self.lowest_hypernym_common_ancestor(synset_id1, synset_id2)
 
-        depth_synset1 = len(self.synset_to_hypernym_root(synset_id1))
-        depth_synset2 = len(self.synset_to_hypernym_root(synset_id2))
+        depth_synset1 = self._hypernym_depth(synset_id1)
+        depth_synset2 = self._hypernym_depth(synset_id2)
 
         if lcs_synset is None:
             if simulate_root:
@@ -845,21 +2245,40 @@ class RoWordNet(object):
             else:
                 return None
         else:
-            depth_lcs_synset = len(self.synset_to_hypernym_root(lcs_synset))
+            depth_lcs_synset = self._hypernym_depth(lcs_synset)
 
         return 2 * depth_lcs_synset / (depth_synset1 + depth_synset2)
 
-    def _hypernym_tree_height(self, root_id):
-        depths = []
-
-        for adj_synset_id, data in self._graph.adj[root_id].items():
-            if data['label'] == 'hyponym':
-                depths.append(self._hypernym_tree_height(adj_synset_id))
-
-        if len(depths) == 0:
-            return 0
+    def _hypernym_height(self):
+        # the height of the hypernym taxonomy: the height of the tree under the root synset of a full wordnet, or, for
+        # any other wordnet (i.e. a subset of the full one), of the highest tree under a synset without hypernyms
+        if _root_id in self._synsets:
+            return self._hypernym_tree_height(_root_id)
+        roots = [synset_id for synset_id in self._synsets
+                 if all(relation != 'hypernym' for _, relation in self._outbound(synset_id))]
+        return self._hypernym_tree_height(*roots)
+
+    def _hypernym_tree_height(self, *root_ids):
+        # the length of the longest chain of hyponyms that starts at any of the roots. The synsets are visited depth
+        # first, with a stack instead of recursion, and each one only once: a synset with several hypernyms keeps the
+        # height computed the first time it's reached. A cycle of hyponyms is cut where it closes.
+        hyponyms = {}
+        heights = {}
+        stack = list(root_ids)
+        while stack:
+            synset_id = stack[-1]
+            if synset_id in heights:
+                stack.pop()
+            elif synset_id not in hyponyms:
+                hyponyms[synset_id] = [adj_synset_id for adj_synset_id, relation in self._outbound(synset_id)
+                                       if relation == 'hyponym']
+                stack.extend(adj_synset_id for adj_synset_id in hyponyms[synset_id] if adj_synset_id not in hyponyms)
+            else:
+                stack.pop()
+                heights[synset_id] = max((heights[adj_synset_id] + 1 for adj_synset_id in hyponyms[synset_id]
+                                          if adj_synset_id in heights), default=0)
 
-        return max(depths) + 1
+        return max((heights[root_id] for root_id in root_ids), default=0)
 
     def lch_similarity(self, synset_id1: str, synset_id2: str, simulate_root: bool = True):
         """
@@ -873,8 +2292,8 @@ class RoWordNet(object):
                        -log ((dist(synset1,synset2)+1) / (2 * maximum taxonomy depth)) otherwise.
             Raises:
                 TypeError: If any argument has incorrect type.
-                WordNetError: If there's no synset with the given ids in the wordnet or if any relation has an incorrect
-                    value.
+                WordNetError: If there's no synset with the given ids in the wordnet, if any relation has an incorrect
+                    value or if the wordnet has no hypernym relations.
         """
         if not isinstance(synset_id1, str):
             raise TypeError("Argument 'synset_id1' has incorrect type, expected str, got {}"
@@ -888,14 +2307,16 @@ class RoWordNet(object):
         if synset_id2 not in self._synsets:
             raise WordNetError("Synset with id '{}' is not in the wordnet".format(synset_id2))
 
+        if self._max_hypernym_height is None:
+            self._max_hypernym_height = self._hypernym_height()
         max_hypernym_height = self._max_hypernym_height
 
         try:
             shortest_path_distance = len(self.shortest_path(synset_id1, synset_id2, relations={"hypernym", "hyponym"}))
         except nx.exception.NetworkXNoPath:
             if simulate_root:
-                depth_synset1 = len(self.synset_to_hypernym_root(synset_id1))
-                depth_synset2 = len(self.synset_to_hypernym_root(synset_id2))
+                depth_synset1 = self._hypernym_depth(synset_id1)
+                depth_synset2 = self._hypernym_depth(synset_id2)
 
                 shortest_path_distance = depth_synset1 + depth_synset2 + 2
 
@@ -903,10 +2324,26 @@ class RoWordNet(object):
             else:
                 return None
 
+        if max_hypernym_height == 0:
+            raise WordNetError("The wordnet has no hypernym relations, the lch similarity needs them")
         return - math.log2((shortest_path_distance + 1) / (2 * max_hypernym_height))
 
 
 def intersection(wordnet_1, wordnet_2):
+    """
+        Get a wordnet with the synsets that are identical in both wordnets, the relation types of both wordnets and the
+        relations of the first wordnet between those synsets. The result is not a copy: its synsets are the synset
+        objects of the first wordnet, so editing a synset of either wordnet edits it in both (and both keep their
+        literal indexes up to date). Copy a synset before editing it to keep the wordnets apart.
+        Args:
+            wordnet_1 (RoWordNet): The first wordnet.
+            wordnet_2 (RoWordNet): The second wordnet.
+        Returns:
+            RoWordNet: The intersection of the two wordnets.
+        Raises:
+            TypeError: If any argument has incorrect type.
+    """
+
     if not isinstance(wordnet_1, RoWordNet):
         raise TypeError("Argument 'wordnet_1' has incorrect type, expected RoWordNet, got {}"
                         .format(type(wordnet_1).__name__))
@@ -914,34 +2351,34 @@ def intersection(wordnet_1, wordnet_2):
         raise TypeError("Argument 'wordnet_2' has incorrect type, expected RoWordNet, got {}"
                         .format(type(wordnet_2).__name__))
 
-    intersection_wordnet = RoWordNet(empty=True)
-
-    for synset_id in wordnet_1.synsets():
-        synset = wordnet_1.synset(synset_id)
-        if wordnet_2.synset_exists(synset):
-            intersection_wordnet.add_synset(synset)
-
-    relations_type_wn1 = wordnet_1.relation_types
-    relations_type_wn2 = wordnet_2.relation_types
+    synsets_2 = wordnet_2._synsets
+    synsets = [synset for synset_id, synset in wordnet_1._synsets.items()
+               if synset_id in synsets_2 and synsets_2[synset_id].fingerprint == synset.fingerprint]
+    synsets_id = {synset.id for synset in synsets}
 
-    for relation_type_wn1 in relations_type_wn1:
-        for relation_type_wn2 in relations_type_wn2:
-            if relation_type_wn1 == relation_type_wn2:
-                intersection_wordnet.add_relation_type(relation_type_wn1)
-                break
+    relation_types = wordnet_1.relation_types & wordnet_2.relation_types
+    relations = [(synset_id1, synset_id2, relation) for synset_id1, synset_id2, relation in wordnet_1._edges()
+                 if synset_id1 in synsets_id and synset_id2 in synsets_id and relation in relation_types]
 
-    for synset_id in wordnet_1.synsets():
-        relations_wn1 = wordnet_1.outbound_relations(synset_id)
-        for relation_wn1 in relations_wn1:
-            try:
-                intersection_wordnet.add_relation(synset_id, relation_wn1[0], relation_wn1[1])
-            except WordNetError:
-                pass
-
-    return intersection_wordnet
+    return RoWordNet._from_parts(synsets, relation_types, relations)
 
 
 def merge(wordnet_1: RoWordNet, wordnet_2: RoWordNet):
+    """
+        Get a wordnet with the synsets, relation types and relations of both wordnets. If a synset or a relation between
+        two synsets is in both wordnets, the one from the second wordnet is kept. The result is not a copy: its
+        synsets are the synset objects of the two wordnets, so editing a synset of the result edits it in the wordnet
+        it came from too (and both keep their literal indexes up to date). Copy a synset before editing it to keep the
+        wordnets apart.
+        Args:
+            wordnet_1 (RoWordNet): The first wordnet.
+            wordnet_2 (RoWordNet): The second wordnet.
+        Returns:
+            RoWordNet: The union of the two wordnets.
+        Raises:
+            TypeError: If any argument has incorrect type.
+    """
+
     if not isinstance(wordnet_1, RoWordNet):
         raise TypeError("Argument 'wordnet_1' has incorrect type, expected RoWordNet, got {}"
                         .format(type(wordnet_1).__name__))
@@ -949,49 +2386,36 @@ def merge(wordnet_1: RoWordNet, wordnet_2: RoWordNet):
         raise TypeError("Argument 'wordnet_2' has incorrect type, expected RoWordNet, got {}"
                         .format(type(wordnet_2).__name__))
 
-    new_wordnet = RoWordNet(empty=True)
+    synsets_2 = wordnet_2._synsets
+    synsets = list(synsets_2.values())
+    synsets.extend(synset for synset_id, synset in wordnet_1._synsets.items() if synset_id not in synsets_2)
+    synsets_id = {synset.id for synset in synsets}
 
-    # copying the second wordnet
-    for synset_id in wordnet_2.synsets():
-        synset = wordnet_2.synset(synset_id)
-        new_wordnet.add_synset(synset)
+    relation_types = wordnet_2.relation_types | wordnet_1.relation_types
+    relations = [(synset_id1, synset_id2, relation) for synset_id1, synset_id2, relation in wordnet_2._edges()
+                 if synset_id2 in synsets_id]
+    linked_pairs = {(synset_id1, synset_id2) for synset_id1, synset_id2, _ in relations}
+    relations.extend((synset_id1, synset_id2, relation)
+                     for synset_id1, synset_id2, relation in wordnet_1._edges()
+                     if synset_id2 in synsets_id and (synset_id1, synset_id2) not in linked_pairs)
 
-    relations_type = wordnet_2.relation_types
-    for relation_type in relations_type:
-        new_wordnet.add_relation_type(relation_type)
-
-    for synset_id in wordnet_2.synsets():
-        relations = wordnet_2.outbound_relations(synset_id)
-        for relation in relations:
-            new_wordnet.add_relation(synset_id, relation[0], relation[1])
-
-    # add the first wordnet
-    relations_type = wordnet_1.relation_types
-    for relation_type in relations_type:
-        try:
-            new_wordnet.add_relation_type(relation_type)
-        except WordNetError:
-            pass
-
-    for synset_id in wordnet_1.synsets():
-        try:
-            synset = wordnet_1.synset(synset_id)
-            new_wordnet.add_synset(synset)
-        except WordNetError:
-            pass
-
-    for synset_id in wordnet_1.synsets():
-        relations = wordnet_1.outbound_relations(synset_id)
-        for relation in relations:
-            try:
-                new_wordnet.add_relation(synset_id, relation[0], relation[1])
-            except WordNetError:
-                pass
-
-    return new_wordnet
+    return RoWordNet._from_parts(synsets, relation_types, relations)
 
 
 def difference(wordnet_1, wordnet_2):
+    """
+        Get what the second wordnet adds or changes compared to the first one.
+        Args:
+            wordnet_1 (RoWordNet): The first wordnet.
+            wordnet_2 (RoWordNet): The second wordnet.
+        Returns:
+            tuple: A set with the ids of the synsets that are only in the second wordnet or that are different in the
+                two wordnets, and a set of (synset_id1, relation, synset_id2) tuples with the relations that are only in
+                the second wordnet. Any of them is None if it's empty.
+        Raises:
+            TypeError: If any argument has incorrect type.
+    """
+
     if not isinstance(wordnet_1, RoWordNet):
         raise TypeError("Argument 'wordnet_1' has incorrect type, expected RoWordNet, got {}"
                         .format(type(wordnet_1).__name__))
@@ -999,26 +2423,15 @@ def difference(wordnet_1, wordnet_2):
         raise TypeError("Argument 'wordnet_2' has incorrect type, expected RoWordNet, got {}"
                         .format(type(wordnet_2).__name__))
 
-    diff_synsets = set()
-    diff_relations = set()
+    synsets_1 = wordnet_1._synsets
+    with _gc_paused():
+        diff_synsets = {synset_id for synset_id, synset in wordnet_2._synsets.items()
+                        if synset_id not in synsets_1 or synsets_1[synset_id].fingerprint != synset.fingerprint}
 
-    for synset_id in wordnet_2.synsets():
-        try:
-            synset1 = wordnet_1.synset(synset_id)
-            synset2 = wordnet_2.synset(synset_id)
-            if synset1 != synset2:
-                diff_synsets.add(synset_id)
-        except WordNetError:
-            diff_synsets.add(synset_id)
-
-    for synset_id in wordnet_2.synsets():
-        relations = wordnet_2.outbound_relations(synset_id)
-        for relation in relations:
-            try:
-                if not wordnet_1.relation_exists(synset_id, relation[0], relation[1]):
-                    diff_relations.add((synset_id, relation[1], relation[0]))
-            except WordNetError:
-                diff_relations.add((synset_id, relation[1], relation[0]))
+        relations_1 = {(synset_id1, relation, synset_id2)
+                       for synset_id1, synset_id2, relation in wordnet_1._edges()
+                       if synset_id2 in synsets_1 and relation in wordnet_1.relation_types}
+        diff_relations = {(synset_id1, relation, synset_id2)
+                          for synset_id1, synset_id2, relation in wordnet_2._edges()} - relations_1
 
     return diff_synsets if len(diff_synsets) > 0 else None, diff_relations if len(diff_relations) > 0 else None
-
@@ -0,0 +1,200 @@
+import os
+import json
+import math
+import signal
+import asyncio
+import argparse
+import functools
+
+from .rowordnet import RoWordNet
+from . import workers as _workers
+
+
+class _Batcher(object):
+    # collects the CPU-heavy calls that arrive within batch_window of each other (at most max_batch of them) and runs
+    # them together, so that a pool round trip is paid once per chunk of a batch (see Server._run_calls) instead of
+    # once per request
+    def __init__(self, run, batch_window: float, max_batch: int):
+        self._run = run
+        self._batch_window = batch_window
+        self._max_batch = max_batch
+        self._pending = []
+        self._timer = None
+
+    def submit(self, method: str, params: dict):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((method, params, future))
+        if len(self._pending) >= self._max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self._batch_window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if pending:
+            asyncio.ensure_future(self._run_batch(pending))
+
+    async def _run_batch(self, pending: list):
+        try:
+            responses = await self._run([(method, params) for method, params, _ in pending])
+        except Exception as e:
+            responses = [{'error': {'type': type(e).__name__, 'message': str(e)}}] * len(pending)
+        for (_, _, future), response in zip(pending, responses):
+            if not future.done():
+                future.set_result(response)
+
+
+class Server(object):
+    def __init__(self, wordnet: RoWordNet, workers: int = 0, batch_window: float = 0.002, max_batch: int = 64):
+        """
+            A JSON query server over a wordnet, so that many processes can share one loaded wordnet. The protocol is
+            newline-delimited JSON over TCP: every request is a line like
+
+                {"id": 1, "method": "wup_similarity", "params": {"synset_id1": "...", "synset_id2": "..."}}
+
+            and gets back a line with the same id and either a "result" or an "error" with its "type" and "message".
+            The methods are synsets, synset, outbound_relations, inbound_relations, relations, bfwalk, shortest_path,
+            path_similarity, wup_similarity and lch_similarity, with the arguments of the RoWordNet methods (see
+            workers.call). A connection can send many requests without waiting for the responses, which come back in
+            the order they are ready.
+            The index lookups are answered right away. The walks, paths and similarities are micro-batched and run by
+            a pool of worker processes, each batch split in one chunk per worker, or by a thread if there are no
+            workers.
+
+            Args:
+                wordnet (RoWordNet): The wordnet to serve.
+                workers (int, optional): The number of worker processes. Defaults to 0.
+                batch_window (float, optional): How long, in seconds, a heavy call waits for others to be batched with.
+                    Defaults to 0.002.
+                max_batch (int, optional): The maximum number of calls in a batch. Defaults to 64.
+        """
+
+        self.wordnet = wordnet
+        self.workers = workers
+        self._pool = _workers.worker_pool(wordnet, workers) if workers > 0 else None
+        self._batcher = _Batcher(self._run_calls, batch_window, max_batch)
+        self._server = None
+
+    async def _run_calls(self, calls: list):
+        loop = asyncio.get_running_loop()
+        if self._pool is None:
+            return await loop.run_in_executor(None, functools.partial(_workers.call_all, self.wordnet, calls))
+        # one chunk per worker, so that the heavy calls of a batch run in parallel
+        chunk_size = math.ceil(len(calls) / self.workers)
+        chunks = [calls[i:i + chunk_size] for i in range(0, len(calls), chunk_size)]
+        responses = await asyncio.gather(*(loop.run_in_executor(self._pool, _workers.run_calls, chunk)
+                                           for chunk in chunks))
+        return [response for chunk_responses in responses for response in chunk_responses]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765):
+        """
+            Start listening.
+            Args:
+                host (str, optional): The address to listen on. Defaults to "127.0.0.1".
+                port (int, optional): The port, 0 for any free port. Defaults to 8765.
+            Returns:
+                tuple: The (host, port) the server listens on.
+        """
+
+        if self._pool is not None:
+            # start the workers now, not on the first request
+            await asyncio.get_running_loop().run_in_executor(self._pool, _workers.call_all, None, [])
+        self._server = await asyncio.start_server(self._handle, host, port, limit=2 ** 20)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._pool is not None:
+            # wait for the workers in a thread, so the event loop keeps running the other tasks in the meantime
+            pool, self._pool = self._pool, None
+            await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+
+    async def _respond(self, line: bytes):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("A request must be a JSON object")
+            request_id = request.get('id')
+            method, params = request.get('method'), request.get('params', {})
+            entry = _workers.methods.get(method)
+            if entry is not None and entry[1]:
+                response = await self._batcher.submit(method, params)
+            else:
+                response = _workers.call(self.wordnet, method, params)
+        except Exception as e:
+            response = {'error': {'type': type(e).__name__, 'message': str(e)}}
+
+        response['id'] = request_id
+        return (json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        tasks = set()
+
+        async def respond(line):
+            writer.write(await self._respond(line))
+            await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(respond(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _serve(wordnet: RoWordNet, args):
+    server = Server(wordnet, workers=args.workers, batch_window=args.batch_window / 1000, max_batch=args.max_batch)
+    host, port = await server.start(args.host, args.port)
+    print("Serving on {}:{}".format(host, port), flush=True)
+
+    # stop cleanly on SIGINT and SIGTERM, so that the worker processes are shut down as well
+    stop = asyncio.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            asyncio.get_running_loop().add_signal_handler(signum, stop.set)
+        except NotImplementedError:  # i.e. on Windows
+            pass
+    try:
+        await stop.wait()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m rowordnet.serve",
+                                     description="Serve a wordnet over newline-delimited JSON, see Server.")
+    parser.add_argument("--filename", help="wordnet file to load, the bundled wordnet if missing")
+    parser.add_argument("--xml", action="store_true", help="load the wordnet from an xml file")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on, 0 for any (default: 8765)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) - 1),
+                        help="worker processes for walks, paths and similarities, 0 to use a thread")
+    parser.add_argument("--batch-window", type=float, default=2, help="micro-batching window in ms (default: 2)")
+    parser.add_argument("--max-batch", type=int, default=64, help="maximum calls in a batch (default: 64)")
+    args = parser.parse_args(argv)
+
+    wordnet = RoWordNet(args.filename, xml=args.xml)
+    try:
+        asyncio.run(_serve(wordnet, args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
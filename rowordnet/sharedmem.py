@@ -0,0 +1,492 @@
+import json
+import zlib
+import threading
+import networkx as nx
+from array import array
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+from .rowordnet import RoWordNet, _bidirectional_shortest_path
+from .columns import StringColumn, _encode_header, _decode_header, _alignment
+from .exceptions import WordNetError
+from .records import synset_to_record, synset_from_record
+
+
+_magic = b"RWNSHM01"
+_read_only = "A shared wordnet is read-only, use an overlay of it to make changes"
+
+# the literal indexes, see RoWordNet._lookup_literal and RoWordNet._lookup_senses
+_indexes = ('literals', 'strict', 'senses')
+
+
+def _sense_key(literal: str, sense: str):
+    return "{}\0{}".format(literal, sense)
+
+
+def _hash_slots(keys: list):
+    # open addressing hash table of the indexes of the (utf-8 encoded) keys, -1 for an empty slot. The hash must be the
+    # same in every process, so it's crc32 and not hash().
+    size = 1 << max(1, (2 * len(keys) - 1).bit_length())
+    mask = size - 1
+    slots = array('i', [-1]) * size
+    for i, key in enumerate(keys):
+        slot = zlib.crc32(key) & mask
+        while slots[slot] != -1:
+            slot = (slot + 1) & mask
+        slots[slot] = i
+    return slots
+
+
+class _HashIndex(object):
+    # the position of a key in a StringColumn, found through the slots built by _hash_slots
+    def __init__(self, keys: StringColumn, slots):
+        self.keys = keys
+        self._offsets = keys._offsets
+        self._data = keys._data
+        self._slots = slots
+        self._mask = len(slots) - 1
+
+    def find(self, key: str):
+        key = key.encode("utf-8")
+        offsets, data, slots, mask = self._offsets, self._data, self._slots, self._mask
+        slot = zlib.crc32(key) & mask
+        while True:
+            i = slots[slot]
+            if i == -1 or data[offsets[i]:offsets[i + 1]] == key:
+                return i
+            slot = (slot + 1) & mask
+
+
+def _pack_index(keys: dict, lookup, rows: dict):
+    # the keys of a literal index, with the rows of the synsets of each key back to back; keys maps each key to the
+    # arguments of the lookup that gives its synsets
+    encoded_keys = []
+    offsets = array('q', [0])
+    postings = array('i')
+    for key, args in keys.items():
+        synsets_id = lookup(*args)
+        if len(synsets_id) > 0:
+            encoded_keys.append(key.encode("utf-8"))
+            postings.extend(rows[synset_id] for synset_id in synsets_id)
+            offsets.append(len(postings))
+    column = StringColumn.from_strings(key.decode("utf-8") for key in encoded_keys)
+    return column, _hash_slots(encoded_keys), offsets, postings
+
+
+def _hypernyms(wordnet: RoWordNet, synsets_id: list, rows: dict):
+    # the row of RoWordNet._hypernym (-1 for a root) and RoWordNet._hypernym_depth of every synset, each hypernym chain
+    # being walked only once
+    parents = array('i', [-1]) * len(synsets_id)
+    for row, synset_id in enumerate(synsets_id):
+        hypernym_id = wordnet._hypernym(synset_id)
+        if hypernym_id is not None:
+            parents[row] = rows[hypernym_id]
+
+    depths = array('i', [0]) * len(synsets_id)
+    for row in range(len(synsets_id)):
+        chain = []
+        while row != -1 and depths[row] == 0:
+            chain.append(row)
+            depths[row] = -1
+            row = parents[row]
+        if row != -1 and depths[row] == -1:
+            raise WordNetError("The hypernym relations of synset '{}' form a cycle".format(synsets_id[row]))
+        depth = 0 if row == -1 else depths[row]
+        for row in reversed(chain):
+            depth += 1
+            depths[row] = depth
+    return parents, depths
+
+
+def _index_keys(synsets):
+    # the keys of each literal index, each mapped to the arguments of the lookup that gives its synsets
+    keys = {name: {} for name in _indexes}
+    for synset in synsets:
+        for literal, sense in zip(synset.literals, synset.literals_senses):
+            keys['strict'][literal] = (literal, True)
+            keys['literals'][literal] = (literal, False)
+            if '_' in literal:
+                for literal_part in literal.split('_'):
+                    keys['literals'][literal_part] = (literal_part, False)
+            keys['senses'][_sense_key(literal, sense)] = (literal, sense)
+    return keys
+
+
+def _pack(wordnet: RoWordNet):
+    # the header fields and the (name, typecode, buffer) arrays of a published wordnet
+    synsets_id = list(wordnet._synsets)
+    rows = {synset_id: row for row, synset_id in enumerate(synsets_id)}
+    records = []
+    synsets = []
+    for synset in wordnet._synsets.values():
+        records.append(json.dumps(synset_to_record(synset), ensure_ascii=False))
+        synsets.append(synset)
+    keys = _index_keys(synsets)
+
+    arrays = {}
+    ids = StringColumn.from_strings(synsets_id)
+    arrays['ids.offsets'], arrays['ids.data'] = ids._offsets, ids._data
+    arrays['ids.slots'] = _hash_slots([synset_id.encode("utf-8") for synset_id in synsets_id])
+    column = StringColumn.from_strings(records)
+    arrays['records.offsets'], arrays['records.data'] = column._offsets, column._data
+
+    # the relations in compressed sparse row format, by source and by target, for both graphs; the neighbours of a
+    # synset keep the order of the graph, so walks and paths give the same results as on the wordnet
+    labels = {}
+    for graph, hypernym in (('graph', False), ('hypernym', True)):
+        for direction, relations in (('out', wordnet._outbound), ('in', wordnet._inbound)):
+            offsets, adjacent, adjacent_labels = array('q', [0]), array('i'), array('H')
+            for synset_id in synsets_id:
+                for adj_synset_id, relation in relations(synset_id, hypernym):
+                    adjacent.append(rows[adj_synset_id])
+                    adjacent_labels.append(labels.setdefault(relation, len(labels)))
+                offsets.append(len(adjacent))
+            prefix = "{}.{}.".format(graph, direction)
+            arrays[prefix + 'offsets'], arrays[prefix + 'adjacent'], arrays[prefix + 'labels'] = \
+                offsets, adjacent, adjacent_labels
+
+    for name in _indexes:
+        lookup = wordnet._lookup_senses if name == 'senses' else wordnet._lookup_literal
+        column, slots, offsets, postings = _pack_index(keys[name], lookup, rows)
+        arrays[name + '.keys.offsets'], arrays[name + '.keys.data'] = column._offsets, column._data
+        arrays[name + '.slots'], arrays[name + '.postings.offsets'], arrays[name + '.postings'] = \
+            slots, offsets, postings
+
+    arrays['hypernyms'], arrays['depths'] = _hypernyms(wordnet, synsets_id, rows)
+
+    fields = {
+        "rows": len(synsets_id),
+        "labels": list(labels),
+        "relation_types": sorted(wordnet._relation_types),
+        "max_hypernym_height": getattr(wordnet, '_max_hypernym_height', 0),
+        "journal_generation": wordnet._journal_generation,
+    }
+    buffers = [(name, array_.typecode if isinstance(array_, array) else 'B', memoryview(array_).cast('B'))
+               for name, array_ in arrays.items()]
+    return fields, buffers
+
+
+def publish(wordnet: RoWordNet, name: str = None):
+    # see RoWordNet.publish
+    from multiprocessing import shared_memory
+
+    fields, buffers = _pack(wordnet)
+    header = _encode_header(_magic, buffers, fields)
+    size = len(header) + sum(-(-buffer.nbytes // _alignment) * _alignment for _, _, buffer in buffers)
+
+    block = shared_memory.SharedMemory(name, create=True, size=max(size, 1))
+    block.buf[:len(header)] = header
+    offset = len(header)
+    for _, _, buffer in buffers:
+        block.buf[offset:offset + buffer.nbytes] = buffer
+        offset += -(-buffer.nbytes // _alignment) * _alignment
+    return block
+
+
+def _attach(name: str):
+    # shared_memory is new in python 3.8, it's imported only when it's used, so that this module (see sqlitedb) can be
+    # imported without it
+    from multiprocessing import shared_memory
+
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        # before python 3.13 every process that attaches to a block registers it with its resource tracker, which
+        # unlinks the block when the process ends. The workers of a pool share the tracker of the process that started
+        # them, so for them this is harmless.
+        return shared_memory.SharedMemory(name)
+
+
+class _SynsetCache(object):
+    # the synsets last decoded from the records of a read-only wordnet (shared or sqlite), by id, so that repeated
+    # lookups skip the decoding and give the same object. The least recently used synset is dropped once there are more
+    # than size of them, and a synset changed by the caller is dropped at once (see SharedRoWordNet._synset_changed),
+    # so that the next lookup decodes the stored one again. While the wordnet is profiled, the hits and misses are
+    # counted as the 'synsets' cache.
+    def __init__(self, wordnet: RoWordNet, size: int = 4096):
+        self._wordnet_ref = wordnet._ref
+        self._refs = wordnet._refs
+        self._size = size
+        self._synsets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, synset_id: str):
+        with self._lock:
+            synset = self._synsets.get(synset_id)
+            if synset is not None:
+                self._synsets.move_to_end(synset_id)
+        if synset is not None:
+            self._count(True)
+        return synset
+
+    def add(self, synset):
+        self._count(False)
+        synset._wordnets = self._refs
+        with self._lock:
+            self._synsets[synset.id] = synset
+            if len(self._synsets) > self._size:
+                self._synsets.popitem(last=False)
+        return synset
+
+    def discard(self, synset):
+        with self._lock:
+            if self._synsets.get(synset.id) is synset:
+                del self._synsets[synset.id]
+
+    def _count(self, hit: bool):
+        wordnet = self._wordnet_ref()
+        if wordnet is not None and wordnet._profile is not None:
+            wordnet._profile.cache('synsets', hit)
+
+
+class _SharedSynsets(MutableMapping):
+    # the synsets of a shared wordnet, decoded from their records when they're asked for (see _SynsetCache), in the
+    # order of the published wordnet
+    def __init__(self, ids: _HashIndex, records: StringColumn, cache: _SynsetCache):
+        self._ids = ids
+        self._records = records
+        self.cache = cache
+
+    def __getitem__(self, synset_id):
+        synset = self.cache.get(synset_id) if isinstance(synset_id, str) else None
+        if synset is not None:
+            return synset
+        row = self._ids.find(synset_id) if isinstance(synset_id, str) else -1
+        if row == -1:
+            raise KeyError(synset_id)
+        return self.cache.add(synset_from_record(json.loads(self._records[row])))
+
+    def __contains__(self, synset_id):
+        return isinstance(synset_id, str) and self._ids.find(synset_id) != -1
+
+    def __setitem__(self, synset_id, synset):
+        raise WordNetError(_read_only)
+
+    def __delitem__(self, synset_id):
+        raise WordNetError(_read_only)
+
+    def __iter__(self):
+        return iter(self._ids.keys)
+
+    def __len__(self):
+        return len(self._ids.keys)
+
+
+class SharedRoWordNet(RoWordNet):
+    def __init__(self, name: str):
+        """
+            A read-only wordnet stored in a block of shared memory by RoWordNet.publish, usually created with
+            RoWordNet.attach(name). Any number of processes can attach to the same block: the relations, the literal
+            indexes and the hypernym depths are arrays that are read in place, so attaching costs the same no matter how
+            big the wordnet is and the memory is shared instead of copied in each process.
+            The synsets are decoded from the block when they're asked for, and the last 4096 of them are kept, so
+            repeated lookups give the same synset object. Changing a synset changes nothing in the block, and the next
+            lookup gives the stored synset again.
+            The methods that change the wordnet raise WordNetError; an overlay of a shared wordnet (see
+            RoWordNet.overlay) can be changed. A shared wordnet is pickled as the name of its block, so passing it to a
+            worker process just attaches the worker to the same block.
+            Before python 3.13, only the processes started by the one that published the block (i.e. the workers of a
+            pool) should attach to it, as any other process would remove the block when it ends.
+
+            Args:
+                name (str): The name of the block.
+            Raises:
+                TypeError: If any argument has incorrect type.
+                FileNotFoundError: If there's no block with the given name.
+                WordNetError: If the block doesn't hold a published wordnet.
+        """
+
+        if not isinstance(name, str):
+            raise TypeError("Argument 'name' has incorrect type, expected str, got {}".format(type(name).__name__))
+
+        super().__init__(empty=True)
+        self.name = name
+        self._block = None  # for __del__, if attaching fails
+        self._block = _attach(name)
+        layout = _decode_header(_magic, self._block.buf)
+        if layout is None:
+            self._block.close()
+            raise WordNetError("Shared memory block '{}' doesn't hold a wordnet".format(name))
+        header, raw = layout
+
+        def column(prefix):
+            return StringColumn(raw[prefix + '.offsets'], raw[prefix + '.data'])
+
+        self._ids = _HashIndex(column('ids'), raw['ids.slots'])
+        self._synsets = _SharedSynsets(self._ids, column('records'), _SynsetCache(self))
+        self._relation_types = set(header['relation_types'])
+        self._labels = header['labels']
+        self._max_hypernym_height = header['max_hypernym_height']
+        self._journal_generation = header['journal_generation']
+        self._adjacency = {}
+        for graph in ('graph', 'hypernym'):
+            for direction in ('out', 'in'):
+                prefix = "{}.{}.".format(graph, direction)
+                self._adjacency[(graph, direction)] = (raw[prefix + 'offsets'], raw[prefix + 'adjacent'],
+                                                       raw[prefix + 'labels'])
+        self._literal_indexes = {name: (_HashIndex(column(name + '.keys'), raw[name + '.slots']),
+                                        raw[name + '.postings.offsets'], raw[name + '.postings'])
+                                 for name in _indexes}
+        self._hypernyms = raw['hypernyms']
+        self._depths = raw['depths']
+
+    def __reduce__(self):
+        return SharedRoWordNet, (self.name,)
+
+    def close(self):
+        """
+            Detach from the block of shared memory. The wordnet can't be used anymore.
+        """
+
+        if self._block is None:
+            return
+        # the block can't be closed while there are views of it
+        for name in ('_ids', '_synsets', '_adjacency', '_literal_indexes', '_hypernyms', '_depths'):
+            setattr(self, name, None)
+        self._block.close()
+        self._block = None
+
+    def __del__(self):
+        if getattr(self, '_block', None) is not None:
+            self.close()
+
+    def _id(self, row: int):
+        offsets, data = self._ids._offsets, self._ids._data
+        return str(data[offsets[row]:offsets[row + 1]], "utf-8")
+
+    def _neighbours(self, synset_id: str, graph: str, direction: str):
+        # the (row, label code) of the neighbours of a synset
+        row = self._ids.find(synset_id)
+        if row == -1:
+            return (), ()
+        offsets, adjacent, labels = self._adjacency[(graph, direction)]
+        start, end = offsets[row], offsets[row + 1]
+        return adjacent[start:end], labels[start:end]
+
+    def _lookup(self, name: str, key: str):
+        index, offsets, postings = self._literal_indexes[name]
+        i = index.find(key)
+        if i == -1:
+            return []
+        return [self._id(row) for row in postings[offsets[i]:offsets[i + 1]]]
+
+    def _flatten(self):
+        # a plain wordnet with the same synsets and relations
+        wordnet = RoWordNet._from_parts(list(self._synsets.values()), self._relation_types, list(self._edges()))
+        wordnet._max_hypernym_height = self._max_hypernym_height
+        wordnet._journal_generation = self._journal_generation
+        return wordnet
+
+    def _save_to_binary(self, filename: str):
+        self._flatten()._save_to_binary(filename)
+
+    def load(self, filename: str, xml: bool = False, progress=None, format: str = None):
+        raise WordNetError(_read_only)
+
+    def reindex_literals(self):
+        raise WordNetError(_read_only)
+
+    def add_relation_type(self, relation_type: str):
+        raise WordNetError(_read_only)
+
+    def batch(self):
+        raise WordNetError(_read_only)
+
+    def _synset_changed(self, synset, *args):
+        # a synset was changed by the caller: the block is left as it is, and the next lookup decodes the synset again
+        if self._synsets is not None:
+            self._synsets.cache.discard(synset)
+
+    _synset_literals_replaced = _synset_literals_senses_changed = _synset_attribute_changed = _synset_changed
+
+    def _hypernym(self, synset_id: str):
+        row = self._hypernyms[self._ids.find(synset_id)]
+        return None if row == -1 else self._id(row)
+
+    def _hypernym_depth(self, synset_id: str):
+        return self._depths[self._ids.find(synset_id)]
+
+    # storage accessors, see RoWordNet
+
+    def _lookup_literal(self, literal: str, strict: bool):
+        return self._lookup('strict' if strict else 'literals', literal)
+
+    def _lookup_senses(self, literal: str, sense: str):
+        return self._lookup('senses', _sense_key(literal, sense))
+
+    def _strict_literals(self):
+        return self._literal_indexes['strict'][0].keys
+
+    def _outbound(self, synset_id: str, hypernym: bool = False):
+        rows, labels = self._neighbours(synset_id, 'hypernym' if hypernym else 'graph', 'out')
+        return [(self._id(row), self._labels[label]) for row, label in zip(rows, labels)]
+
+    def _inbound(self, synset_id: str, hypernym: bool = False):
+        rows, labels = self._neighbours(synset_id, 'hypernym' if hypernym else 'graph', 'in')
+        return [(self._id(row), self._labels[label]) for row, label in zip(rows, labels)]
+
+    def _successors(self, synset_id: str, hypernym: bool = False):
+        rows, _ = self._neighbours(synset_id, 'hypernym' if hypernym else 'graph', 'out')
+        return [self._id(row) for row in rows]
+
+    def _predecessors(self, synset_id: str, hypernym: bool = False):
+        rows, _ = self._neighbours(synset_id, 'hypernym' if hypernym else 'graph', 'in')
+        return [self._id(row) for row in rows]
+
+    def _shortest_path(self, synset_id1: str, synset_id2: str, hypernym: bool = False):
+        # the search runs over the rows, so that no id is decoded or looked up until the path is found
+        graph = 'hypernym' if hypernym else 'graph'
+        offsets, adjacent, _ = self._adjacency[(graph, 'out')]
+        pred_offsets, pred_adjacent, _ = self._adjacency[(graph, 'in')]
+        try:
+            path = _bidirectional_shortest_path(self._ids.find(synset_id1), self._ids.find(synset_id2),
+                                                lambda row: adjacent[offsets[row]:offsets[row + 1]],
+                                                lambda row: pred_adjacent[pred_offsets[row]:pred_offsets[row + 1]])
+        except nx.NetworkXNoPath:
+            raise nx.NetworkXNoPath("No path between {} and {}.".format(synset_id1, synset_id2))
+        return [self._id(row) for row in path]
+
+    def _edge_label(self, synset_id1: str, synset_id2: str):
+        row = self._ids.find(synset_id2)
+        rows, labels = self._neighbours(synset_id1, 'graph', 'out')
+        for adj_row, label in zip(rows, labels):
+            if adj_row == row:
+                return self._labels[label]
+        return None
+
+    def _edges(self):
+        offsets, adjacent, labels = self._adjacency[('graph', 'out')]
+        for row, synset_id in enumerate(self._ids.keys):
+            for i in range(offsets[row], offsets[row + 1]):
+                yield synset_id, self._id(adjacent[i]), self._labels[labels[i]]
+
+    def _add_nodes(self, synsets_id):
+        raise WordNetError(_read_only)
+
+    def _remove_node(self, synset_id: str):
+        raise WordNetError(_read_only)
+
+    def _add_edge(self, synset_id1: str, synset_id2: str, relation: str):
+        raise WordNetError(_read_only)
+
+    def _add_edges(self, relations: list):
+        raise WordNetError(_read_only)
+
+    def _remove_edge(self, synset_id1: str, synset_id2: str):
+        raise WordNetError(_read_only)
+
+    def _writable_synset(self, synset_id: str):
+        raise WordNetError(_read_only)
+
+    def _memory_structures(self):
+        adjacency = self._adjacency
+        return {
+            'graph': (adjacency[('graph', 'out')], adjacency[('graph', 'in')]),
+            'hypernym_graph': (adjacency[('hypernym', 'out')], adjacency[('hypernym', 'in')], self._hypernyms,
+                               self._depths),
+            'synsets': self._synsets,
+            'literal2synset': self._literal_indexes['literals'],
+            'literal2synset_strict': self._literal_indexes['strict'],
+            'sense2synset': self._literal_indexes['senses'],
+            'indexes': (self._mwe_trie, self._definition_indexes, self._attribute_indexes, self._sentiwn_indexes),
+        }
@@ -0,0 +1,330 @@
+import os
+import json
+import sqlite3
+import networkx as nx
+from collections.abc import MutableMapping
+from urllib.request import pathname2url
+
+from .rowordnet import RoWordNet, _bidirectional_shortest_path
+from .exceptions import WordNetError
+from .records import synset_to_record, synset_from_record
+from .sharedmem import _indexes, _index_keys, _sense_key, _hypernyms, _SynsetCache
+
+
+_format = "rowordnet-sqlite-1"
+_read_only = "A sqlite wordnet is read-only, use an overlay of it to make changes"
+
+# the synsets are numbered by rows, in the order of the wordnet. The relations of both graphs (0 for the relation graph,
+# 1 for the hypernym graph) are stored by source and by target, with the position of each neighbour, so that walks and
+# paths give the same results as on the wordnet. The literal indexes (see sharedmem._indexes) keep the order of their
+# synsets the same way.
+_schema = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE synsets (row INTEGER PRIMARY KEY, id TEXT NOT NULL, record TEXT NOT NULL, hypernym INTEGER,
+                      depth INTEGER NOT NULL);
+CREATE TABLE outbound (graph INTEGER, source INTEGER, position INTEGER, target INTEGER NOT NULL, label INTEGER NOT NULL,
+                       PRIMARY KEY (graph, source, position)) WITHOUT ROWID;
+CREATE TABLE inbound (graph INTEGER, target INTEGER, position INTEGER, source INTEGER NOT NULL, label INTEGER NOT NULL,
+                      PRIMARY KEY (graph, target, position)) WITHOUT ROWID;
+CREATE TABLE literals (kind INTEGER, key TEXT, position INTEGER, row INTEGER NOT NULL,
+                       PRIMARY KEY (kind, key, position)) WITHOUT ROWID;
+"""
+_index = "CREATE UNIQUE INDEX synsets_id ON synsets (id);"
+
+_row = "SELECT row FROM synsets WHERE id = ?"
+_neighbours = {
+    'outbound': "SELECT s.id, n.label FROM outbound n JOIN synsets s ON s.row = n.target "
+                "WHERE n.graph = ? AND n.source = (SELECT row FROM synsets WHERE id = ?) ORDER BY n.position",
+    'inbound': "SELECT s.id, n.label FROM inbound n JOIN synsets s ON s.row = n.source "
+               "WHERE n.graph = ? AND n.target = (SELECT row FROM synsets WHERE id = ?) ORDER BY n.position",
+}
+_adjacent_rows = {
+    'outbound': "SELECT target FROM outbound WHERE graph = ? AND source = ? ORDER BY position",
+    'inbound': "SELECT source FROM inbound WHERE graph = ? AND target = ? ORDER BY position",
+}
+_edge_label = "SELECT label FROM outbound WHERE graph = 0 AND source = (SELECT row FROM synsets WHERE id = ?) " \
+              "AND target = (SELECT row FROM synsets WHERE id = ?)"
+_edges = "SELECT s.id, t.id, n.label FROM outbound n JOIN synsets s ON s.row = n.source " \
+         "JOIN synsets t ON t.row = n.target WHERE n.graph = 0 ORDER BY n.source, n.position"
+_lookup = "SELECT s.id FROM literals l JOIN synsets s ON s.row = l.row WHERE l.kind = ? AND l.key = ? " \
+          "ORDER BY l.position"
+
+
+def export(wordnet: RoWordNet, filename: str):
+    # see RoWordNet.save
+    synsets_id = list(wordnet._synsets)
+    rows = {synset_id: row for row, synset_id in enumerate(synsets_id)}
+    synsets = [wordnet._synsets[synset_id] for synset_id in synsets_id]
+    hypernyms, depths = _hypernyms(wordnet, synsets_id, rows)
+    labels = {}
+
+    if os.path.exists(filename):
+        os.remove(filename)
+    connection = sqlite3.connect(filename)
+    try:
+        # the file is written once, from scratch: there's nothing to roll back to
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.executescript(_schema)
+        with connection:
+            connection.executemany("INSERT INTO synsets VALUES (?, ?, ?, ?, ?)",
+                                   ((row, synset.id, json.dumps(synset_to_record(synset), ensure_ascii=False),
+                                     None if hypernyms[row] == -1 else hypernyms[row], depths[row])
+                                    for row, synset in enumerate(synsets)))
+            for graph, hypernym in ((0, False), (1, True)):
+                for table, relations in (('outbound', wordnet._outbound), ('inbound', wordnet._inbound)):
+                    connection.executemany("INSERT INTO {} VALUES (?, ?, ?, ?, ?)".format(table),
+                                           ((graph, row, position, rows[adj_synset_id],
+                                             labels.setdefault(relation, len(labels)))
+                                            for row, synset_id in enumerate(synsets_id)
+                                            for position, (adj_synset_id, relation)
+                                            in enumerate(relations(synset_id, hypernym))))
+            keys = _index_keys(synsets)
+            for kind, name in enumerate(_indexes):
+                lookup = wordnet._lookup_senses if name == 'senses' else wordnet._lookup_literal
+                connection.executemany("INSERT INTO literals VALUES (?, ?, ?, ?)",
+                                       ((kind, key, position, rows[synset_id])
+                                        for key, args in keys[name].items()
+                                        for position, synset_id in enumerate(lookup(*args))))
+            meta = {
+                "format": _format,
+                "synsets": len(synsets_id),
+                "labels": list(labels),
+                "relation_types": sorted(wordnet._relation_types),
+                "max_hypernym_height": getattr(wordnet, '_max_hypernym_height', 0),
+                "journal_generation": wordnet._journal_generation,
+            }
+            connection.executemany("INSERT INTO meta VALUES (?, ?)",
+                                   ((key, json.dumps(value, ensure_ascii=False)) for key, value in meta.items()))
+        connection.executescript(_index)
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+
+
+class _SqliteSynsets(MutableMapping):
+    # the synsets of a sqlite wordnet, decoded from their records when they're asked for (see sharedmem._SynsetCache),
+    # in the order of the exported wordnet
+    def __init__(self, connection: sqlite3.Connection, count: int, cache: _SynsetCache):
+        self._connection = connection
+        self._count = count
+        self.cache = cache
+
+    def __getitem__(self, synset_id):
+        synset = self.cache.get(synset_id) if isinstance(synset_id, str) else None
+        if synset is not None:
+            return synset
+        row = self._connection.execute("SELECT record FROM synsets WHERE id = ?", (synset_id,)).fetchone() \
+            if isinstance(synset_id, str) else None
+        if row is None:
+            raise KeyError(synset_id)
+        return self.cache.add(synset_from_record(json.loads(row[0])))
+
+    def __contains__(self, synset_id):
+        return isinstance(synset_id, str) and self._connection.execute(_row, (synset_id,)).fetchone() is not None
+
+    def __setitem__(self, synset_id, synset):
+        raise WordNetError(_read_only)
+
+    def __delitem__(self, synset_id):
+        raise WordNetError(_read_only)
+
+    def __iter__(self):
+        for synset_id, in self._connection.execute("SELECT id FROM synsets ORDER BY row"):
+            yield synset_id
+
+    def __len__(self):
+        return self._count
+
+
+class SqliteRoWordNet(RoWordNet):
+    def __init__(self, filename: str, cache_size: int = 2048):
+        """
+            A read-only wordnet stored in an indexed sqlite file by save(filename, format="sqlite"), usually opened
+            with RoWordNet.open_sqlite(filename). Nothing is loaded up front: the synsets, the relations and the literal
+            indexes are read from the file when they're asked for, through sqlite's page cache, so the memory used
+            stays small and about the same no matter how big the wordnet is, at the cost of a slower access.
+            The synsets are decoded from the file when they're asked for, and the last 4096 of them are kept, so
+            repeated lookups give the same synset object. Changing a synset changes nothing in the file, and the next
+            lookup gives the stored synset again.
+            The methods that change the wordnet raise WordNetError; an overlay of a sqlite wordnet (see
+            RoWordNet.overlay) can be changed. A sqlite wordnet must be used by the thread that opened it, and it's
+            pickled as its filename, so passing it to a worker process opens the same file in the worker.
+
+            Args:
+                filename (str): The sqlite file.
+                cache_size (int, optional): The size of sqlite's page cache, in KiB. Defaults to 2048.
+            Raises:
+                TypeError: If any argument has incorrect type.
+                ValueError: If the cache size is not positive.
+                FileNotFoundError: If the file doesn't exist.
+                WordNetError: If the file doesn't hold a wordnet.
+        """
+
+        if not isinstance(filename, str):
+            raise TypeError("Argument 'filename' has incorrect type, expected str, got {}"
+                            .format(type(filename).__name__))
+        if not isinstance(cache_size, int):
+            raise TypeError("Argument 'cache_size' has incorrect type, expected int, got {}"
+                            .format(type(cache_size).__name__))
+        if cache_size <= 0:
+            raise ValueError("Argument 'cache_size' must be positive, got {}".format(cache_size))
+        if not os.path.isfile(filename):
+            raise FileNotFoundError("No such file: '{}'".format(filename))
+
+        super().__init__(empty=True)
+        self.filename = filename
+        self.cache_size = cache_size
+        self._connection = None  # for close, if opening fails
+        self._connection = sqlite3.connect("file:{}?mode=ro".format(pathname2url(os.path.abspath(filename))), uri=True)
+        try:
+            meta = {key: json.loads(value) for key, value in self._connection.execute("SELECT key, value FROM meta")}
+        except sqlite3.DatabaseError:
+            meta = {}
+        if meta.get('format') != _format:
+            self.close()
+            raise WordNetError("File '{}' doesn't hold a wordnet".format(filename))
+        self._connection.execute("PRAGMA cache_size = {}".format(-cache_size))
+
+        self._synsets = _SqliteSynsets(self._connection, meta['synsets'], _SynsetCache(self))
+        self._relation_types = set(meta['relation_types'])
+        self._labels = meta['labels']
+        self._max_hypernym_height = meta['max_hypernym_height']
+        self._journal_generation = meta['journal_generation']
+
+    def __reduce__(self):
+        return SqliteRoWordNet, (self.filename, self.cache_size)
+
+    def close(self):
+        """
+            Close the sqlite file. The wordnet can't be used anymore.
+        """
+
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _neighbours(self, synset_id: str, hypernym: bool, table: str):
+        return [(adj_synset_id, self._labels[label]) for adj_synset_id, label
+                in self._connection.execute(_neighbours[table], (int(hypernym), synset_id))]
+
+    def _lookup(self, name: str, key: str):
+        return [synset_id for synset_id, in self._connection.execute(_lookup, (_indexes.index(name), key))]
+
+    def _flatten(self):
+        # a plain wordnet with the same synsets and relations
+        wordnet = RoWordNet._from_parts(list(self._synsets.values()), self._relation_types, list(self._edges()))
+        wordnet._max_hypernym_height = self._max_hypernym_height
+        wordnet._journal_generation = self._journal_generation
+        return wordnet
+
+    def _save_to_binary(self, filename: str):
+        self._flatten()._save_to_binary(filename)
+
+    def load(self, filename: str, xml: bool = False, progress=None, format: str = None):
+        raise WordNetError(_read_only)
+
+    def reindex_literals(self):
+        raise WordNetError(_read_only)
+
+    def add_relation_type(self, relation_type: str):
+        raise WordNetError(_read_only)
+
+    def batch(self):
+        raise WordNetError(_read_only)
+
+    def _synset_changed(self, synset, *args):
+        # a synset was changed by the caller: the file is left as it is, and the next lookup decodes the synset again
+        self._synsets.cache.discard(synset)
+
+    _synset_literals_replaced = _synset_literals_senses_changed = _synset_attribute_changed = _synset_changed
+
+    def _hypernym(self, synset_id: str):
+        row = self._connection.execute("SELECT h.id FROM synsets s JOIN synsets h ON h.row = s.hypernym "
+                                       "WHERE s.id = ?", (synset_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def _hypernym_depth(self, synset_id: str):
+        return self._connection.execute("SELECT depth FROM synsets WHERE id = ?", (synset_id,)).fetchone()[0]
+
+    # storage accessors, see RoWordNet
+
+    def _lookup_literal(self, literal: str, strict: bool):
+        return self._lookup('strict' if strict else 'literals', literal)
+
+    def _lookup_senses(self, literal: str, sense: str):
+        return self._lookup('senses', _sense_key(literal, sense))
+
+    def _strict_literals(self):
+        return [literal for literal, in self._connection.execute("SELECT DISTINCT key FROM literals WHERE kind = ?",
+                                                                 (_indexes.index('strict'),))]
+
+    def _outbound(self, synset_id: str, hypernym: bool = False):
+        return self._neighbours(synset_id, hypernym, 'outbound')
+
+    def _inbound(self, synset_id: str, hypernym: bool = False):
+        return self._neighbours(synset_id, hypernym, 'inbound')
+
+    def _successors(self, synset_id: str, hypernym: bool = False):
+        return [adj_synset_id for adj_synset_id, _ in self._neighbours(synset_id, hypernym, 'outbound')]
+
+    def _predecessors(self, synset_id: str, hypernym: bool = False):
+        return [adj_synset_id for adj_synset_id, _ in self._neighbours(synset_id, hypernym, 'inbound')]
+
+    def _shortest_path(self, synset_id1: str, synset_id2: str, hypernym: bool = False):
+        # the search runs over the rows, so that no id is read until the path is found
+        execute = self._connection.execute
+        graph = int(hypernym)
+
+        def row(synset_id):
+            found = execute(_row, (synset_id,)).fetchone()
+            return -1 if found is None else found[0]
+
+        def adjacent(table):
+            query = _adjacent_rows[table]
+            return lambda row_: [adj_row for adj_row, in execute(query, (graph, row_))]
+
+        try:
+            path = _bidirectional_shortest_path(row(synset_id1), row(synset_id2), adjacent('outbound'),
+                                                adjacent('inbound'))
+        except nx.NetworkXNoPath:
+            raise nx.NetworkXNoPath("No path between {} and {}.".format(synset_id1, synset_id2))
+        return [execute("SELECT id FROM synsets WHERE row = ?", (row_,)).fetchone()[0] for row_ in path]
+
+    def _edge_label(self, synset_id1: str, synset_id2: str):
+        found = self._connection.execute(_edge_label, (synset_id1, synset_id2)).fetchone()
+        return None if found is None else self._labels[found[0]]
+
+    def _edges(self):
+        for synset_id1, synset_id2, label in self._connection.execute(_edges):
+            yield synset_id1, synset_id2, self._labels[label]
+
+    def _add_nodes(self, synsets_id):
+        raise WordNetError(_read_only)
+
+    def _remove_node(self, synset_id: str):
+        raise WordNetError(_read_only)
+
+    def _add_edge(self, synset_id1: str, synset_id2: str, relation: str):
+        raise WordNetError(_read_only)
+
+    def _add_edges(self, relations: list):
+        raise WordNetError(_read_only)
+
+    def _remove_edge(self, synset_id1: str, synset_id2: str):
+        raise WordNetError(_read_only)
+
+    def _writable_synset(self, synset_id: str):
+        raise WordNetError(_read_only)
+
+    def _memory_structures(self):
+        # the relations and the literal indexes are in the file, or in sqlite's page cache
+        return {
+            'graph': None,
+            'hypernym_graph': None,
+            'synsets': self._synsets,
+            'literal2synset': None,
+            'literal2synset_strict': None,
+            'sense2synset': None,
+            'indexes': (self._mwe_trie, self._definition_indexes, self._attribute_indexes, self._sentiwn_indexes),
+        }
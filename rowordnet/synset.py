@@ -1,8 +1,25 @@
+import sys
+import hashlib
 from enum import Enum
 from .exceptions import SynsetError
 
 
+# most synsets share a handful of SentiWN triples (e.g. [0.0, 0.0, 1.0]), so equal triples are stored only once
+_sentiwn_triples = {}
+
+
+def _intern_sentiwn(value):
+    triple = tuple(value)
+    return _sentiwn_triples.setdefault(triple, triple)
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
 class Synset(object):
+    __slots__ = ('_id', '_literals', '_literals_senses', '_pos', '_definition', '_stamp', '_domain', '_sumo',
+                 '_sumotype', '_sentiwn', '_nonlexicalized', '_fingerprint', '_wordnets')
 
     class Pos(Enum):
         NOUN = 0
@@ -57,17 +74,50 @@ class Synset(object):
         if not isinstance(id, str):
             raise TypeError("Argument 'id' has incorrect type, expected str, got {}".format(type(id).__name__))
 
-        self._id = id
-        self._literals = [] if literals is None else literals
-        self._literals_senses = [] if literals_senses is None else literals_senses
+        # ids, literals, senses and the other short strings are interned and the literals and senses are kept as
+        # tuples, which keeps the memory footprint of the whole wordnet low
+        self._id = sys.intern(id)
+        self._literals = () if literals is None else tuple(map(sys.intern, literals))
+        if literals_senses is None:
+            self._literals_senses = ("",) * len(self._literals)
+        else:
+            self._literals_senses = tuple(map(sys.intern, literals_senses))
         self._pos = pos
         self._definition = definition
-        self._stamp = stamp
-        self._domain = domain
-        self._sumo = sumo
+        self._stamp = _intern(stamp)
+        self._domain = _intern(domain)
+        self._sumo = _intern(sumo)
         self._sumotype = sumotype
-        self._sentiwn = sentiwn
+        self._sentiwn = None if sentiwn is None else _intern_sentiwn(sentiwn)
         self._nonlexicalized = nonlexicalized
+        self._fingerprint = None
+        # weak references to the wordnets that contain this synset, see RoWordNet._attach_synset
+        self._wordnets = ()
+
+    def __getstate__(self):
+        state = {name: getattr(self, name) for name in self.__slots__ if name != '_wordnets'}
+        state['_fingerprint'] = self.fingerprint
+        return state
+
+    def __setstate__(self, state):
+        # binary files saved by older versions hold the state of the synset as a plain dict of lists
+        self.__init__(state['_id'], pos=state.get('_pos'), nonlexicalized=state.get('_nonlexicalized'),
+                      definition=state.get('_definition'), stamp=state.get('_stamp'), sentiwn=state.get('_sentiwn'),
+                      domain=state.get('_domain'), sumo=state.get('_sumo'), sumotype=state.get('_sumotype'),
+                      literals=state.get('_literals'), literals_senses=state.get('_literals_senses'))
+        self._fingerprint = state.get('_fingerprint')
+
+    def _literal_pairs(self):
+        return tuple(zip(self._literals, self._literals_senses))
+
+    def _notify(self, method: str, *args):
+        # called after every change of the synset: drop the cached fingerprint and let the wordnets that contain this
+        # synset update their indexes
+        self._fingerprint = None
+        for wordnet_ref in self._wordnets:
+            wordnet = wordnet_ref()
+            if wordnet is not None:
+                getattr(wordnet, method)(self, *args)
 
     @property
     def id(self):
@@ -78,14 +128,31 @@ class Synset(object):
         """
         return self._id
 
+    @property
+    def fingerprint(self):
+        """
+            Get a hash of the content of this synset (all the fields compared by ==), as 16 bytes.
+            It's computed when first needed and kept until the synset changes, so comparing the fingerprints of two
+            synsets is a cheap way to tell if they are equal.
+        """
+
+        if self._fingerprint is None:
+            content = (self._id, self._literals, self._literals_senses, self._pos, self._definition, self._stamp,
+                       self._domain, self._sumo, self._sumotype,
+                       None if self._sentiwn is None else tuple(map(float, self._sentiwn)), self._nonlexicalized)
+            self._fingerprint = hashlib.blake2b(repr(content).encode("utf-8"), digest_size=16).digest()
+
+        return self._fingerprint
+
     @property
     def literals(self):
         """
             Get/set the literals of this synset.
-            Getter returns the literals of this synset.
+            Getter returns the literals of this synset as a new list: changing that list in place doesn't change the
+            synset, use add_literal, remove_literal or the setter instead.
             Setters recieves the literals as list.
         """
-        return self._literals
+        return list(self._literals)
         
     @literals.setter
     def literals(self, value: list):
@@ -97,18 +164,21 @@ class Synset(object):
                 raise TypeError("Argument 'literal-value' has incorrect type, expected str, got {}"
                                 .format(type(literal).__name__))
 
-        self._literals_senses = ["" for i in range(len(value))]
-        self._literals = value
+        old_pairs = self._literal_pairs()
+        self._literals_senses = ("",) * len(value)
+        self._literals = tuple(map(sys.intern, value))
+        self._notify('_synset_literals_replaced', old_pairs, self._literal_pairs())
 
     @property
     def literals_senses(self):
         """
             Get/set the senses for each literal of this synset. Senses's indexes correspond to literals's.
-            Setter returns the senses of each literal of this synset.
+            Getter returns the senses of each literal of this synset as a new list: changing that list in place
+            doesn't change the synset, use the setter instead.
             Setters recieves the senses as list.
         """
 
-        return self._literals_senses
+        return list(self._literals_senses)
 
     @literals_senses.setter
     def literals_senses(self, value: list):
@@ -120,16 +190,19 @@ class Synset(object):
                 raise TypeError("Argument 'sense-value' has incorrect type, expected str, got {}"
                                 .format(type(sense).__name__))
 
-        self._literals_senses = value
+        old_literals_senses = self._literals_senses
+        self._literals_senses = tuple(map(sys.intern, value))
+        self._notify('_synset_literals_senses_changed', old_literals_senses)
            
     @property
     def sentiwn(self):
         """
             Get/set the values for the SentiWordNet(list of floats/ints) of this synset.
-            Getter returns a list of 3 values for Positive, Negative, Objective.
+            Getter returns a new list of 3 values for Positive, Negative, Objective: changing that list in place
+            doesn't change the synset, use the setter instead.
             Setter receives a list of 3 floats/ints to set the PNO values.
         """
-        return self._sentiwn
+        return None if self._sentiwn is None else list(self._sentiwn)
         
     @sentiwn.setter
     def sentiwn(self, value: list):
@@ -146,7 +219,9 @@ class Synset(object):
         if not sum(value) == 1:
             raise ValueError("Argument's 'value' values must add up to 1")
 
-        self._sentiwn = value
+        old_value = self._sentiwn
+        self._sentiwn = _intern_sentiwn(value)
+        self._notify('_synset_attribute_changed', 'sentiwn', old_value, self._sentiwn)
 
     @property
     def definition(self):
@@ -163,7 +238,9 @@ class Synset(object):
         if not isinstance(value, str):
             raise TypeError("Argument 'value' has incorrect type, expected str, got {}".format(type(value).__name__))
 
+        old_value = self._definition
         self._definition = value
+        self._notify('_synset_attribute_changed', 'definition', old_value, value)
 
     @property
     def pos(self):
@@ -178,7 +255,9 @@ class Synset(object):
     def pos(self, value: Pos):
         if not isinstance(value, self.Pos):
             raise TypeError("Argument 'value' has incorrect type, expected str, got {}".format(type(value).__name__))
+        old_value = self._pos
         self._pos = value
+        self._notify('_synset_attribute_changed', 'pos', old_value, value)
 
     @property
     def domain(self):
@@ -195,7 +274,9 @@ class Synset(object):
         if not isinstance(value, str):
             raise TypeError("Argument 'value' has incorrect type, expected str, got {}".format(type(value).__name__))
 
-        self._domain = value
+        old_value = self._domain
+        self._domain = _intern(value)
+        self._notify('_synset_attribute_changed', 'domain', old_value, value)
 
     @property
     def sumo(self):
@@ -212,7 +293,9 @@ class Synset(object):
         if not isinstance(value, str):
             raise TypeError("Argument 'value' has incorrect type, expected str, got {}".format(type(value).__name__))
 
-        self._sumo = value
+        old_value = self._sumo
+        self._sumo = _intern(value)
+        self._notify('_synset_attribute_changed', 'sumo', old_value, value)
 
     @property
     def sumotype(self):
@@ -230,7 +313,9 @@ class Synset(object):
             raise TypeError("Argument 'value' has incorrect type, expected SumoType, got {}"
                             .format(type(value).__name__))
 
+        old_value = self._sumotype
         self._sumotype = value
+        self._notify('_synset_attribute_changed', 'sumotype', old_value, value)
 
     @property
     def nonlexicalized(self):
@@ -247,7 +332,9 @@ class Synset(object):
         if not isinstance(value, bool):
             raise TypeError("Argument 'value' has incorrect type, expected bool, got {}".format(type(value).__name__))
 
+        old_value = self._nonlexicalized
         self._nonlexicalized = value
+        self._notify('_synset_attribute_changed', 'nonlexicalized', old_value, value)
 
     @property
     def stamp(self):
@@ -264,7 +351,9 @@ class Synset(object):
         if not isinstance(value, str) and value is not None:
             raise TypeError("Argument 'value' has incorrect type, expected str, got {}".format(type(value).__name__))
 
-        self._stamp = value
+        old_value = self._stamp
+        self._stamp = _intern(value)
+        self._notify('_synset_attribute_changed', 'stamp', old_value, value)
 
     def add_literal(self, literal: str, sense: str=""):
         """
@@ -280,8 +369,10 @@ class Synset(object):
         if literal in self._literals:
             raise SynsetError("Literal '{}' is already in the synset".format(literal))
 
-        self._literals.append(literal)
-        self._literals_senses.append(sense)
+        old_pairs = self._literal_pairs()
+        self._literals += (sys.intern(literal),)
+        self._literals_senses += (sys.intern(sense),)
+        self._notify('_synset_literals_replaced', old_pairs, self._literal_pairs())
 
     def remove_literal(self, literal: str):
         """
@@ -297,27 +388,46 @@ class Synset(object):
         if literal not in self._literals:
             raise SynsetError("literal '{}' is not in the synset".format(literal))
 
+        old_pairs = self._literal_pairs()
         index = self._literals.index(literal)
-        self._literals.remove(literal)
-        del self._literals_senses[index]
+        self._literals = self._literals[:index] + self._literals[index + 1:]
+        self._literals_senses = self._literals_senses[:index] + self._literals_senses[index + 1:]
+        self._notify('_synset_literals_replaced', old_pairs, self._literal_pairs())
+
+    def _update(self, fields: dict):
+        # set several fields at once, as decoded by records.record_to_fields (i.e. when applying a patch). The values
+        # are trusted, so unlike the setters nothing is validated and any field can be reset to None.
+        if 'literals' in fields or 'literals_senses' in fields:
+            old_pairs = self._literal_pairs()
+            self._literals = tuple(map(sys.intern, fields.get('literals', self._literals)))
+            self._literals_senses = tuple(map(sys.intern, fields.get('literals_senses', self._literals_senses)))
+            new_pairs = self._literal_pairs()
+            if new_pairs != old_pairs:
+                self._notify('_synset_literals_replaced', old_pairs, new_pairs)
+
+        for name in ('pos', 'nonlexicalized', 'definition', 'stamp', 'sentiwn', 'domain', 'sumo', 'sumotype'):
+            if name not in fields:
+                continue
+            value = fields[name]
+            if name == 'sentiwn':
+                value = None if value is None else _intern_sentiwn(value)
+            elif name != 'definition':
+                value = _intern(value)
+            old_value = getattr(self, '_' + name)
+            setattr(self, '_' + name, value)
+            self._notify('_synset_attribute_changed', name, old_value, value)
+
+        self._fingerprint = None
 
     def __repr__(self):
-        return "Synset(id={!r}, literals={!r}, definition={!r})".format(self._id, self._literals, self._definition)
+        return "Synset(id={!r}, literals={!r}, definition={!r})".format(self._id, list(self._literals),
+                                                                        self._definition)
 
     def __eq__(self, other):
         if isinstance(other, Synset):
-            if (self.id == other.id and
-                    self.literals == other.literals and
-                    self.literals_senses == other.literals_senses and
-                    self.pos == other.pos and
-                    self.definition == other.definition and
-                    self.stamp == other.stamp and
-                    self.domain == other.domain and
-                    self.sumo == other.sumo and
-                    self.sumotype == other.sumotype and
-                    self.sentiwn == other.sentiwn and
-                    self.nonlexicalized == other.nonlexicalized):
-
+            if self is other:
                 return True
+            # the fingerprints are cached, so after the first comparison this doesn't touch the fields anymore
+            return self._id == other._id and self.fingerprint == other.fingerprint
 
         return False
\ No newline at end of file
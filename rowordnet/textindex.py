@@ -0,0 +1,104 @@
+import re
+import math
+import heapq
+from array import array
+
+
+_token_pattern = re.compile(r"\w+")
+# the definitions mix the old cedilla diacritics with the correct comma-below ones, so both are folded to the latter
+_diacritics = str.maketrans("şţŞŢ", "șțȘȚ")
+
+
+def tokenize(text: str):
+    """
+        Split a text into lowercase word tokens, as they are stored in the definition index.
+        Args:
+            text (str): The text to tokenize.
+        Returns:
+            list of str: The tokens of the text.
+    """
+
+    return _token_pattern.findall(text.translate(_diacritics).lower())
+
+
+class DefinitionIndex(object):
+    def __init__(self, synsets, literals: bool = False, k1: float = 1.2, b: float = 0.75):
+        """
+            Build an inverted index over the definitions (and optionally the literals) of a collection of synsets. Each
+            term keeps its postings as two integer arrays: the document numbers and the term frequencies.
+
+            Args:
+                synsets (iterable of Synset): The synsets to index.
+                literals (bool, optional): Index the literals of the synsets as well. Defaults to False.
+                k1 (float, optional): The BM25 term frequency saturation parameter. Defaults to 1.2.
+                b (float, optional): The BM25 document length normalization parameter. Defaults to 0.75.
+        """
+
+        self.literals = literals
+        self.k1 = k1
+        self.b = b
+        self.synsets_id = []
+        self._postings = {}
+
+        doc_lengths = array('I')
+        for doc, synset in enumerate(synsets):
+            self.synsets_id.append(synset.id)
+
+            tokens = tokenize(synset.definition) if synset.definition is not None else []
+            if literals:
+                for literal in synset.literals:
+                    tokens.extend(tokenize(literal.replace('_', ' ')))
+            doc_lengths.append(len(tokens))
+
+            term_frequencies = {}
+            for token in tokens:
+                term_frequencies[token] = term_frequencies.get(token, 0) + 1
+
+            for term, term_frequency in term_frequencies.items():
+                posting = self._postings.get(term)
+                if posting is None:
+                    posting = self._postings[term] = (array('I'), array('I'))
+                posting[0].append(doc)
+                posting[1].append(term_frequency)
+
+        # the length normalization part of the BM25 denominator only depends on the document, so it's computed once
+        average_length = sum(doc_lengths) / len(doc_lengths) if len(doc_lengths) > 0 else 0
+        self._doc_norms = array('d', (k1 * (1 - b + b * doc_length / average_length) if average_length > 0 else k1
+                                      for doc_length in doc_lengths))
+
+    def __len__(self):
+        return len(self.synsets_id)
+
+    def search(self, query: str, k: int = 10, accept=None):
+        """
+            Rank the indexed synsets against a query with BM25.
+
+            Args:
+                query (str): The query text.
+                k (int, optional): The maximum number of results. Defaults to 10.
+                accept (callable, optional): A function that receives a synset id and returns False for the synsets that
+                    must be left out of the results. Defaults to None.
+            Returns:
+                list of tuples: A list of (synset id, score) pairs sorted by decreasing score.
+        """
+
+        total_docs = len(self.synsets_id)
+        k1 = self.k1
+        doc_norms = self._doc_norms
+        scores = {}
+
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+
+            docs, term_frequencies = posting
+            idf = math.log(1 + (total_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc, term_frequency in zip(docs, term_frequencies):
+                scores[doc] = scores.get(doc, 0.0) + idf * term_frequency * (k1 + 1) / (term_frequency + doc_norms[doc])
+
+        results = ((self.synsets_id[doc], score) for doc, score in scores.items())
+        if accept is not None:
+            results = ((synset_id, score) for synset_id, score in results if accept(synset_id))
+
+        return heapq.nlargest(k, results, key=lambda result: result[1])
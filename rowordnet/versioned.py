@@ -0,0 +1,88 @@
+import threading
+from contextlib import contextmanager
+
+from .rowordnet import RoWordNet
+from .overlay import RoWordNetOverlay
+
+
+class VersionedRoWordNet(object):
+    def __init__(self, wordnet: RoWordNet, max_changes: int = 10000):
+        """
+            A wordnet shared between threads, with snapshot isolation. Readers get the current version with snapshot()
+            and query it without any locking: a published version is never changed, so a reader is never disturbed by
+            a writer, i.e. a bfwalk over a snapshot can't fail because a relation is added meanwhile. Writers are
+            serialized and change a private draft of the next version, which is published at once when the write ends.
+
+                versioned = VersionedRoWordNet(RoWordNet())
+
+                wn = versioned.snapshot()                   # in any reader thread
+                wn.wup_similarity(synset_id1, synset_id2)
+
+                with versioned.write() as draft:            # in any writer thread
+                    draft.add_relation(synset_id1, synset_id2, "hypernym")
+                    draft.edit_synset(synset_id3).add_literal("garnitură")
+
+            The versions are copy-on-write overlays (see RoWordNetOverlay) of the initial wordnet, so a write only
+            copies the edits made so far. Once they add up to more than max_changes, they are merged into a new plain
+            wordnet that becomes the base of the next versions.
+
+            Args:
+                wordnet (RoWordNet): The initial version. It must not be changed directly afterwards.
+                max_changes (int, optional): The number of changed synsets and relations after which the edits are
+                    merged into a new base. Defaults to 10000.
+            Raises:
+                TypeError: If any argument has incorrect type.
+        """
+
+        if not isinstance(wordnet, RoWordNet):
+            raise TypeError("Argument 'wordnet' has incorrect type, expected RoWordNet, got {}"
+                            .format(type(wordnet).__name__))
+        if not isinstance(max_changes, int):
+            raise TypeError("Argument 'max_changes' has incorrect type, expected int, got {}"
+                            .format(type(max_changes).__name__))
+
+        self.max_changes = max_changes
+        # the (version number, wordnet) pair is replaced as a whole, so readers always see a consistent pair
+        self._current = (0, wordnet)
+        self._write_lock = threading.Lock()
+
+    @property
+    def version(self):
+        """
+            Get the number of the current version. It starts at 0 and increases by one with every write.
+        """
+
+        return self._current[0]
+
+    def snapshot(self):
+        """
+            Get the current version of the wordnet. It's never changed afterwards, so it can be read from any number of
+            threads, for as long as needed. It must not be changed by the readers.
+            Returns:
+                RoWordNet: The current version.
+        """
+
+        return self._current[1]
+
+    @contextmanager
+    def write(self):
+        """
+            Change the wordnet. The context manager gives a draft of the next version, an overlay of the current one
+            that can be changed with all the RoWordNet methods; its synsets must be changed through
+            RoWordNetOverlay.edit_synset. When the with block ends, the draft is published as the new version. If an
+            exception escapes the with block, the draft is discarded. Writes from different threads wait for each
+            other; readers are never blocked.
+        """
+
+        with self._write_lock:
+            version, wordnet = self._current
+            if isinstance(wordnet, RoWordNetOverlay):
+                draft = wordnet._copy()
+            else:
+                draft = wordnet.overlay()
+
+            yield draft
+
+            if draft._changes() > self.max_changes:
+                draft = draft._flatten()
+            self._current = (version + 1, draft)
@@ -0,0 +1,157 @@
+import signal
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .records import synset_to_record, _chr2pos
+
+
+def _pos(pos):
+    if pos is None:
+        return None
+    if pos not in _chr2pos:
+        raise ValueError("Unknown pos '{}', expected one of {}".format(pos, ", ".join(sorted(_chr2pos))))
+    return _chr2pos[pos]
+
+
+def _synsets(wordnet, literal=None, pos=None, strict=False):
+    return wordnet.synsets(literal, _pos(pos), strict)
+
+
+def _synset(wordnet, synset_id):
+    return synset_to_record(wordnet.synset(synset_id))
+
+
+def _bfwalk(wordnet, synset_id, limit=100):
+    return list(itertools.islice(wordnet.bfwalk(synset_id), limit))
+
+
+def _shortest_path(wordnet, synset_id1, synset_id2, relations=None):
+    return wordnet.shortest_path(synset_id1, synset_id2, set(relations) if relations is not None else None)
+
+
+# the methods that can be called by name with JSON parameters and give a JSON result, and whether they are CPU-heavy
+# (walks, paths and similarities) or just read an index
+methods = {
+    'synsets': (_synsets, False),
+    'synset': (_synset, False),
+    'outbound_relations': (lambda wordnet, synset_id: wordnet.outbound_relations(synset_id), False),
+    'inbound_relations': (lambda wordnet, synset_id: wordnet.inbound_relations(synset_id), False),
+    'relations': (lambda wordnet, synset_id: wordnet.relations(synset_id), False),
+    'bfwalk': (_bfwalk, True),
+    'shortest_path': (_shortest_path, True),
+    'path_similarity': (lambda wordnet, synset_id1, synset_id2, simulate_root=True:
+                        wordnet.path_similarity(synset_id1, synset_id2, simulate_root), True),
+    'wup_similarity': (lambda wordnet, synset_id1, synset_id2, simulate_root=True:
+                       wordnet.wup_similarity(synset_id1, synset_id2, simulate_root), True),
+    'lch_similarity': (lambda wordnet, synset_id1, synset_id2, simulate_root=True:
+                       wordnet.lch_similarity(synset_id1, synset_id2, simulate_root), True),
+}
+
+
+def call(wordnet, method: str, params: dict):
+    """
+        Call a wordnet method by name, with JSON parameters. The pos is given by its code (i.e. 'n' for nouns), a
+        synset is returned as its record (see records.synset_to_record) and bfwalk returns a list of at most 'limit'
+        (default 100) steps.
+        Args:
+            wordnet (RoWordNet): The wordnet.
+            method (str): The name of the method, one of the keys of methods.
+            params (dict): The arguments of the method, by name.
+        Returns:
+            dict: {'result': ...} with the JSON-serializable result, or {'error': {'type': ..., 'message': ...}} if the
+                call raised any exception.
+    """
+
+    entry = methods.get(method)
+    try:
+        if entry is None:
+            raise ValueError("Unknown method '{}'".format(method))
+        if not isinstance(params, dict):
+            raise TypeError("Argument 'params' has incorrect type, expected dict, got {}".format(type(params).__name__))
+        return {'result': entry[0](wordnet, **params)}
+    except Exception as e:
+        return {'error': {'type': type(e).__name__, 'message': str(e)}}
+
+
+def call_all(wordnet, calls: list):
+    return [call(wordnet, method, params) for method, params in calls]
+
+
+# the wordnet of a pool worker
+_wordnet = None
+
+
+def _init_worker(wordnet):
+    global _wordnet
+    # an interrupt is handled by the process that owns the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _wordnet = wordnet
+
+
+def run_calls(calls: list):
+    """
+        Run (method, params) calls in a pool worker, see worker_pool.
+        Returns:
+            list of dict: The response of each call, see call.
+    """
+
+    return call_all(_wordnet, calls)
+
+
+def run(function):
+    """
+        Run a function of the wordnet in a pool worker, see worker_pool. The exceptions it raises are raised by the
+        future of the call.
+        Args:
+            function (callable): A picklable function that takes the wordnet, i.e. operator.methodcaller.
+        Returns:
+            The result of function(wordnet).
+    """
+
+    return function(_wordnet)
+
+
+def similarities(wordnet, metric: str, pairs: list, simulate_root: bool = True):
+    similarity = getattr(wordnet, metric + "_similarity")
+    return [similarity(synset_id1, synset_id2, simulate_root) for synset_id1, synset_id2 in pairs]
+
+
+def worker_pool(wordnet, workers: int):
+    """
+        Start a pool of processes that hold a wordnet, to run calls with run_calls or run. Forked workers share the
+        memory of the wordnet with this process (copy-on-write); otherwise the wordnet is pickled to each worker once,
+        when it starts. A SharedRoWordNet (see RoWordNet.publish) is pickled as the name of its block, so the workers
+        attach to the same block instead of getting their own copy.
+        Args:
+            wordnet (RoWordNet): The wordnet.
+            workers (int): The number of processes.
+        Returns:
+            ProcessPoolExecutor: The pool.
+    """
+
+    # the wordnet goes to the workers of this pool only, as the argument of their initializer: a forked worker inherits
+    # it with the rest of the memory of this process, a spawned one gets it pickled
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(), initializer=_init_worker,
+                               initargs=(wordnet,))
+
+
+def shutdown_pool(pool, futures):
+    """
+        Shut down a pool started by worker_pool, once its workers are done with the calls they're running. The given
+        calls that are still waiting for a worker are cancelled.
+        Args:
+            pool (ProcessPoolExecutor): The pool.
+            futures (iterable of Future): The calls submitted to the pool.
+    """
+
+    for future in list(futures):
+        future.cancel()
+    # the pool drops the cancelled calls when it next looks at its queue; before python 3.9, shutting it down before
+    # that could hang, so a no-op call goes through the queue first
+    try:
+        pool.submit(int).result()
+    except BrokenProcessPool:
+        pass
+    pool.shutdown()
@@ -44,7 +44,9 @@ setup(
         
         'License :: OSI Approved :: GNU General Public License v3 (GPLv3)',
                
-        'Programming Language :: Python :: 3'        
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.7',
     ],
 
     keywords='romanian wordnet rowordnet rown python',  # Optional
@@ -53,10 +55,16 @@ setup(
     packages=find_packages("."),  # Required
 
     install_requires=['networkx','lxml'],  # Optional
+
+    python_requires='>=3.7',
     
     zip_safe=False,
     
     package_data={  # Optional
         'rowordnet': ['rowordnet.pickle'],
+    },
+
+    entry_points={  # Optional
+        'console_scripts': ['rowordnet=rowordnet.cli:main'],
     }
 )
\ No newline at end of file
@@ -75,6 +75,923 @@ class Main_Tests(unittest.TestCase):
         print("\t\t... done in {:.3f}s".format(time.perf_counter() - start))
         self.assertTrue(len(wn.synsets())>0)
         
+    def test_multiword_expressions(self):
+        from rowordnet import RoWordNet, Synset
+
+        wn = _small_wordnet()
+        tokens = "un tren de marfă și un tren de noapte pe calea ferată".split()
+        matches = list(wn.multiword_expressions(tokens))
+        self.assertEqual([(start, end, literal) for start, end, literal, _ in matches],
+                         [(1, 4, 'tren_de_marfă'), (10, 12, 'calea_ferată')])
+        self.assertEqual(matches[0][3], ['ENG30-00000002-n'])
+
+        # the trie is rebuilt after the wordnet changes, and generators are accepted as token streams
+        wn.add_synset(Synset('ENG30-00000010-n', literals=['tren_de_noapte'], literals_senses=['1']))
+        matches = list(wn.multiword_expressions(token for token in tokens))
+        self.assertEqual([literal for _, _, literal, _ in matches], ['tren_de_marfă', 'tren_de_noapte', 'calea_ferată'])
+
+    def test_literal_indexing(self):
+        from rowordnet import RoWordNet, Synset
+
+        wn = _small_wordnet()
+        synset = wn.synset('ENG30-00000001-n')
+
+        synset.add_literal('garnitură', '2')
+        self.assertEqual(wn.synsets('garnitură', strict=True), ['ENG30-00000001-n'])
+        synset.remove_literal('garnitură')
+        self.assertEqual(wn.synsets('garnitură'), [])
+
+        synset.literals = ['tren_personal']
+        self.assertEqual(wn.synsets('tren', strict=True), [])
+        self.assertEqual(wn.synsets('personal'), ['ENG30-00000001-n'])
+        self.assertEqual(list(wn.multiword_expressions(['tren', 'personal']))[0][2], 'tren_personal')
+        wn.synset('ENG30-00000002-n').literals = ['marfar', 'tren_marfar', 'garnitură']
+        self.assertEqual(wn.synsets('tren_de_marfă'), [])
+        self.assertEqual(wn.synsets('marfar', strict=True), ['ENG30-00000002-n'])
+        self.assertEqual(sorted(wn.synsets('tren')), ['ENG30-00000001-n', 'ENG30-00000002-n'])
+        self.assertEqual(wn.synsets_by_senses([('marfar', '1'), ('marfar', '')]), [None, 'ENG30-00000002-n'])
+
+        # a full reindex must give the same indexes as the incremental updates
+        strict_index = {literal: sorted(ids) for literal, ids in wn._literal2synset_strict.items()}
+        index = {literal: sorted(ids) for literal, ids in wn._literal2synset.items()}
+        wn.reindex_literals()
+        self.assertEqual({literal: sorted(ids) for literal, ids in wn._literal2synset_strict.items()}, strict_index)
+        self.assertEqual({literal: sorted(ids) for literal, ids in wn._literal2synset.items()}, index)
+
+    def test_sense_index(self):
+        from rowordnet import RoWordNet, Synset, WordNetError
+
+        wn = _small_wordnet()
+        self.assertEqual(wn.synset_by_sense('marfar', '1'), 'ENG30-00000002-n')
+        self.assertEqual(wn.synsets_by_senses([('tren', '1'), ('tren', '2')]), ['ENG30-00000001-n', None])
+        self.assertRaises(WordNetError, wn.synset_by_sense, 'tren', '2')
+        self.assertRaises(WordNetError, wn.synset_by_sense, 'tren', '1', Synset.Pos.VERB)
+
+        synset = wn.synset('ENG30-00000001-n')
+        synset.literals_senses = ['2']
+        self.assertEqual(wn.synsets_by_senses([('tren', '1'), ('tren', '2')]), [None, 'ENG30-00000001-n'])
+        synset.add_literal('garnitură', '3')
+        self.assertEqual(wn.synset_by_sense('garnitură', '3'), 'ENG30-00000001-n')
+
+    def test_search_definitions(self):
+        from rowordnet import RoWordNet, Synset
+
+        wn = _small_wordnet()
+        results = wn.search_definitions('șine de fier')
+        self.assertEqual([synset_id for synset_id, _ in results], ['ENG30-00000003-n', 'ENG30-00000001-n'])
+        self.assertEqual(wn.search_definitions('șine', pos=Synset.Pos.VERB), [])
+        self.assertEqual(wn.search_definitions('marfar'), [])
+        self.assertEqual(wn.search_definitions('marfar', literals=True)[0][0], 'ENG30-00000002-n')
+
+        # the index is rebuilt after a definition changes
+        wn.synset('ENG30-00000002-n').definition = 'Garnitură de vagoane de fier.'
+        self.assertEqual(wn.search_definitions('fier garnitură')[0][0], 'ENG30-00000002-n')
+
+    def test_query(self):
+        from rowordnet import RoWordNet, Synset
+
+        wn = _small_wordnet()
+        wn.synset('ENG30-00000001-n').domain = 'transport'
+        wn.synset('ENG30-00000001-n').sentiwn = [0.0, 0.25, 0.75]
+        wn.synset('ENG30-00000002-n').sentiwn = [0.0, 0.75, 0.25]
+
+        self.assertEqual(sorted(wn.query(pos=Synset.Pos.NOUN)), wn.synsets())
+        self.assertEqual(list(wn.query(pos=Synset.Pos.NOUN, domain='transport')), ['ENG30-00000001-n'])
+        self.assertEqual(list(wn.query(negative=(0.6, None))), ['ENG30-00000002-n'])
+        self.assertEqual(list(wn.query(negative=(0.6, None), domain='transport')), [])
+
+        # the indexes follow the changes made to the synsets
+        wn.synset('ENG30-00000002-n').domain = 'transport'
+        wn.synset('ENG30-00000001-n').sentiwn = [0.0, 1.0, 0.0]
+        self.assertEqual(sorted(wn.query(domain='transport', negative=(0.6, 1))),
+                         ['ENG30-00000001-n', 'ENG30-00000002-n'])
+
+    def test_columns(self):
+        import tempfile
+        from rowordnet import RoWordNet, Synset, SynsetColumns
+
+        wn = _small_wordnet()
+        wn.synset('ENG30-00000001-n').domain = 'transport'
+        wn.synset('ENG30-00000001-n').sentiwn = [0.0, 0.25, 0.75]
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "rowordnet.columns")
+            wn.to_columns().save(filename)
+            columns = SynsetColumns.load(filename)
+
+            self.assertEqual(list(columns.ids), wn.synsets())
+            self.assertEqual(list(columns.pos), [Synset.Pos.NOUN.value] * 3)
+            self.assertEqual(list(columns.domain), [0, -1, -1])
+            self.assertEqual(list(columns.domains), ['transport'])
+            self.assertEqual(list(columns.sentiwn[:3]), [0.0, 0.25, 0.75])
+            start, length = columns.literal_offsets[1], columns.literal_lengths[1]
+            self.assertEqual(columns.literals[start:start + length], ['tren_de_marfă', 'marfar'])
+
+            try:
+                import numpy
+            except ImportError:
+                return
+            arrays = columns.numpy()
+            self.assertEqual(arrays['sentiwn'].shape, (3, 3))
+            self.assertEqual(int(numpy.isnan(arrays['sentiwn']).sum()), 6)
+            del arrays, columns
+
+    def test_fingerprints(self):
+        import copy
+        from rowordnet import RoWordNet, Synset
+        from rowordnet.rowordnet import difference
+
+        wn1 = _small_wordnet()
+        wn2 = _small_wordnet()
+        synset = wn2.synset('ENG30-00000002-n')
+        self.assertEqual(synset.fingerprint, wn1.synset('ENG30-00000002-n').fingerprint)
+        self.assertEqual(difference(wn1, wn2), (None, None))
+
+        synset.sentiwn = [0, 0, 1]
+        self.assertNotEqual(synset, wn1.synset('ENG30-00000002-n'))
+        self.assertEqual(difference(wn1, wn2)[0], {'ENG30-00000002-n'})
+        self.assertEqual(copy.deepcopy(synset).fingerprint, synset.fingerprint)
+
+        # int and float SentiWN values compare equal, so they must give the same fingerprint
+        wn1.synset('ENG30-00000002-n').sentiwn = [0.0, 0.0, 1.0]
+        self.assertEqual(synset, wn1.synset('ENG30-00000002-n'))
+        self.assertTrue(wn1.synset_exists(synset))
+
+    def test_synset_layout(self):
+        import pickle
+        from rowordnet import Synset
+
+        wn = _small_wordnet()
+        synset = wn.synset('ENG30-00000002-n')
+        self.assertFalse(hasattr(synset, '__dict__'))
+        with self.assertRaises(AttributeError):
+            synset.gloss = 'Tren care transportă mărfuri.'
+
+        # strings built at run time are not interned by python, the synsets intern them
+        synset_1 = Synset(''.join(['ENG30-', '00000005-n']), literals=[''.join(['loco', 'motivă'])],
+                          literals_senses=[''.join(['1'])], domain=''.join(['trans', 'port']), sentiwn=[0.0, 0.0, 1.0])
+        synset_2 = Synset(''.join(['ENG30-', '00000006-n']), literals=['_'.join(['locomotivă'])],
+                          literals_senses=['1'], domain='_'.join(['transport']), sentiwn=[0, 0, 1])
+        self.assertIs(synset_1.id, sys.intern('ENG30-00000005-n'))
+        self.assertIs(synset_1._literals[0], synset_2._literals[0])
+        self.assertIs(synset_1._literals_senses[0], synset_2._literals_senses[0])
+        self.assertIs(synset_1.domain, synset_2.domain)
+        self.assertIs(synset_1._sentiwn, synset_2._sentiwn)
+        synset_1 = pickle.loads(pickle.dumps(synset_1))
+        self.assertIs(synset_1._literals[0], synset_2._literals[0])
+
+        # the getters return copies, so changing them in place changes neither the synset nor the indexes
+        synset.literals.append('vagon')
+        synset.literals_senses[0] = '2'
+        synset.sentiwn = [0, 0, 1]
+        synset.sentiwn[2] = 0
+        self.assertEqual(synset.literals, ['tren_de_marfă', 'marfar'])
+        self.assertEqual(synset.literals_senses, ['1', '1'])
+        self.assertEqual(synset.sentiwn, [0, 0, 1])
+        self.assertEqual(wn.synsets('vagon'), [])
+        synset.add_literal('vagon', '1')
+        self.assertEqual(wn.synsets('vagon'), ['ENG30-00000002-n'])
+
+    def test_set_operations(self):
+        from rowordnet import Synset
+        from rowordnet.rowordnet import intersection, merge, difference
+
+        wn1 = _small_wordnet()
+        wn2 = _small_wordnet()
+        for wn in (wn1, wn2):
+            wn.add_relation('ENG30-00000003-n', 'ENG30-00000001-n', 'hypernym')
+        wn1.add_relation_type('holonym')
+        wn2.add_relation_type('meronym')
+        wn2.add_synset(Synset('ENG30-00000004-n', pos=Synset.Pos.NOUN, literals=['vagon'], literals_senses=['1']))
+        wn2.add_relation('ENG30-00000004-n', 'ENG30-00000001-n', 'near_antonym')
+        # the synset and the relation label between the same two synsets differ in the two wordnets
+        wn2.synset('ENG30-00000002-n').add_literal('tren_marfar', '1')
+        wn2.remove_relation('ENG30-00000002-n', 'ENG30-00000001-n')
+        wn2.add_relation('ENG30-00000002-n', 'ENG30-00000001-n', 'near_antonym')
+        wn2.remove_relation('ENG30-00000001-n', 'ENG30-00000002-n')
+
+        wn = intersection(wn1, wn2)
+        self.assertEqual(sorted(wn.synsets()), ['ENG30-00000001-n', 'ENG30-00000003-n'])
+        self.assertEqual(wn.relation_types, {'hypernym', 'hyponym', 'near_antonym'})
+        self.assertEqual(sorted(wn._graph.edges(data='label')), [('ENG30-00000003-n', 'ENG30-00000001-n', 'hypernym')])
+        self.assertEqual(wn.synsets('cale_ferată'), ['ENG30-00000003-n'])
+        self.assertIs(wn.synset('ENG30-00000001-n'), wn1.synset('ENG30-00000001-n'))
+
+        wn = merge(wn1, wn2)
+        self.assertEqual(sorted(wn.synsets()), ['ENG30-0000000{}-n'.format(i) for i in range(1, 5)])
+        self.assertEqual(wn.relation_types, {'hypernym', 'hyponym', 'near_antonym', 'holonym', 'meronym'})
+        self.assertEqual(sorted(wn._graph.edges(data='label')),
+                         [('ENG30-00000001-n', 'ENG30-00000002-n', 'hyponym'),
+                          ('ENG30-00000002-n', 'ENG30-00000001-n', 'near_antonym'),
+                          ('ENG30-00000003-n', 'ENG30-00000001-n', 'hypernym'),
+                          ('ENG30-00000004-n', 'ENG30-00000001-n', 'near_antonym')])
+        self.assertEqual(wn.synsets('tren_marfar'), ['ENG30-00000002-n'])
+        self.assertIs(wn.synset('ENG30-00000002-n'), wn2.synset('ENG30-00000002-n'))
+        self.assertIs(wn.synset('ENG30-00000003-n'), wn2.synset('ENG30-00000003-n'))
+
+        self.assertEqual(difference(wn1, wn2),
+                         ({'ENG30-00000002-n', 'ENG30-00000004-n'},
+                          {('ENG30-00000002-n', 'near_antonym', 'ENG30-00000001-n'),
+                           ('ENG30-00000004-n', 'near_antonym', 'ENG30-00000001-n')}))
+        self.assertEqual(difference(wn2, wn2), (None, None))
+
+        # the results share their synsets with the inputs, so an edit through one of them shows in all of them
+        wn.synset('ENG30-00000004-n').add_literal('vagon_de_marfă', '1')
+        self.assertEqual(wn2.synset('ENG30-00000004-n').literals, ['vagon', 'vagon_de_marfă'])
+        self.assertEqual(wn.synsets('vagon_de_marfă'), ['ENG30-00000004-n'])
+        self.assertEqual(wn2.synsets('vagon_de_marfă'), ['ENG30-00000004-n'])
+
+    def test_patch(self):
+        import tempfile
+        from rowordnet import Synset, WordNetError
+        from rowordnet.patch import diff, write_patch
+
+        wn1 = _small_wordnet()
+        wn2 = _small_wordnet()
+        wn2.add_synset(Synset('ENG30-00000004-n', pos=Synset.Pos.NOUN, literals=['vagon'], literals_senses=['1']))
+        wn2.add_relation('ENG30-00000004-n', 'ENG30-00000001-n', 'near_antonym')
+        wn2.synset('ENG30-00000002-n').add_literal('tren_marfar', '1')
+        wn2.remove_relation('ENG30-00000001-n', 'ENG30-00000002-n')
+        wn2.remove_synset('ENG30-00000003-n')
+
+        operations = list(diff(wn1, wn2))
+        self.assertEqual([operation['op'] for operation in operations],
+                         ['remove_relation', 'delete_synset', 'upsert_synset', 'upsert_synset', 'add_relation'])
+        self.assertEqual(set(operations[2]['fields']), {'literals', 'literals_senses'})
+
+        synset = wn1.synset('ENG30-00000002-n')
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "patch.jsonl")
+            write_patch(operations, filename)
+            self.assertEqual(wn1.apply_patch(filename), 5)
+
+        self.assertEqual(wn1.fingerprints(), wn2.fingerprints())
+        self.assertEqual(sorted(wn1._graph.edges(data='label')), sorted(wn2._graph.edges(data='label')))
+        self.assertEqual(list(diff(wn1, wn2)), [])
+        # changed synsets are updated in place and reindexed
+        self.assertEqual(synset.literals, ['tren_de_marfă', 'marfar', 'tren_marfar'])
+        self.assertEqual(wn1.synsets('tren_marfar'), ['ENG30-00000002-n'])
+        self.assertEqual(wn1.synsets('cale_ferată'), [])
+
+        with self.assertRaises(WordNetError):
+            wn1.apply_patch(operations[:1])
+
+    def test_journal(self):
+        import tempfile
+        from rowordnet import RoWordNet, Synset
+
+        with tempfile.TemporaryDirectory() as directory:
+            snapshot = os.path.join(directory, "wn.pickle")
+            journal = os.path.join(directory, "wn.journal")
+
+            wn = _small_wordnet()
+            wn.save(snapshot)
+            self.assertEqual(wn.open_journal(journal), 0)
+            wn.add_synset(Synset('ENG30-00000004-n', pos=Synset.Pos.NOUN, literals=['vagon'], literals_senses=['1']))
+            wn.add_relation('ENG30-00000004-n', 'ENG30-00000001-n', 'near_antonym')
+            wn.synset('ENG30-00000002-n').definition = 'Tren de marfă.'
+            wn.synset('ENG30-00000003-n').add_literal('drum_de_fier', '1')
+            wn.remove_relation('ENG30-00000001-n', 'ENG30-00000002-n')
+            # replacing all the literals of a synset is a single record
+            with open(journal, "rb") as f:
+                records = len(f.readlines())
+            wn.synset('ENG30-00000002-n').literals = ['marfar', 'tren_marfar', 'garnitură']
+            with open(journal, "rb") as f:
+                self.assertEqual(len(f.readlines()), records + 1)
+            wn.close_journal()
+
+            # simulate a crash in the middle of writing a record
+            with open(journal, "ab") as f:
+                f.write(b'{"op": "delete_synset", "id": "ENG30-000')
+
+            recovered = RoWordNet(snapshot)
+            self.assertEqual(recovered.open_journal(journal), 6)
+            self.assertEqual(recovered.fingerprints(), wn.fingerprints())
+            self.assertEqual(sorted(recovered._graph.edges(data='label')), sorted(wn._graph.edges(data='label')))
+
+            recovered.remove_synset('ENG30-00000004-n')
+            recovered.compact_journal(snapshot)
+            recovered.close_journal()
+
+            # the journal was folded into the snapshot, so nothing is replayed anymore
+            reopened = RoWordNet(snapshot)
+            self.assertEqual(reopened.open_journal(journal), 0)
+            self.assertEqual(reopened.fingerprints(), recovered.fingerprints())
+            reopened.close_journal()
+
+    def test_batch(self):
+        from rowordnet import Synset, WordNetError
+
+        wn = _small_wordnet()
+        with wn.batch():
+            wn.add_relation_type('part_meronym')
+            wn.add_synset(Synset('ENG30-00000004-n', pos=Synset.Pos.NOUN, literals=['vagon'], literals_senses=['1']))
+            wn.add_relation('ENG30-00000004-n', 'ENG30-00000001-n', 'part_meronym')
+            wn.add_relation('ENG30-00000003-n', 'ENG30-00000004-n', 'hyponym')
+            # nothing is visible before the batch ends
+            self.assertEqual(wn.synsets('vagon'), [])
+
+        self.assertEqual(wn.synsets('vagon'), ['ENG30-00000004-n'])
+        self.assertEqual(wn.synset_by_sense('vagon', '1'), 'ENG30-00000004-n')
+        self.assertEqual(wn.outbound_relations('ENG30-00000004-n'), [('ENG30-00000001-n', 'part_meronym')])
+        self.assertTrue(wn._hypernym_graph.has_edge('ENG30-00000003-n', 'ENG30-00000004-n'))
+
+        # an invalid change rolls back the whole batch
+        fingerprints = wn.fingerprints()
+        edges = sorted(wn._graph.edges(data='label'))
+        with self.assertRaises(WordNetError):
+            with wn.batch():
+                wn.add_synset(Synset('ENG30-00000005-n', literals=['locomotivă']))
+                wn.add_relation('ENG30-00000005-n', 'ENG30-00000001-n', 'part_meronym')
+                wn.add_relation('ENG30-00000005-n', 'ENG30-00000009-n', 'part_meronym')
+        self.assertEqual(wn.fingerprints(), fingerprints)
+        self.assertEqual(sorted(wn._graph.edges(data='label')), edges)
+        self.assertEqual(wn.synsets('locomotivă'), [])
+
+        # a read-only wordnet refuses a batch up front, and a batch that its storage refuses leaves it untouched
+        import tempfile
+        from rowordnet import RoWordNet
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "wordnet.sqlite")
+            wn.save(filename, format="sqlite")
+            sqlite_wn = RoWordNet.open_sqlite(filename)
+            self.assertRaises(WordNetError, sqlite_wn.batch)
+            with self.assertRaises(WordNetError):
+                with RoWordNet.batch(sqlite_wn):
+                    sqlite_wn.add_synset(Synset('ENG30-00000005-n', literals=['locomotivă']))
+            self.assertEqual(dict(sqlite_wn._literal2synset), {})
+            self.assertEqual(dict(sqlite_wn._sense2synset), {})
+            self.assertEqual(sqlite_wn.synsets('locomotivă'), [])
+            sqlite_wn.close()
+
+    def test_generate_synset_ids(self):
+        from rowordnet import Synset
+
+        wn = _small_wordnet()
+        self.assertEqual(wn.generate_synset_id(), 'ENG30-00000004-n')
+        self.assertEqual(wn.generate_synset_id(), 'ENG30-00000004-n')
+        self.assertEqual(wn.generate_synset_id('ENG31-', '-v'), 'ENG31-00000001-v')
+
+        wn.add_synset(Synset('ENG30-00000010-n'))
+        self.assertEqual(wn.generate_synset_id(), 'ENG30-00000011-n')
+
+        # reserved ids are not generated again
+        self.assertEqual(wn.generate_synset_ids(3), ['ENG30-00000011-n', 'ENG30-00000012-n', 'ENG30-00000013-n'])
+        self.assertEqual(wn.generate_synset_id(), 'ENG30-00000014-n')
+        self.assertEqual(wn.generate_synset_ids(0), [])
+
+    def test_overlay(self):
+        import tempfile
+        from rowordnet import RoWordNet, Synset, RoWordNetOverlay
+        from rowordnet.rowordnet import merge
+
+        wn = _small_wordnet()
+        overlay = wn.overlay()
+        self.assertIsInstance(overlay, RoWordNetOverlay)
+        self.assertEqual(overlay.synsets(), wn.synsets())
+
+        overlay.edit_synset('ENG30-00000001-n').add_literal('garnitură', '2')
+        overlay.remove_synset('ENG30-00000003-n')
+        overlay.add_synset(Synset('ENG30-00000004-n', literals=['vagon'], literals_senses=['1']))
+        overlay.add_relation('ENG30-00000004-n', 'ENG30-00000001-n', 'near_antonym')
+        overlay.remove_relation('ENG30-00000001-n', 'ENG30-00000002-n')
+
+        self.assertEqual(overlay.synsets('garnitură'), ['ENG30-00000001-n'])
+        self.assertEqual(overlay.synsets('cale_ferată'), [])
+        self.assertEqual(overlay.synsets(), ['ENG30-00000001-n', 'ENG30-00000002-n', 'ENG30-00000004-n'])
+        self.assertEqual(overlay.outbound_relations('ENG30-00000001-n'), [])
+        self.assertEqual(overlay.inbound_relations('ENG30-00000001-n'),
+                         [('ENG30-00000002-n', 'hypernym'), ('ENG30-00000004-n', 'near_antonym')])
+        self.assertEqual(overlay.shortest_path('ENG30-00000004-n', 'ENG30-00000001-n'),
+                         ['ENG30-00000004-n', 'ENG30-00000001-n'])
+        self.assertEqual([literal for _, _, literal, _ in overlay.multiword_expressions(['calea', 'ferată'])], [])
+
+        # the base wordnet is left untouched
+        self.assertEqual(wn.synsets('garnitură'), [])
+        self.assertEqual(wn.synsets('cale_ferată'), ['ENG30-00000003-n'])
+        self.assertEqual(wn.synsets(), ['ENG30-00000001-n', 'ENG30-00000002-n', 'ENG30-00000003-n'])
+        self.assertEqual(wn.outbound_relations('ENG30-00000001-n'), [('ENG30-00000002-n', 'hyponym')])
+        self.assertEqual(wn('ENG30-00000001-n').literals, ['tren'])
+
+        # the synsets of the base are given as copies, and changing one changes the overlay only
+        synset = overlay.synset('ENG30-00000002-n')
+        self.assertIsNot(synset, wn.synset('ENG30-00000002-n'))
+        synset.add_literal('tren_marfar', '1')
+        self.assertIs(overlay('ENG30-00000002-n'), synset)
+        self.assertEqual(overlay.synsets('tren_marfar'), ['ENG30-00000002-n'])
+        overlay('ENG30-00000002-n').definition = 'Tren de marfă.'
+        self.assertEqual(wn.synsets('tren_marfar'), [])
+        self.assertEqual(wn('ENG30-00000002-n').literals, ['tren_de_marfă', 'marfar'])
+        self.assertEqual(wn('ENG30-00000002-n').definition, 'Tren care transportă mărfuri.')
+
+        # a stacked overlay sees the edits of its base, and saving an overlay merges it with its base
+        stacked = overlay.overlay()
+        stacked.remove_relation('ENG30-00000004-n', 'ENG30-00000001-n')
+        self.assertEqual(stacked.synsets('vagon'), ['ENG30-00000004-n'])
+        self.assertEqual(stacked.inbound_relations('ENG30-00000001-n'), [('ENG30-00000002-n', 'hypernym')])
+        self.assertEqual(len(overlay.inbound_relations('ENG30-00000001-n')), 2)
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "overlay.pickle")
+            overlay.save(filename)
+            saved = RoWordNet(filename)
+        self.assertEqual(saved.synsets(), overlay.synsets())
+        self.assertEqual(list(saved._edges()), list(overlay._edges()))
+        self.assertEqual(merge(wn, overlay).synsets('vagon'), ['ENG30-00000004-n'])
+
+    def test_versioned(self):
+        from rowordnet import RoWordNet, RoWordNetOverlay, VersionedRoWordNet
+
+        versioned = VersionedRoWordNet(_small_wordnet(), max_changes=3)
+        first = versioned.snapshot()
+        self.assertEqual(versioned.version, 0)
+
+        with versioned.write() as draft:
+            draft.edit_synset('ENG30-00000001-n').add_literal('garnitură', '2')
+            draft.add_relation('ENG30-00000003-n', 'ENG30-00000001-n', 'near_antonym')
+        second = versioned.snapshot()
+        self.assertEqual(versioned.version, 1)
+        self.assertIsInstance(second, RoWordNetOverlay)
+        self.assertEqual(second.synsets('garnitură'), ['ENG30-00000001-n'])
+        self.assertEqual(first.synsets('garnitură'), [])
+        self.assertFalse(first.relation_exists('ENG30-00000003-n', 'ENG30-00000001-n', 'near_antonym'))
+
+        # the next version doesn't share its changed synsets with the previous one
+        with versioned.write() as draft:
+            draft.edit_synset('ENG30-00000001-n').remove_literal('tren')
+        self.assertEqual(versioned.snapshot()('ENG30-00000001-n').literals, ['garnitură'])
+        self.assertEqual(second('ENG30-00000001-n').literals, ['tren', 'garnitură'])
+        self.assertEqual(second.synsets('tren', strict=True), ['ENG30-00000001-n'])
+
+        # a failed write is discarded
+        with self.assertRaises(ZeroDivisionError):
+            with versioned.write() as draft:
+                draft.remove_synset('ENG30-00000002-n')
+                1 / 0
+        self.assertEqual(versioned.version, 2)
+        self.assertIn('ENG30-00000002-n', versioned.snapshot().synsets())
+
+        # past max_changes, the edits are merged into a new base
+        with versioned.write() as draft:
+            draft.remove_synset('ENG30-00000002-n')
+        self.assertIs(type(versioned.snapshot()), RoWordNet)
+        self.assertEqual(versioned.snapshot().synsets(), ['ENG30-00000001-n', 'ENG30-00000003-n'])
+        self.assertEqual(versioned.snapshot().outbound_relations('ENG30-00000003-n'),
+                         [('ENG30-00000001-n', 'near_antonym')])
+
+    def test_serve(self):
+        import json
+        import asyncio
+        from rowordnet.serve import Server
+
+        async def session(workers):
+            server = Server(_small_wordnet(), workers=workers, batch_window=0.01)
+            host, port = await server.start(port=0)
+            reader, writer = await asyncio.open_connection(host, port)
+            requests = [
+                {"id": 1, "method": "synsets", "params": {"literal": "tren", "pos": "n"}},
+                {"id": 2, "method": "wup_similarity", "params": {"synset_id1": "ENG30-00000001-n",
+                                                                 "synset_id2": "ENG30-00000002-n"}},
+                {"id": 3, "method": "shortest_path", "params": {"synset_id1": "ENG30-00000002-n",
+                                                                "synset_id2": "ENG30-00000001-n"}},
+                {"id": 4, "method": "synset", "params": {"synset_id": "ENG30-00000009-n"}},
+                {"id": 5, "method": "remove_synset", "params": {"synset_id": "ENG30-00000001-n"}},
+            ]
+            for request in requests:
+                writer.write((json.dumps(request) + "\n").encode("utf-8"))
+            writer.write(b"not json\n")
+            await writer.drain()
+            responses = [json.loads(await reader.readline()) for _ in range(len(requests) + 1)]
+            writer.close()
+            await server.close()
+            return {response['id']: response for response in responses}
+
+        # without workers, and with the batches split between two workers
+        for workers in (0, 2):
+            responses = asyncio.run(session(workers))
+            self.assertEqual(responses[1]['result'], ['ENG30-00000001-n', 'ENG30-00000002-n'])
+            self.assertEqual(responses[2]['result'], _small_wordnet().wup_similarity('ENG30-00000001-n',
+                                                                                     'ENG30-00000002-n'))
+            self.assertEqual(responses[3]['result'], ['ENG30-00000002-n', 'ENG30-00000001-n'])
+            self.assertEqual(responses[4]['error']['type'], 'WordNetError')
+            self.assertEqual(responses[5]['error']['type'], 'ValueError')
+            self.assertEqual(responses[None]['error']['type'], 'JSONDecodeError')
+
+    def test_worker_pools(self):
+        from rowordnet import workers
+
+        wn_1, wn_2 = _small_wordnet(), _small_wordnet()
+        wn_2.remove_synset('ENG30-00000001-n')
+        # the workers of both pools start only when the first calls are submitted, after both pools exist
+        pool_1, pool_2 = workers.worker_pool(wn_1, 2), workers.worker_pool(wn_2, 2)
+        try:
+            calls = [('synsets', {'literal': 'tren', 'strict': True})]
+            self.assertEqual(pool_1.submit(workers.run_calls, calls).result(), [{'result': ['ENG30-00000001-n']}])
+            self.assertEqual(pool_2.submit(workers.run_calls, calls).result(), [{'result': []}])
+        finally:
+            pool_1.shutdown()
+            pool_2.shutdown()
+        self.assertIsNone(workers._wordnet)
+
+    def test_async(self):
+        import asyncio
+        from rowordnet import AsyncRoWordNet, WordNetError
+
+        wn = _small_wordnet()
+
+        async def session(workers):
+            async with AsyncRoWordNet(wn, workers=workers) as awn:
+                self.assertEqual(await awn.synsets('tren', strict=True), ['ENG30-00000001-n'])
+                self.assertEqual(await awn.shortest_path('ENG30-00000002-n', 'ENG30-00000001-n'),
+                                 ['ENG30-00000002-n', 'ENG30-00000001-n'])
+                self.assertEqual(await awn.bfwalk('ENG30-00000001-n'), list(wn.bfwalk('ENG30-00000001-n')))
+                pairs = [('ENG30-00000001-n', 'ENG30-00000002-n'), ('ENG30-00000002-n', 'ENG30-00000002-n')]
+                self.assertEqual(await awn.similarities(pairs, metric="path"),
+                                 [wn.path_similarity(*pair) for pair in pairs])
+                with self.assertRaises(WordNetError):
+                    await awn.wup_similarity('ENG30-00000001-n', 'ENG30-00000009-n')
+
+                with self.assertRaises(asyncio.TimeoutError):
+                    await awn.wup_similarity('ENG30-00000001-n', 'ENG30-00000002-n', timeout=0)
+                task = asyncio.ensure_future(awn.shortest_path('ENG30-00000002-n', 'ENG30-00000001-n'))
+                await asyncio.sleep(0)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+
+        asyncio.run(session(0))
+        asyncio.run(session(1))
+
+        # two live facades answer from their own wordnet
+        other_wn = _small_wordnet()
+        other_wn.remove_relation('ENG30-00000002-n', 'ENG30-00000001-n')
+
+        async def two_sessions():
+            async with AsyncRoWordNet(wn, workers=1) as awn, AsyncRoWordNet(other_wn, workers=1) as other_awn:
+                return await asyncio.gather(awn.bfwalk('ENG30-00000002-n'), other_awn.bfwalk('ENG30-00000002-n'))
+
+        self.assertEqual(asyncio.run(two_sessions()), [list(wn.bfwalk('ENG30-00000002-n')), []])
+
+        # leaving the facade waits for the workers without blocking the other tasks
+        async def closing_session():
+            ticks = []
+
+            async def ticker():
+                while True:
+                    ticks.append(None)
+                    await asyncio.sleep(0)
+
+            async with AsyncRoWordNet(wn, workers=1) as awn:
+                await awn.bfwalk('ENG30-00000001-n')
+                task = asyncio.ensure_future(ticker())
+                await asyncio.sleep(0)
+                ticks_before_close = len(ticks)
+            task.cancel()
+            self.assertIsNone(awn._pool)
+            return len(ticks) - ticks_before_close
+
+        self.assertGreater(asyncio.run(closing_session()), 0)
+
+    def test_lazy_backends(self):
+        # importing the package doesn't import the other backends, nor what they depend on
+        code = ("import sys, rowordnet; print(sorted(name for name in sys.modules if name.startswith('rowordnet.') "
+                "or name == 'multiprocessing.shared_memory'))")
+        output = subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE, universal_newlines=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), check=True).stdout
+        for module in ('overlay', 'sharedmem', 'sqlitedb', 'versioned', 'aio'):
+            self.assertNotIn("'rowordnet.{}'".format(module), output)
+        self.assertNotIn('multiprocessing.shared_memory', output)
+
+        import rowordnet
+        from rowordnet import SqliteRoWordNet
+        from rowordnet.sqlitedb import SqliteRoWordNet as sqlite_backend
+        self.assertIs(SqliteRoWordNet, sqlite_backend)
+        self.assertIn('AsyncRoWordNet', dir(rowordnet))
+        with self.assertRaises(AttributeError):
+            rowordnet.MissingRoWordNet
+
+    @unittest.skipIf(sys.version_info < (3, 8), "multiprocessing.shared_memory is new in python 3.8")
+    def test_shared_memory(self):
+        import pickle
+        from rowordnet import RoWordNet, SharedRoWordNet, WordNetError
+
+        wn = _small_wordnet()
+        block = wn.publish()
+        try:
+            shared = RoWordNet.attach(block.name)
+            self.assertIsInstance(shared, SharedRoWordNet)
+            self.assertEqual(shared.synsets(), wn.synsets())
+            self.assertEqual(shared.synsets('tren'), wn.synsets('tren'))
+            self.assertEqual(shared.synsets('tren', strict=True), ['ENG30-00000001-n'])
+            self.assertEqual(shared.synsets('vagon'), [])
+            self.assertEqual(shared.synset_by_sense('marfar', '1'), 'ENG30-00000002-n')
+            self.assertEqual(shared('ENG30-00000002-n').definition, 'Tren care transportă mărfuri.')
+            self.assertEqual(shared.inbound_relations('ENG30-00000001-n'), [('ENG30-00000002-n', 'hypernym')])
+            self.assertEqual(shared.shortest_path('ENG30-00000001-n', 'ENG30-00000002-n'),
+                             ['ENG30-00000001-n', 'ENG30-00000002-n'])
+            for metric in ('path', 'wup'):
+                similarity = metric + '_similarity'
+                self.assertEqual(getattr(shared, similarity)('ENG30-00000002-n', 'ENG30-00000003-n'),
+                                 getattr(wn, similarity)('ENG30-00000002-n', 'ENG30-00000003-n'))
+            self.assertEqual(list(shared.multiword_expressions(['un', 'tren', 'de', 'marfă'])),
+                             list(wn.multiword_expressions(['un', 'tren', 'de', 'marfă'])))
+
+            # the decoded synsets are cached, and a changed one is decoded again from the block
+            shared.enable_profiling()
+            synset = shared.synset('ENG30-00000003-n')
+            self.assertIs(shared('ENG30-00000003-n'), synset)
+            synset.add_literal('drum_de_fier', '1')
+            shared.stats(reset=True)
+            self.assertEqual(shared.synset('ENG30-00000003-n').literals, ['calea_ferată', 'cale_ferată'])
+            shared.synset('ENG30-00000003-n')
+            self.assertEqual(shared.synsets('drum_de_fier'), [])
+            caches = shared.stats()['caches']['synsets']
+            self.assertEqual((caches['hits'], caches['misses']), (1, 1))
+            shared.disable_profiling()
+
+            # the shared wordnet can't be changed, an overlay of it can
+            with self.assertRaises(WordNetError):
+                shared.remove_relation('ENG30-00000002-n', 'ENG30-00000001-n')
+            with self.assertRaises(WordNetError):
+                shared.remove_synset('ENG30-00000003-n')
+            overlay = shared.overlay()
+            overlay.remove_synset('ENG30-00000003-n')
+            self.assertEqual(len(overlay.synsets()), 2)
+            del overlay
+
+            # it's pickled as the name of the block
+            copy = pickle.loads(pickle.dumps(shared))
+            self.assertEqual(list(copy._edges()), list(wn._edges()))
+            copy.close()
+            shared.close()
+        finally:
+            block.close()
+            block.unlink()
+
+    def test_cli(self):
+        import json
+        import tempfile
+        from rowordnet.cli import main
+
+        wn = _small_wordnet()
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "wordnet.pickle")
+            wn.save(filename)
+            pairs = os.path.join(directory, "pairs.tsv")
+            with open(pairs, "w", encoding="utf-8") as f:
+                f.write("ENG30-00000002-n\tENG30-00000001-n\n"
+                        "tren_de_marfă\ttren\n"
+                        "ENG30-00000009-n\n")
+            for processes in ('1', '2'):
+                output = os.path.join(directory, "scores{}.tsv".format(processes))
+                main(["similarity", pairs, "-o", output, "--metric", "path", "--filename", filename, "-p", processes,
+                      "--chunk-size", "1", "-q"])
+                with open(output, encoding="utf-8") as f:
+                    self.assertEqual(f.read().splitlines(), [
+                        "ENG30-00000002-n\tENG30-00000001-n\t0.3333333333333333\t",
+                        "tren_de_marfă\ttren\t0.3333333333333333\t",
+                        "ENG30-00000009-n\t\tValueError: Missing field 'synset_id2'"])
+
+            words = os.path.join(directory, "words.jsonl")
+            with open(words, "w", encoding="utf-8") as f:
+                f.write('{"literal": "tren", "id": 7}\n{"literal": "vagon"}\n')
+            output = os.path.join(directory, "synsets.jsonl")
+            main(["lookup", words, "-o", output, "--filename", filename, "-p", "1", "-q"])
+            with open(output, encoding="utf-8") as f:
+                self.assertEqual([json.loads(line) for line in f], [
+                    {"literal": "tren", "id": 7, "result": ['ENG30-00000001-n', 'ENG30-00000002-n']},
+                    {"literal": "vagon", "result": []}])
+
+    def test_profiling(self):
+        import pickle
+        import itertools
+        from rowordnet import WordNetError
+
+        wn = _small_wordnet()
+        calls = []
+        wn.enable_profiling(lambda name, elapsed, error: calls.append((name, error)))
+        wn.path_similarity('ENG30-00000001-n', 'ENG30-00000002-n')
+        list(itertools.islice(wn.bfwalk('ENG30-00000002-n'), 1))
+        list(wn.multiword_expressions(["un", "tren", "de", "marfă"]))
+        list(wn.multiword_expressions(["tren"]))
+        with self.assertRaises(WordNetError):
+            wn.synset('ENG30-00000009-n')
+
+        stats = wn.stats()
+        self.assertEqual(stats['methods']['shortest_path']['calls'], 1)
+        self.assertEqual(stats['methods']['bfwalk'], dict(stats['methods']['bfwalk'], calls=1, errors=0))
+        self.assertEqual(stats['methods']['synset']['errors'], 1)
+        self.assertLessEqual(stats['methods']['synset']['p99'], stats['methods']['synset']['max'])
+        self.assertEqual(stats['caches']['mwe_trie'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+        self.assertIn(('path_similarity', False), calls)
+        self.assertIn(('synset', True), calls)
+
+        self.assertEqual(pickle.loads(pickle.dumps(wn)).stats(), {'methods': {}, 'caches': {}})
+        wn.stats(reset=True)
+        self.assertEqual(wn.stats(), {'methods': {}, 'caches': {}})
+        wn.disable_profiling()
+        wn.synsets("tren")
+        self.assertNotIn('synsets', wn.__dict__)
+        self.assertEqual(wn.stats(), {'methods': {}, 'caches': {}})
+
+    def test_memory_report(self):
+        from rowordnet import RoWordNet
+
+        wn = _small_wordnet()
+        report = wn.memory_report()
+        structures = report['structures']
+        self.assertEqual(report['backend'], 'RoWordNet')
+        self.assertEqual(set(structures), {'graph', 'hypernym_graph', 'synsets', 'literal2synset',
+                                           'literal2synset_strict', 'sense2synset', 'indexes'})
+        # 5 literals and 3 synset ids, the same string objects as the ones of the synsets
+        self.assertEqual(structures['literal2synset_strict']['strings'], 8)
+        self.assertEqual(structures['literal2synset_strict']['shared_strings'], 8)
+        self.assertLess(report['total']['objects'], sum(structure['objects'] for structure in structures.values()))
+        self.assertLess(structures['graph']['unique_bytes'], structures['graph']['bytes'])
+
+        overlay = wn.overlay()
+        overlay.edit_synset('ENG30-00000003-n').definition = "Cale ferată."
+        report = overlay.memory_report()
+        self.assertEqual(report['structures']['graph']['objects'], 5)
+        self.assertEqual(report['base']['total'], wn.memory_report()['total'])
+
+        if sys.version_info < (3, 8):
+            return
+        block = wn.publish()
+        try:
+            shared = RoWordNet.attach(block.name)
+            self.assertGreater(shared.memory_report()['total']['buffer_bytes'], 0)
+            shared.close()
+        finally:
+            block.close()
+            block.unlink()
+
+    def test_load_profile(self):
+        import tempfile
+        from rowordnet import RoWordNet
+
+        # a cycle of hyponyms doesn't make the height infinite
+        wn = _small_wordnet()
+        wn.add_relation('ENG30-00000002-n', 'ENG30-00000003-n', 'hyponym')
+        self.assertEqual(wn._hypernym_tree_height('ENG30-00000001-n'), 2)
+        wn.add_relation('ENG30-00000003-n', 'ENG30-00000001-n', 'hyponym')
+        self.assertEqual(wn._hypernym_tree_height('ENG30-00000001-n'), 2)
+
+        wn = _small_wordnet()
+
+        with tempfile.TemporaryDirectory() as directory:
+            for xml, phases in ((False, ['read', 'unpickle', 'graph', 'synsets', 'literal_index', 'sense_index',
+                                         'hypernym_height']),
+                                (True, ['read', 'parse', 'synsets', 'hypernym_graph', 'hypernym_height'])):
+                filename = os.path.join(directory, "wordnet.xml" if xml else "wordnet.pickle")
+                wn.save(filename, xml=xml)
+                reports = []
+                loaded = RoWordNet(filename, xml=xml, progress=lambda *report: reports.append(report))
+                self.assertEqual(list(loaded.load_profile), phases)
+                self.assertEqual(list(dict.fromkeys(phase for phase, _, _ in reports)), phases)
+                self.assertIn(('synsets', 3, 3), reports)
+                self.assertEqual(sorted(loaded._hypernym_graph.edges), sorted(wn._hypernym_graph.edges))
+                self.assertIn('ENG30-00000003-n', loaded._graph)
+
+                loaded.load(filename, xml=xml)
+                self.assertEqual(list(loaded.load_profile), phases[:-1])
+
+    def test_lch_similarity(self):
+        import math
+        import tempfile
+        from rowordnet import RoWordNet, Synset, WordNetError
+
+        # a wordnet without the root synset of the full wordnet, built from scratch and loaded from a file, gets the
+        # height of its own hypernym trees
+        wn = _small_wordnet()
+        wn.add_synset(Synset('ENG30-00000004-n', literals=['locomotivă'], literals_senses=['1']))
+        wn.add_relation('ENG30-00000004-n', 'ENG30-00000002-n', 'hypernym')
+        wn.add_relation('ENG30-00000002-n', 'ENG30-00000004-n', 'hyponym')
+        self.assertIsNone(wn._max_hypernym_height)
+        self.assertAlmostEqual(wn.lch_similarity('ENG30-00000004-n', 'ENG30-00000001-n'), -math.log2(4 / 4))
+        self.assertEqual(wn._max_hypernym_height, 2)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "wordnet.jsonl")
+            wn.save(filename, format="jsonl")
+            loaded = RoWordNet(filename, format="jsonl")
+        self.assertEqual(loaded._max_hypernym_height, 2)
+        self.assertEqual(loaded.lch_similarity('ENG30-00000004-n', 'ENG30-00000001-n'),
+                         wn.lch_similarity('ENG30-00000004-n', 'ENG30-00000001-n'))
+
+        wn = RoWordNet(empty=True)
+        wn.add_synset(Synset('ENG30-00000001-n', literals=['tren'], literals_senses=['1']))
+        self.assertRaises(WordNetError, wn.lch_similarity, 'ENG30-00000001-n', 'ENG30-00000001-n')
+
+    def test_sqlite(self):
+        import pickle
+        import tempfile
+        from rowordnet import RoWordNet, Synset, WordNetError
+
+        wn = _small_wordnet()
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "wordnet.sqlite")
+            wn.save(filename, format="sqlite")
+            self.assertRaises(ValueError, wn.save, filename, format="csv")
+            self.assertRaises(WordNetError, RoWordNet.open_sqlite, __file__)
+
+            sqlite_wn = RoWordNet.open_sqlite(filename, cache_size=64)
+            self.assertEqual(sqlite_wn.synsets(), wn.synsets())
+            self.assertEqual(sqlite_wn.synsets("tren"), wn.synsets("tren"))
+            self.assertEqual(sqlite_wn.synsets("marfă", strict=True), [])
+            self.assertEqual(sqlite_wn.synset_by_sense("marfar", "1"), 'ENG30-00000002-n')
+            self.assertEqual(sqlite_wn.synset('ENG30-00000003-n').literals, ['calea_ferată', 'cale_ferată'])
+            self.assertEqual(sqlite_wn.outbound_relations('ENG30-00000002-n'), [('ENG30-00000001-n', 'hypernym')])
+            self.assertEqual(sqlite_wn.inbound_relations('ENG30-00000002-n'), [('ENG30-00000001-n', 'hyponym')])
+            self.assertEqual(list(sqlite_wn.bfwalk('ENG30-00000001-n')), list(wn.bfwalk('ENG30-00000001-n')))
+            self.assertEqual(sqlite_wn.shortest_path('ENG30-00000002-n', 'ENG30-00000001-n'),
+                             ['ENG30-00000002-n', 'ENG30-00000001-n'])
+            self.assertEqual(sqlite_wn.path_similarity('ENG30-00000002-n', 'ENG30-00000001-n'),
+                             wn.path_similarity('ENG30-00000002-n', 'ENG30-00000001-n'))
+            self.assertEqual(pickle.loads(pickle.dumps(sqlite_wn)).synsets("marfar"), ['ENG30-00000002-n'])
+
+            # the decoded synsets are cached, and a changed one is decoded again from the file
+            sqlite_wn.enable_profiling()
+            synset = sqlite_wn.synset('ENG30-00000003-n')
+            self.assertIs(sqlite_wn('ENG30-00000003-n'), synset)
+            synset.definition = 'Cale ferată.'
+            sqlite_wn.stats(reset=True)
+            self.assertEqual(sqlite_wn.synset('ENG30-00000003-n').definition, 'Drum format din șine de fier.')
+            sqlite_wn.synset('ENG30-00000003-n')
+            caches = sqlite_wn.stats()['caches']['synsets']
+            self.assertEqual((caches['hits'], caches['misses']), (1, 1))
+            sqlite_wn.disable_profiling()
+
+            self.assertRaises(WordNetError, sqlite_wn.add_synset, Synset('ENG30-00000009-n'))
+            self.assertRaises(WordNetError, sqlite_wn.add_relation, 'ENG30-00000003-n', 'ENG30-00000001-n',
+                              'hypernym')
+            overlay = sqlite_wn.overlay()
+            overlay.add_relation('ENG30-00000003-n', 'ENG30-00000001-n', 'hypernym')
+            self.assertEqual(overlay.outbound_relations('ENG30-00000003-n'), [('ENG30-00000001-n', 'hypernym')])
+            del overlay
+            sqlite_wn.close()
+
+    def test_jsonl(self):
+        import json
+        import tempfile
+        from rowordnet import RoWordNet, WordNetError
+
+        wn = _small_wordnet()
+        lines = list(wn.iter_synsets_jsonl())
+        self.assertEqual(len(lines), 3)
+        record = json.loads(lines[1])
+        self.assertEqual(record['id'], 'ENG30-00000002-n')
+        self.assertEqual(record['relations'], [['ENG30-00000001-n', 'hypernym']])
+
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ("wordnet.jsonl", "wordnet.jsonl.gz", "wordnet.jsonl.xz"):
+                filename = os.path.join(directory, name)
+                wn.save(filename, format="jsonl")
+                loaded = RoWordNet(filename, format="jsonl")
+                self.assertEqual(loaded.synsets(), wn.synsets())
+                self.assertEqual(loaded.synsets("tren"), wn.synsets("tren"))
+                self.assertEqual(loaded.synset_by_sense("marfar", "1"), 'ENG30-00000002-n')
+                self.assertEqual(loaded.synset('ENG30-00000003-n').literals, ['calea_ferată', 'cale_ferată'])
+                self.assertEqual(loaded.inbound_relations('ENG30-00000002-n'), [('ENG30-00000001-n', 'hyponym')])
+                self.assertEqual(loaded.shortest_path('ENG30-00000002-n', 'ENG30-00000001-n'),
+                                 ['ENG30-00000002-n', 'ENG30-00000001-n'])
+                self.assertEqual(list(loaded.load_profile), ['stream', 'graph', 'hypernym_height'])
+            self.assertRaises(ValueError, RoWordNet, filename, format="sqlite")
+
+            filename = os.path.join(directory, "broken.jsonl")
+            with open(filename, "w", encoding="utf-8") as f:
+                f.writelines(lines[1:])
+            self.assertRaises(WordNetError, RoWordNet, filename, format="jsonl")
+            with open(filename, "w", encoding="utf-8") as f:
+                f.writelines([lines[0], "{\"id\": \n"])
+            self.assertRaises(WordNetError, RoWordNet, filename, format="jsonl")
+            for relations in ([["ENG30-00000001-n"]], [1], {"ab": 1}, [["ENG30-00000001-n", 1]]):
+                record = json.loads(lines[1])
+                record['relations'] = relations
+                with open(filename, "w", encoding="utf-8") as f:
+                    f.writelines([lines[0], json.dumps(record) + "\n"])
+                with self.assertRaisesRegex(WordNetError, "Line 2 of .* is not a synset record"):
+                    RoWordNet(filename, format="jsonl")
+
+
+def _small_wordnet():
+    from rowordnet import RoWordNet, Synset
+
+    wn = RoWordNet(empty=True)
+    for relation_type in ['hypernym', 'hyponym', 'near_antonym']:
+        wn.add_relation_type(relation_type)
+
+    wn.add_synset(Synset('ENG30-00000001-n', pos=Synset.Pos.NOUN, definition='Vehicul care circulă pe șine.',
+                         literals=['tren'], literals_senses=['1']))
+    wn.add_synset(Synset('ENG30-00000002-n', pos=Synset.Pos.NOUN, definition='Tren care transportă mărfuri.',
+                         literals=['tren_de_marfă', 'marfar'], literals_senses=['1', '1']))
+    wn.add_synset(Synset('ENG30-00000003-n', pos=Synset.Pos.NOUN, definition='Drum format din șine de fier.',
+                         literals=['calea_ferată', 'cale_ferată'], literals_senses=['1', '1']))
+    wn.add_relation('ENG30-00000002-n', 'ENG30-00000001-n', 'hypernym')
+    wn.add_relation('ENG30-00000001-n', 'ENG30-00000002-n', 'hyponym')
+
+    return wn
+
 if __name__ == '__main__':
     """ Recreate binary from xml
     from rowordnet import RoWordNet